@@ -4,18 +4,26 @@ from tkinter import filedialog, messagebox, ttk
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
 from PIL import Image, ImageTk, ImageDraw, ImageFont
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
 import time
-from sklearn.metrics import confusion_matrix, accuracy_score
-import seaborn as sns
 import threading
-from ultralytics import YOLO
-import pandas as pd
 import json
 from tkinter import simpledialog
 from typing import List, Dict, Optional, Tuple
+from src.inference import BatchInference, DEFAULT_BATCH_SIZE, format_pipeline_stats, list_images, load_model, warm_up
+from src.workers import ScalingReport, WorkerPool
+from src.result_cache import ResultCache, model_fingerprint, run_cached
+from src.export import format_for, open_exporter
+
+# Paleta "tab20" do matplotlib, sem importar o matplotlib só por ela
+TAB20_COLORS = [
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c", "#98df8a", "#d62728", "#ff9896",
+    "#9467bd", "#c5b0d5", "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f", "#c7c7c7",
+    "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+]
+
+# Módulos pesados (ultralytics importa torch) carregados só depois da janela aparecer
+WARM_UP_DELAY_MS = 300
+
 
 class ModernApp:
     def __init__(self, root):
@@ -42,6 +50,7 @@ class ModernApp:
         
         # Variáveis de estado
         self.model = None
+        self.model_path = None
         self.image_folder = ""
         self.image_files = []
         self.results = []
@@ -49,12 +58,34 @@ class ModernApp:
         self.class_names = []
         self.running = False
         self.class_colors = {}
+        self.batch_size = tk.IntVar(value=DEFAULT_BATCH_SIZE)
+        self.pipeline_summary = ""
+        # 1 = threads no próprio processo; N > 1 = N processos, cada um com o modelo
+        self.process_count = tk.IntVar(value=1)
+        self.worker_pool = None
+        self.scaling = ScalingReport()
+        self.result_cache = self.open_result_cache()
         
         # Layout
         self.create_widgets()
         
         # Configuração de atalhos de teclado
         self.setup_keyboard_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Janela já desenhada primeiro; os imports pesados vêm depois, numa thread
+        self.root.after(WARM_UP_DELAY_MS, self.start_warm_up)
+    
+    def open_result_cache(self):
+        # Sem cache (disco somente leitura, banco corrompido) a inferência roda normalmente
+        try:
+            return ResultCache()
+        except Exception as e:
+            print(f"Result cache unavailable: {str(e)}")
+            return None
+    
+    def start_warm_up(self):
+        threading.Thread(target=warm_up, daemon=True).start()
     
     def setup_keyboard_shortcuts(self):
         self.root.bind("<Left>", lambda e: self.show_previous_image())
@@ -183,6 +214,21 @@ class ModernApp:
         )
         self.stop_btn.pack(fill=tk.X, pady=5)
         
+        # Tamanho do lote: imagens por forward do modelo
+        batch_frame = ttkb.Frame(control_frame)
+        batch_frame.pack(fill=tk.X, pady=5)
+        ttkb.Label(batch_frame, text="Batch size", font=self.normal_font).pack(side=tk.LEFT)
+        self.batch_spin = ttkb.Spinbox(batch_frame, from_=1, to=256, width=6, textvariable=self.batch_size)
+        self.batch_spin.pack(side=tk.RIGHT)
+        
+        # Processos de inferência; o pool é reaproveitado entre execuções
+        process_frame = ttkb.Frame(control_frame)
+        process_frame.pack(fill=tk.X, pady=5)
+        ttkb.Label(process_frame, text="Processes", font=self.normal_font).pack(side=tk.LEFT)
+        self.process_spin = ttkb.Spinbox(process_frame, from_=1, to=os.cpu_count() or 1, width=6,
+                                         textvariable=self.process_count)
+        self.process_spin.pack(side=tk.RIGHT)
+        
         # Progresso
         self.progress = ttkb.Progressbar(
             control_frame,
@@ -199,6 +245,14 @@ class ModernApp:
         )
         self.progress_label.pack(fill=tk.X)
         
+        self.cache_status = ttkb.Label(
+            control_frame,
+            text="",
+            bootstyle="#000000",
+            font=self.normal_font
+        )
+        self.cache_status.pack(fill=tk.X)
+        
         # Seção de navegação
         nav_frame = ttkb.Labelframe(
             self.control_frame, 
@@ -403,31 +457,62 @@ class ModernApp:
         
         if file_path:
             try:
-                self.model = YOLO(file_path)
-                self.class_names = self.model.names if hasattr(self.model, 'names') else []
-                
-                if not self.class_names:
-                    num_classes = self.model.model.nc if hasattr(self.model.model, 'nc') else 0
-                    self.class_names = [f"class_{i}" for i in range(num_classes)]
+                self.model_status.config(text="Loading model...")
+                self.root.update_idletasks()
+                self.model, self.class_names = load_model(file_path)
+                self.model_path = file_path
+                if self.result_cache is not None:
+                    self.result_cache.set_model(model_fingerprint(file_path), self.class_names)
                 
                 self.model_status.config(text=f"Model: {os.path.basename(file_path)}")
                 self.update_buttons_state()
                 self.generate_class_colors()
+                self.prepare_worker_pool()
+                self.update_cache_status()
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load model: {str(e)}")
                 self.model = None
                 self.model_status.config(text="No model loaded")
     
+    def get_process_count(self):
+        try:
+            return max(1, self.process_count.get())
+        except tk.TclError:
+            return 1
+    
+    def prepare_worker_pool(self):
+        """Inicia (ou reaproveita) o pool de processos; o modelo carrega nos workers em segundo plano."""
+        if self.running:
+            # O pool em uso só muda na próxima execução
+            return self.worker_pool
+        workers = self.get_process_count()
+        if self.worker_pool is not None and self.worker_pool.matches(self.model_path, workers):
+            return self.worker_pool
+        self.close_worker_pool()
+        if workers > 1 and self.model_path:
+            self.worker_pool = WorkerPool(self.model_path, workers)
+        return self.worker_pool
+    
+    def close_worker_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
+    
+    def on_close(self):
+        self.running = False
+        self.close_worker_pool()
+        if self.result_cache is not None:
+            self.result_cache.close()
+        self.root.destroy()
+    
     def generate_class_colors(self):
         """Gera cores distintas para cada classe"""
-        colors = plt.cm.get_cmap('tab20', len(self.class_names))
         self.class_colors = {}
         
+        # Mesmo resultado de plt.cm.get_cmap('tab20', n): a paleta se repete após 20 classes
         for i, class_name in enumerate(self.class_names):
-            r, g, b, _ = colors(i)
-            hex_color = '#%02x%02x%02x' % (int(r*255), int(g*255), int(b*255))
-            self.class_colors[class_name] = hex_color
+            self.class_colors[class_name] = TAB20_COLORS[i % len(TAB20_COLORS)]
     
     def load_image_folder(self):
         folder_path = filedialog.askdirectory(title="Select Image Folder")
@@ -435,12 +520,7 @@ class ModernApp:
         if folder_path:
             try:
                 self.image_folder = folder_path
-                self.image_files = []
-                
-                for root, _, files in os.walk(folder_path):
-                    for file in files:
-                        if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-                            self.image_files.append(os.path.join(root, file))
+                self.image_files = list_images(folder_path)
                 
                 if not self.image_files:
                     raise ValueError("No images found in the selected folder")
@@ -465,7 +545,9 @@ class ModernApp:
     def start_inference(self):
         if not self.model or not self.image_files:
             return
-            
+        
+        # Antes de running: com o mesmo modelo e número de processos o pool é reaproveitado
+        self.inference_pool = self.prepare_worker_pool()
         self.running = True
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
@@ -480,6 +562,12 @@ class ModernApp:
         self.results = []
         self.results_tree.delete(*self.results_tree.get_children())
         
+        # Variáveis do Tk só são lidas na thread principal
+        try:
+            self.inference_batch_size = max(1, self.batch_size.get())
+        except tk.TclError:
+            self.inference_batch_size = DEFAULT_BATCH_SIZE
+        
         self.inference_thread = threading.Thread(target=self.run_inference, daemon=True)
         self.inference_thread.start()
         
@@ -490,65 +578,56 @@ class ModernApp:
         self.progress_label.config(text="Process stopped")
     
     def run_inference(self):
+        total = len(self.image_files)
+        pool = self.inference_pool
+        should_stop = lambda: not self.running
+        
         try:
-            for i, img_path in enumerate(self.image_files):
-                if not self.running:
-                    break
+            if pool is not None:
+                runner = pool
                 
-                try:
-                    results = self.model(img_path)
-                    
-                    if not results or len(results) == 0:
-                        continue
-                        
-                    first_result = results[0]
-                    detections = []
-                    
-                    if hasattr(first_result, 'boxes') and first_result.boxes is not None:
-                        boxes = first_result.boxes
-                        for box in boxes:
-                            xyxy = box.xyxy[0].tolist()
-                            cls_id = int(box.cls[0].item())
-                            conf = box.conf[0].item()
-                            class_name = self.class_names[cls_id] if cls_id < len(self.class_names) else str(cls_id)
-                            
-                            detections.append({
-                                'class_id': cls_id,
-                                'class_name': class_name,
-                                'confidence': conf,
-                                'box': xyxy
-                            })
-                    
-                    # Processa os resultados para medidor/display/dígitos
-                    meter_detected = any(d['class_name'] == 'medidor' for d in detections)
-                    display_detected = any(d['class_name'] == 'display' for d in detections)
-                    digits = [d for d in detections if d['class_name'].isdigit()]
-                    
-                    # Ordena dígitos da esquerda para a direita
-                    digits_sorted = sorted(digits, key=lambda x: x['box'][0])
-                    digit_values = [d['class_name'] for d in digits_sorted]
-                    
-                    result = {
-                        'image_path': img_path,
-                        'detections': detections,
-                        'meter_detected': meter_detected,
-                        'display_detected': display_detected,
-                        'digits': "".join(digit_values) if digit_values else None,
-                        'digits_confidence': np.mean([d['confidence'] for d in digits_sorted]) if digits_sorted else 0.0
-                    }
-                    
+                def run_model(paths, should_stop):
+                    # Cada processo lê os lotes inteiros: decode, modelo e pós-processamento
+                    self.root.after(0, lambda: self.progress_label.config(text="Starting worker processes..."))
+                    pool.wait_ready()
+                    return pool.run(paths, should_stop, self.inference_batch_size)
+            else:
+                # Pipeline decode -> infer -> postprocess; "Stop" descarta os lotes ainda na fila
+                runner = BatchInference(self.model, self.class_names, self.inference_batch_size)
+                run_model = runner.run
+            
+            if self.result_cache is not None:
+                # Só as imagens fora do cache passam pelo modelo; um "Stop" retoma daqui na próxima vez
+                results = run_cached(self.result_cache, self.image_files, run_model, should_stop)
+            else:
+                results = ((i, result, error, False) for i, result, error in run_model(self.image_files, should_stop))
+            
+            processed = 0
+            started = time.perf_counter()
+            for i, result, error, from_cache in results:
+                if not from_cache:
+                    processed += 1
+                if error is not None:
+                    print(f"Error processing image {self.image_files[i]}: {str(error)}")
+                else:
                     self.results.append(result)
                     self.root.after(0, lambda r=result: self.update_results_tree(r))
-                    
-                    self.progress["value"] = i + 1
-                    self.progress_label.config(text=f"Processing {i+1}/{len(self.image_files)}")
-                    
-                except Exception as e:
-                    print(f"Error processing image {img_path}: {str(e)}")
-                    continue
-                    
-                time.sleep(0.01)
+                
+                self.root.after(0, lambda n=i + 1: self.update_inference_progress(n, total))
             
+            if not processed:
+                self.pipeline_summary = "All results from cache"
+            else:
+                if pool is not None:
+                    stats = runner.stats()
+                    self.pipeline_summary = (f"{stats['workers']} processes x {stats['threads_per_worker']} threads, "
+                                             f"busy {stats['utilization'] * 100:.0f}%")
+                else:
+                    # Mostra qual estágio limitou a vazão (decodificação ou modelo)
+                    self.pipeline_summary = format_pipeline_stats(runner.stats())
+                # Vazão por número de processos, para comparar execuções (só imagens que passaram pelo modelo)
+                self.scaling.record(pool.workers if pool is not None else 1, processed, time.perf_counter() - started)
+                self.pipeline_summary += f"\nScaling: {self.scaling.summary()}"
             self.root.after(0, self.inference_completed)
             
         except Exception as e:
@@ -558,6 +637,17 @@ class ModernApp:
         finally:
             self.running = False
     
+    def update_cache_status(self):
+        if self.result_cache is None:
+            return
+        stats = self.result_cache.stats()
+        self.cache_status.config(text=f"Cache: {stats['entries']} results, {stats['bytes'] / 2**20:.1f}"
+                                      f"/{stats['max_bytes'] / 2**20:.0f} MB, hit rate {stats['hit_rate'] * 100:.0f}%")
+    
+    def update_inference_progress(self, done, total):
+        self.progress["value"] = done
+        self.progress_label.config(text=f"Processing {done}/{total}")
+    
     def update_results_tree(self, result):
         img_name = os.path.basename(result['image_path'])
         
@@ -573,6 +663,7 @@ class ModernApp:
         if self.running:
             if self.results and len(self.results) > self.current_image_idx:
                 self.display_current_image()
+            self.update_cache_status()
             
             self.root.after(100, self.update_ui_during_inference)
     
@@ -580,12 +671,13 @@ class ModernApp:
         self.running = False
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
+        self.update_cache_status()
         
         if len(self.results) > 0:
             self.prev_btn.config(state=tk.NORMAL if len(self.results) > 1 else tk.DISABLED)
             self.next_btn.config(state=tk.NORMAL if len(self.results) > 1 else tk.DISABLED)
             self.save_btn.config(state=tk.NORMAL)
-            self.progress_label.config(text=f"Completed! Processed {len(self.results)} images")
+            self.progress_label.config(text=f"Completed! Processed {len(self.results)} images\n{self.pipeline_summary}")
             self.current_image_idx = 0
             self.display_current_image()
             self.update_image_counter()
@@ -603,14 +695,12 @@ class ModernApp:
             img = Image.open(img_path)
             draw = ImageDraw.Draw(img)
             
-            for detection in result.get('detections', []):
-                class_name = detection['class_name']
-                x1, y1, x2, y2 = detection['box']
+            for class_name, confidence, (x1, y1, x2, y2) in result['detections']:
                 color = self.class_colors.get(class_name, "#202020")
                 
                 draw.rectangle([(x1, y1), (x2, y2)], outline=color, width=3)
                 
-                label = f"{class_name}: {detection['confidence']:.2f}"
+                label = f"{class_name}: {confidence:.2f}"
                 
                 try:
                     font = ImageFont.truetype("arial.ttf", 20)
@@ -698,42 +788,24 @@ class ModernApp:
         file_path = filedialog.asksaveasfilename(
             title="Save Results",
             defaultextension=".csv",
-            filetypes=[("CSV Files", "*.csv"), ("Text Files", "*.txt"), ("All files", "*.*")]
+            filetypes=[("CSV Files", "*.csv"), ("Text Files", "*.txt"), ("Parquet (with boxes)", "*.parquet"),
+                       ("Arrow (with boxes)", "*.arrow"), ("JSON Lines (with boxes)", "*.jsonl"),
+                       ("All files", "*.*")]
         )
         
         if file_path:
             try:
-                data = []
-                
-                for result in self.results:
-                    img_name = os.path.basename(result['image_path'])
-                    
-                    data.append({
-                        'Imagem': img_name,
-                        'Tem Medidor': "Yes" if result['meter_detected'] else "No",
-                        'Tem Display': "Yes" if result['display_detected'] else "No",
-                        'Dígitos Encontrados': result['digits'] if result['digits'] else "None",
-                        'Confiança': f"{result['digits_confidence']:.2f}" if result['digits'] else "N/A"
-                    })
-                
-                df = pd.DataFrame(data)
-                
-                if file_path.endswith('.txt'):
-                    # Formato de texto personalizado
-                    with open(file_path, 'w') as f:
-                        f.write("Imagem;Tem Medidor;Tem Display;Dígitos Encontrados;Confiança\n")
-                        for _, row in df.iterrows():
-                            f.write(f"{row['Imagem']};{row['Tem Medidor']};{row['Tem Display']};{row['Dígitos Encontrados']};{row['Confiança']}\n")
-                else:
-                    # Formato CSV padrão
-                    df.to_csv(file_path, index=False)
+                # Linhas gravadas direto de self.results, sem cópia intermediária;
+                # Parquet/Arrow em blocos com as caixas e confianças de cada detecção
+                with open_exporter(file_path, format_for(file_path, default='csv')) as exporter:
+                    for result in self.results:
+                        exporter.write(result)
                 
                 messagebox.showinfo("Success", f"Results saved to {file_path}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save results: {str(e)}")
 
-
 if __name__ == "__main__":
     root = ttkb.Window()
     app = ModernApp(root)
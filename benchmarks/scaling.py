@@ -0,0 +1,53 @@
+"""Vazão da inferência por número de processos e eficiência de escala.
+
+Para cada contagem de processos sobe um WorkerPool, espera os modelos
+carregarem e processa as mesmas imagens. Eficiência = vazão(N) / (N * vazão(1)).
+
+Uso:
+    python benchmarks/scaling.py modelo.pt pasta_de_imagens [--workers 1 2 4 8] [--limit 512]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.inference import DEFAULT_BATCH_SIZE, list_images  # noqa: E402
+from src.workers import ScalingReport, WorkerPool  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede a escala da inferência em vários processos")
+    parser.add_argument("model")
+    parser.add_argument("images")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=512)
+    args = parser.parse_args(argv)
+
+    paths = list_images(args.images)[:args.limit]
+    if not paths:
+        sys.exit("nenhuma imagem encontrada")
+
+    report = ScalingReport()
+    # A eficiência é relativa a um processo; ele é medido mesmo se não foi pedido
+    for workers in sorted(set(args.workers) | {1}):
+        pool = WorkerPool(args.model, workers)
+        try:
+            pool.wait_ready()
+            start = time.perf_counter()
+            errors = sum(1 for _, _, error in pool.run(paths, batch_size=args.batch_size) if error is not None)
+            seconds = time.perf_counter() - start
+        finally:
+            pool.close()
+        report.record(workers, len(paths), seconds)
+        efficiency = report.efficiency(workers)
+        print(f"{workers:3d} processos x {pool.threads:2d} threads: {len(paths) / seconds:8.1f} img/s"
+              f"  eficiência {efficiency * 100:5.1f}%" + (f"  ({errors} erros)" if errors else ""))
+
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
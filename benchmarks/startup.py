@@ -0,0 +1,67 @@
+"""Tempo de abertura do appInferencia: import do módulo e primeiro desenho da janela.
+
+Cada rodada usa um processo novo (import a frio). Falha com código 1 se a
+mediana do primeiro desenho passar do orçamento, para pegar regressões.
+
+Uso:
+    python benchmarks/startup.py [--runs 5] [--budget-ms 500]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que não devem estar carregados quando a janela aparece
+HEAVY_MODULES = ("ultralytics", "torch", "matplotlib", "pandas", "pyarrow", "seaborn", "sklearn")
+
+PROBE = r"""
+import sys, time, json
+start = time.perf_counter()
+import appInferencia
+imported = time.perf_counter()
+root = appInferencia.ttkb.Window()
+app = appInferencia.ModernApp(root)
+root.update()
+painted = time.perf_counter()
+heavy = [name for name in HEAVY if name in sys.modules]
+root.destroy()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_paint_ms': (painted - start) * 1000,
+                  'modules': len(sys.modules), 'heavy_loaded': heavy}))
+"""
+
+
+def run_once():
+    code = f"HEAVY = {HEAVY_MODULES!r}\n" + PROBE
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "falha no processo")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de abertura do appInferencia")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(run['import_ms'] for run in runs)
+    paint_ms = statistics.median(run['first_paint_ms'] for run in runs)
+    heavy = sorted({name for run in runs for name in run['heavy_loaded']})
+
+    print(f"import:          {import_ms:8.1f} ms (mediana de {args.runs})")
+    print(f"primeiro desenho: {paint_ms:8.1f} ms (orçamento {args.budget_ms:.0f} ms)")
+    print(f"módulos carregados: {runs[-1]['modules']}")
+    if heavy:
+        print(f"módulos pesados carregados antes da janela: {', '.join(heavy)}")
+
+    if paint_ms > args.budget_ms or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Inferência sem interface: a mesma detecção e montagem de dígitos do appInferencia.
+
+Percorre pastas, imagens avulsas ou listas de caminhos (.txt ou --list, um por linha) e
+grava um registro por imagem em JSONL ou CSV à medida que processa. Os
+caminhos são lidos em blocos de --chunk imagens, então a memória não depende
+do tamanho do conjunto. Não importa tkinter nem ttkbootstrap; pode rodar em
+cron ou em servidores sem display.
+
+Uso:
+    python inferencia_cli.py modelo.pt pasta [pasta|imagem|lista.txt ...] [--list lista] -o saida.jsonl
+        [--batch-size 16] [--processes 1] [--no-cache] [--chunk 4096]
+"""
+import os
+import sys
+import time
+import argparse
+from itertools import islice
+from src.inference import (BatchInference, DEFAULT_BATCH_SIZE, IMAGE_EXTENSIONS, format_pipeline_stats,
+                           iter_images, load_model)
+from src.export import EXPORTERS, open_exporter
+from src.pipeline import merge_stats
+from src.result_cache import ResultCache, model_fingerprint, run_cached
+from src.workers import WorkerPool
+
+REPORT_SECONDS = 5.0
+
+
+def input_error(source):
+    """Mensagem de erro para uma entrada que não é pasta, imagem nem lista .txt; None se válida."""
+    if os.path.isdir(source) or source.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    if source.lower().endswith(".txt"):
+        return None if os.path.isfile(source) else f"{source}: lista de caminhos não encontrada"
+    if not os.path.exists(source):
+        return f"{source}: arquivo ou pasta não encontrado"
+    return (f"{source}: não é uma pasta, imagem ({', '.join(IMAGE_EXTENSIONS)}) nem lista .txt; "
+            f"para uma lista com outra extensão use --list")
+
+
+def iter_list(path):
+    # Lista de caminhos, um por linha; lida aos poucos
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            path = line.strip()
+            if path:
+                yield path
+
+
+def iter_inputs(inputs, lists=()):
+    for source in inputs:
+        if os.path.isdir(source):
+            yield from iter_images(source)
+        elif source.lower().endswith(IMAGE_EXTENSIONS):
+            yield source
+        else:
+            yield from iter_list(source)
+    for source in lists:
+        yield from iter_list(source)
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Throughput:
+    """Contadores da execução e uma linha de progresso no stderr a cada interval segundos."""
+
+    def __init__(self, interval=REPORT_SECONDS, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.images = 0
+        self.inferred = 0
+        self.cached = 0
+        self.errors = 0
+
+    def add(self, error, from_cache):
+        self.images += 1
+        if error is not None:
+            self.errors += 1
+        elif from_cache:
+            self.cached += 1
+        else:
+            self.inferred += 1
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final=False):
+        seconds = time.perf_counter() - self.started
+        rate = self.images / seconds if seconds > 0 else 0.0
+        label = "total" if final else "progresso"
+        print(f"[{label}] {self.images} imagens em {seconds:.1f} s ({rate:.1f} img/s): "
+              f"{self.inferred} inferidas, {self.cached} do cache, {self.errors} erros",
+              file=self.stream, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inferência YOLO de medidores sem interface gráfica")
+    parser.add_argument("model", help="pesos do YOLO (.pt)")
+    parser.add_argument("inputs", nargs="*", help="pastas, imagens ou listas de caminhos (.txt)")
+    parser.add_argument("--list", action="append", default=[], dest="lists", metavar="ARQUIVO",
+                        help="lista de caminhos, um por linha, com qualquer extensão (pode repetir)")
+    parser.add_argument("-o", "--output", default="-", help="arquivo .jsonl/.csv/.txt ou - para stdout (JSONL)")
+    parser.add_argument("--format", choices=sorted(EXPORTERS) + ['txt'], help="formato (padrão: pela extensão)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=1, help="processos de inferência (1 = threads)")
+    parser.add_argument("--chunk", type=int, default=4096, help="imagens lidas da entrada por vez")
+    parser.add_argument("--no-cache", action="store_true", help="não usa nem grava o cache de resultados")
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.lists:
+        parser.error("informe ao menos uma pasta, imagem ou lista")
+    # Entradas inválidas param antes de carregar o modelo
+    for source in args.inputs:
+        error = input_error(source)
+        if error:
+            parser.error(error)
+    for source in args.lists:
+        if not os.path.isfile(source):
+            parser.error(f"{source}: lista de caminhos não encontrada")
+
+    model, class_names = load_model(args.model)
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache()
+        cache.set_model(model_fingerprint(args.model), class_names)
+
+    pool = None
+    pipeline_stats = None
+    if args.processes > 1:
+        # O modelo do processo principal só serve para os nomes das classes
+        pool = WorkerPool(args.model, args.processes)
+        pool.wait_ready()
+
+        def run_model(paths, should_stop):
+            return pool.run(paths, should_stop, args.batch_size)
+    else:
+        runner = BatchInference(model, class_names, args.batch_size)
+
+        def run_model(paths, should_stop):
+            # Cada bloco é uma execução do pipeline; as estatísticas são somadas
+            nonlocal pipeline_stats
+            try:
+                yield from runner.run(paths, should_stop)
+            finally:
+                pipeline_stats = merge_stats(pipeline_stats, runner.stats())
+
+    stats = Throughput()
+    try:
+        with open_exporter(args.output, args.format) as exporter:
+            for paths in iter_chunks(iter_inputs(args.inputs, args.lists), max(1, args.chunk)):
+                if cache is not None:
+                    results = run_cached(cache, paths, run_model)
+                else:
+                    results = ((i, result, error, False) for i, result, error in run_model(paths, None))
+                for i, result, error, from_cache in results:
+                    if error is not None:
+                        print(f"Error processing image {paths[i]}: {str(error)}", file=sys.stderr)
+                    else:
+                        exporter.write(result)
+                    stats.add(error, from_cache)
+    except KeyboardInterrupt:
+        # O que já foi gravado fica no arquivo e no cache; a próxima execução retoma
+        print("Interrompido", file=sys.stderr)
+    finally:
+        stats.report(final=True)
+        if pipeline_stats is not None:
+            print(f"Pipeline: {format_pipeline_stats(pipeline_stats)}", file=sys.stderr)
+        if pool is not None:
+            pool.close()
+        if cache is not None:
+            cache.close()
+            cache_stats = cache.stats()
+            print(f"Cache: {cache_stats['entries']} resultados, {cache_stats['bytes'] / 2**20:.1f} MB, "
+                  f"acerto {cache_stats['hit_rate'] * 100:.0f}%", file=sys.stderr)
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
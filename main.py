@@ -1,8 +1,10 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
 from src.ui import WelcomeScreen, MainUI
 from src.core import YOLOAnnotationCore
 from src.styles import StyleManager
+from src import profiler
 
 class YOLOLabelApp:
     def __init__(self, root):
@@ -29,9 +31,24 @@ class YOLOLabelApp:
         self.main_ui = MainUI(self.root, self.core)
 
 def main():
+    parser = argparse.ArgumentParser(description="Advanced YOLO Label Tool")
+    parser.add_argument("--profile", nargs="?", const=profiler.DEFAULT_REPORT, default=None,
+                        help="mede a latência da interface e grava o relatório (.json ou .csv)")
+    args = parser.parse_args()
+    
+    # Instrumentação só quando pedida; precisa vir antes de criar a interface
+    report_path = args.profile or profiler.requested()
+    if report_path:
+        profiler.enable(MainUI, YOLOAnnotationCore)
+    
     root = tk.Tk()
     app = YOLOLabelApp(root)
+    if report_path:
+        profiler.active.start_heartbeat(root)
     root.mainloop()
+    app.core.shutdown()
+    if report_path:
+        print(f"Relatório de latência salvo em {profiler.active.export(report_path)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,180 @@
+import numpy as np
+
+YOLO_LINE_FORMAT = "%d %.6f %.6f %.6f %.6f\n"
+
+
+def parse_yolo(text):
+    """Converte o conteúdo de um .txt YOLO em (class_ids, caixas normalizadas xc, yc, w, h)."""
+    rows = [parts for parts in map(str.split, text.splitlines()) if len(parts) == 5]
+    if not rows:
+        return np.empty(0, np.int32), np.empty((0, 4), np.float32)
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0].astype(np.int32), data[:, 1:].astype(np.float32)
+
+
+def format_yolo(class_ids, yolo_boxes):
+    if len(class_ids) == 0:
+        return ""
+    data = np.column_stack((np.asarray(class_ids, np.float64), np.asarray(yolo_boxes, np.float64)))
+    return (YOLO_LINE_FORMAT * len(data)) % tuple(data.ravel().tolist())
+
+
+def yolo_to_xyxy(yolo_boxes, img_w, img_h):
+    boxes = np.asarray(yolo_boxes, np.float64)
+    xc, yc, bw, bh = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    xyxy = np.column_stack(((xc - bw / 2) * img_w, (yc - bh / 2) * img_h,
+                            (xc + bw / 2) * img_w, (yc + bh / 2) * img_h))
+    return xyxy.astype(np.float32)
+
+
+def xyxy_to_yolo(boxes, img_w, img_h):
+    boxes = np.asarray(boxes, np.float64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    return np.column_stack((((x1 + x2) / 2) / img_w, ((y1 + y2) / 2) / img_h,
+                            np.abs(x2 - x1) / img_w, np.abs(y2 - y1) / img_h))
+
+
+class AnnotationStore:
+    """Anotações de uma imagem em colunas: ids de classe (int32) e caixas em pixels (float32 Nx4).
+
+    Mantém a interface de lista de tuplas (class_name, x1, y1, x2, y2) usada pela interface.
+    """
+
+    def __init__(self, classes, capacity=16):
+        self.classes = classes
+        self._class_ids = np.empty(capacity, np.int32)
+        self._boxes = np.empty((capacity, 4), np.float32)
+        # Ids estáveis por anotação, usados para desenhar só o que mudou
+        self._ids = np.empty(capacity, np.int64)
+        self._next_id = 0
+        self._size = 0
+        # Incrementado a cada alteração; usado para saber se há algo a salvar
+        self.version = 0
+        # Chamado como listener(operação, *valores) nas edições do usuário
+        # (add, delete, box, clear); carregamentos e remapeamentos não notificam
+        self.listener = None
+
+    @property
+    def class_ids(self):
+        return self._class_ids[:self._size]
+
+    @property
+    def boxes(self):
+        return self._boxes[:self._size]
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    def index_of(self, annotation_id):
+        found = np.flatnonzero(self.ids == annotation_id)
+        return int(found[0]) if found.size else -1
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        names = self.classes
+        for class_id, box in zip(self.class_ids.tolist(), self.boxes.tolist()):
+            yield (names[class_id], *box)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("índice de anotação fora do intervalo")
+        return (self.classes[self._class_ids[index]], *self._boxes[index].tolist())
+
+    def _reserve(self, capacity):
+        if capacity <= len(self._class_ids):
+            return
+        capacity = max(capacity, 2 * len(self._class_ids))
+        class_ids = np.empty(capacity, np.int32)
+        boxes = np.empty((capacity, 4), np.float32)
+        ids = np.empty(capacity, np.int64)
+        class_ids[:self._size] = self.class_ids
+        boxes[:self._size] = self.boxes
+        ids[:self._size] = self.ids
+        self._class_ids, self._boxes, self._ids = class_ids, boxes, ids
+
+    def append(self, annotation):
+        class_name, x1, y1, x2, y2 = annotation
+        self._reserve(self._size + 1)
+        self._class_ids[self._size] = self.classes.index(class_name)
+        self._boxes[self._size] = (x1, y1, x2, y2)
+        self._ids[self._size] = self._next_id
+        self._next_id += 1
+        self._size += 1
+        self.version += 1
+        if self.listener:
+            self.listener("add", int(self._class_ids[self._size - 1]), *self._boxes[self._size - 1].tolist())
+
+    def pop(self, index=-1):
+        annotation = self[index]
+        if index < 0:
+            index += self._size
+        self._class_ids[index:self._size - 1] = self._class_ids[index + 1:self._size]
+        self._boxes[index:self._size - 1] = self._boxes[index + 1:self._size]
+        self._ids[index:self._size - 1] = self._ids[index + 1:self._size]
+        self._size -= 1
+        self.version += 1
+        if self.listener:
+            self.listener("delete", index)
+        return annotation
+
+    def set_box(self, index, box):
+        # Move/redimensiona uma caixa mantendo classe e id
+        if index < 0:
+            index += self._size
+        self._boxes[index] = box
+        self.version += 1
+        if self.listener:
+            self.listener("box", index, *self._boxes[index].tolist())
+
+    def clear(self):
+        self._size = 0
+        self.version += 1
+        if self.listener:
+            self.listener("clear")
+
+    def set_arrays(self, class_ids, boxes, ids=None):
+        count = len(class_ids)
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+            self._next_id += count
+        self._size = 0
+        self._reserve(count)
+        self._class_ids[:count] = class_ids
+        self._boxes[:count] = boxes
+        self._ids[:count] = ids
+        self._size = count
+        self.version += 1
+
+    def remap_classes(self, table):
+        # table[old_id] = new_id, ou -1 para remover as caixas da classe
+        class_ids = self.class_ids
+        known = (class_ids >= 0) & (class_ids < len(table))
+        new_ids = class_ids.copy()
+        new_ids[known] = table[class_ids[known]]
+        keep = new_ids >= 0
+        self.set_arrays(new_ids[keep], self.boxes[keep], self.ids[keep])
+
+    def load_yolo(self, text, img_w, img_h):
+        """Carrega um .txt YOLO; retorna os nomes de classes desconhecidas que foram criados."""
+        class_ids, yolo_boxes = parse_yolo(text)
+        added = []
+        unknown = np.unique(class_ids[class_ids >= len(self.classes)])
+        if unknown.size:
+            lut = np.arange(int(unknown.max()) + 1, dtype=np.int32)
+            for class_id in unknown.tolist():
+                class_name = f"classe_{class_id}"
+                if class_name not in self.classes:
+                    self.classes.append(class_name)
+                    added.append(class_name)
+                lut[class_id] = self.classes.index(class_name)
+            class_ids = lut[class_ids]
+        self.set_arrays(class_ids, yolo_to_xyxy(yolo_boxes, img_w, img_h))
+        return added
+
+    def to_yolo(self, img_w, img_h):
+        return format_yolo(self.class_ids, xyxy_to_yolo(self.boxes, img_w, img_h))
@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+
+def image_nbytes(img):
+    # Tamanho aproximado do buffer decodificado
+    return img.width * img.height * len(img.getbands())
+
+
+def decode_image(path):
+    img = Image.open(path)
+    img.load()
+    return img
+
+
+class ImageCache:
+    """Cache LRU de imagens decodificadas, limitado pelo total de bytes."""
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            item = self._items.get(path)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(path)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, path):
+        # Consulta sem contar acerto/falha nem mexer na ordem LRU
+        with self._lock:
+            item = self._items.get(path)
+            return item[0] if item is not None else None
+
+    def put(self, path, img):
+        size = image_nbytes(img)
+        with self._lock:
+            old = self._items.pop(path, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._items[path] = (img, size)
+            self.total_bytes += size
+            self._evict()
+
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def _evict(self):
+        # Sempre mantém ao menos a imagem mais recente
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, size) = self._items.popitem(last=False)
+            self.total_bytes -= size
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            'entries': len(self._items),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate()
+        }
+
+
+class ImagePrefetcher:
+    """Decodifica imagens vizinhas em uma thread de fundo e as coloca no cache.
+
+    Imagens que falham ficam em pop_errors(); o erro aparece de novo, para o
+    usuário, quando a imagem é aberta.
+    """
+
+    def __init__(self, cache, depth=2):
+        self.cache = cache
+        self.depth = depth
+        self._pending = []
+        self._errors = []
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def schedule(self, paths):
+        # Substitui a fila anterior: só interessam os vizinhos da imagem atual
+        with self._cond:
+            self._pending = [p for p in paths if p not in self.cache]
+            self._cond.notify()
+
+    def pop_errors(self):
+        with self._cond:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._pending = []
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                path = self._pending.pop(0)
+
+            if path in self.cache:
+                continue
+            try:
+                self.cache.put(path, decode_image(path))
+            except Exception as e:
+                with self._cond:
+                    self._errors.append((path, e))
@@ -0,0 +1,341 @@
+"""Operações de classe em todo o dataset: renomear, mesclar, remover e reordenar.
+
+Os .txt YOLO das imagens sob a pasta são reescritos em paralelo com uma
+tabela de remapeamento de ids. A operação é registrada em um journal na
+própria pasta, de modo que uma execução interrompida pode ser retomada ou
+desfeita. A configuração (lista de classes) só é gravada depois que todos os
+rótulos foram efetivados; a partir daí a operação só pode ser retomada.
+
+Uso:
+    python -m src.classops --root DIR merge --into digito 0 1 2
+    python -m src.classops --root DIR delete lixo
+    python -m src.classops --root DIR reorder medidor display 0 1
+    python -m src.classops --root DIR resume | rollback
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .annotations import parse_yolo, format_yolo
+from .scanner import iter_label_files
+
+JOURNAL_NAME = ".classops_journal.json"
+FILES_NAME = ".classops_journal.files"
+NEW_SUFFIX = ".classop"
+PART_SUFFIX = ".classop.part"
+BACKUP_SUFFIX = ".classop.bak"
+
+
+def build_table(old_classes, mapping, order=None):
+    """Retorna (novas classes, tabela old_id -> new_id, -1 para remover).
+
+    mapping associa nome antigo -> nome novo (ou None para remover); nomes
+    ausentes são mantidos. order define explicitamente a nova ordem.
+    """
+    targets = [mapping.get(name, name) for name in old_classes]
+    new_classes = list(order) if order is not None else list(dict.fromkeys(t for t in targets if t is not None))
+    missing = [t for t in targets if t is not None and t not in new_classes]
+    if missing:
+        raise ValueError(f"Classes ausentes da nova ordem: {', '.join(missing)}")
+    table = np.array([new_classes.index(t) if t is not None else -1 for t in targets], np.int32)
+    return new_classes, table
+
+
+def plan_rename(classes, old_name, new_name):
+    return build_table(classes, {old_name: new_name})
+
+
+def plan_merge(classes, sources, target):
+    if target not in classes and target not in sources:
+        # A classe resultante ocupa a posição da primeira classe mesclada
+        mapping = {name: target for name in sources}
+    else:
+        mapping = {name: target for name in sources if name != target}
+    return build_table(classes, mapping)
+
+
+def plan_delete(classes, names):
+    return build_table(classes, {name: None for name in names})
+
+
+def plan_reorder(classes, order):
+    if sorted(order) != sorted(classes):
+        raise ValueError("A nova ordem precisa conter exatamente as mesmas classes")
+    return build_table(classes, {}, order)
+
+
+def remap_colors(old_classes, new_classes, table, colors):
+    new_colors = {}
+    for old_id, new_id in enumerate(table.tolist()):
+        if new_id >= 0 and new_classes[new_id] not in new_colors and old_classes[old_id] in colors:
+            new_colors[new_classes[new_id]] = colors[old_classes[old_id]]
+    for name in new_classes:
+        new_colors.setdefault(name, colors.get(name, "#FF0000"))
+    return new_colors
+
+
+def remap_ids(class_ids, table):
+    # Ids fora da tabela (classes desconhecidas ou negativos) são mantidos;
+    # um id negativo indexaria a tabela pelo fim
+    known = (class_ids >= 0) & (class_ids < len(table))
+    new_ids = class_ids.copy()
+    new_ids[known] = table[class_ids[known]]
+    return new_ids
+
+
+_table = None
+
+
+def _init_worker(table):
+    global _table
+    _table = np.asarray(table, np.int32)
+
+
+def _prepare_file(path):
+    # Grava <arquivo>.classop com o conteúdo remapeado; o original não é tocado
+    new_path = path + NEW_SUFFIX
+    if os.path.exists(new_path):
+        return True
+    try:
+        with open(path, 'r') as f:
+            class_ids, boxes = parse_yolo(f.read())
+    except OSError:
+        return False
+    new_ids = remap_ids(class_ids, _table)
+    if np.array_equal(new_ids, class_ids):
+        return False
+    keep = new_ids >= 0
+    part_path = path + PART_SUFFIX
+    with open(part_path, 'w') as f:
+        f.write(format_yolo(new_ids[keep], boxes[keep]))
+    os.replace(part_path, new_path)
+    return True
+
+
+def _commit_file(path):
+    new_path = path + NEW_SUFFIX
+    if not os.path.exists(new_path):
+        return False
+    backup_path = path + BACKUP_SUFFIX
+    if os.path.exists(path) and not os.path.exists(backup_path):
+        os.replace(path, backup_path)
+    os.replace(new_path, path)
+    return True
+
+
+def _rollback_file(path):
+    for suffix in (PART_SUFFIX, NEW_SUFFIX):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    if os.path.exists(path + BACKUP_SUFFIX):
+        os.replace(path + BACKUP_SUFFIX, path)
+
+
+def _cleanup_file(path):
+    if os.path.exists(path + BACKUP_SUFFIX):
+        os.remove(path + BACKUP_SUFFIX)
+
+
+class ClassOperation:
+    """Reescrita em duas fases (preparar e efetivar) de todos os rótulos de uma pasta.
+
+    Fases do journal: "prepare" (novos conteúdos em .classop), "commit"
+    (trocando os arquivos; ainda reversível pelos .bak) e "committed" (todos
+    trocados: falta só aplicar a nova lista de classes com finish()).
+    """
+
+    def __init__(self, root, old_classes, new_classes, table, workers=None, phase="prepare"):
+        self.root = root
+        self.old_classes = list(old_classes)
+        self.new_classes = list(new_classes)
+        self.table = np.asarray(table, np.int32)
+        self.workers = workers or os.cpu_count() or 1
+        self.phase = phase
+        self.journal_path = os.path.join(root, JOURNAL_NAME)
+        self.files_path = os.path.join(root, FILES_NAME)
+
+    @classmethod
+    def load(cls, root, workers=None):
+        # Retorna a operação interrompida da pasta, se houver
+        journal_path = os.path.join(root, JOURNAL_NAME)
+        if not os.path.exists(journal_path):
+            return None
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            journal = json.load(f)
+        return cls(root, journal['old_classes'], journal['new_classes'], journal['table'],
+                   workers, journal['phase'])
+
+    def needs_rewrite(self):
+        return not np.array_equal(self.table, np.arange(len(self.table)))
+
+    def _write_journal(self):
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'old_classes': self.old_classes, 'new_classes': self.new_classes,
+                       'table': self.table.tolist(), 'phase': self.phase}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _files(self):
+        if not os.path.exists(self.files_path):
+            errors = []
+            paths = [entry.path for _, entry in iter_label_files(self.root, recursive=True, errors=errors)]
+            if errors:
+                # Rótulos de uma pasta ilegível ficariam com os ids antigos
+                folder, error = errors[0]
+                raise OSError(f"Erro ao listar {folder}: {str(error)}")
+            tmp_path = self.files_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(paths))
+            os.replace(tmp_path, self.files_path)
+            return paths
+        with open(self.files_path, 'r', encoding='utf-8') as f:
+            return [line for line in f.read().split("\n") if line]
+
+    def run(self, on_commit=None, progress=None):
+        """Executa (ou retoma) a operação inteira; on_commit grava a nova lista de classes."""
+        stats = self.rewrite(progress)
+        self.finish(on_commit)
+        return stats
+
+    def rewrite(self, progress=None):
+        """Reescreve os rótulos até o ponto sem volta; pode rodar fora da thread da interface.
+
+        progress(feitos, total) é chamado durante a preparação, na thread que chamou rewrite().
+        """
+        start = time.perf_counter()
+        if not self.needs_rewrite():
+            return {'files': 0, 'rewritten': 0, 'seconds': 0.0, 'files_per_second': 0.0}
+
+        self._write_journal()
+        paths = self._files()
+        rewritten = 0
+
+        if self.phase == "prepare":
+            # spawn: quem chama pode ter várias threads vivas (Tk, gravação, prefetch)
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(self.workers, initializer=_init_worker, initargs=(self.table.tolist(),)) as pool:
+                for done, _ in enumerate(pool.imap_unordered(_prepare_file, paths, chunksize=64), 1):
+                    if progress:
+                        progress(done, len(paths))
+            self.phase = "commit"
+            self._write_journal()
+
+        if self.phase == "commit":
+            # Renomeações são baratas e limitadas por I/O: bastam threads
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                rewritten = sum(pool.map(_commit_file, paths))
+            # Ponto sem volta: os .bak somem e o rollback deixa de ser possível
+            self.phase = "committed"
+            self._write_journal()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(_cleanup_file, paths))
+
+        elapsed = time.perf_counter() - start
+        return {'files': len(paths), 'rewritten': rewritten, 'seconds': elapsed,
+                'files_per_second': len(paths) / elapsed if elapsed > 0 else 0.0}
+
+    def finish(self, on_commit=None):
+        # A configuração é a última a mudar; se falhar aqui, a próxima abertura retoma
+        if on_commit:
+            on_commit()
+        self._remove_journal()
+
+    def rollback(self):
+        if self.phase == "committed":
+            raise ValueError("Os rótulos já foram todos reescritos; a operação só pode ser retomada")
+        paths = self._files() if os.path.exists(self.files_path) else []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(_rollback_file, paths))
+        self._remove_journal()
+        return len(paths)
+
+    def _remove_journal(self):
+        for path in (self.journal_path, self.files_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _load_config(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'classes': [], 'class_colors': {}}
+
+
+def _save_config(path, config):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Operações de classe em todo o dataset")
+    parser.add_argument("--root", required=True, help="pasta com as imagens e os .txt")
+    parser.add_argument("--config", default="label_config.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    commands = parser.add_subparsers(dest="command", required=True)
+    rename = commands.add_parser("rename")
+    rename.add_argument("old")
+    rename.add_argument("new")
+    merge = commands.add_parser("merge")
+    merge.add_argument("--into", required=True)
+    merge.add_argument("sources", nargs="+")
+    delete = commands.add_parser("delete")
+    delete.add_argument("names", nargs="+")
+    reorder = commands.add_parser("reorder")
+    reorder.add_argument("order", nargs="+")
+    commands.add_parser("resume")
+    commands.add_parser("rollback")
+    args = parser.parse_args(argv)
+
+    config = _load_config(args.config)
+    classes = config.get('classes', [])
+    pending = ClassOperation.load(args.root, args.workers)
+
+    if args.command == "rollback":
+        if pending is None:
+            print("Nenhuma operação pendente", file=sys.stderr)
+            return
+        try:
+            print(f"{pending.rollback()} arquivos restaurados", file=sys.stderr)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+        return
+
+    if args.command == "resume":
+        if pending is None:
+            print("Nenhuma operação pendente", file=sys.stderr)
+            return
+        operation = pending
+    elif pending is not None:
+        parser.error("há uma operação interrompida nesta pasta; use resume ou rollback")
+    else:
+        if args.command == "rename":
+            new_classes, table = plan_rename(classes, args.old, args.new)
+        elif args.command == "merge":
+            new_classes, table = plan_merge(classes, args.sources, args.into)
+        elif args.command == "delete":
+            new_classes, table = plan_delete(classes, args.names)
+        else:
+            new_classes, table = plan_reorder(classes, args.order)
+        operation = ClassOperation(args.root, classes, new_classes, table, args.workers)
+
+    def on_commit():
+        config['class_colors'] = remap_colors(operation.old_classes, operation.new_classes,
+                                              operation.table, config.get('class_colors', {}))
+        config['classes'] = operation.new_classes
+        _save_config(args.config, config)
+
+    stats = operation.run(on_commit)
+    print(f"{stats['rewritten']} de {stats['files']} arquivos reescritos em {stats['seconds']:.1f}s "
+          f"({stats['files_per_second']:.0f} arquivos/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Conversão de datasets entre YOLO txt, COCO JSON e Pascal VOC XML, sem interface gráfica.
+
+Uso:
+    python -m src.convert --from yolo --to coco --images DIR --output dataset.json
+    python -m src.convert --from coco --to yolo --images DIR --input dataset.json
+    python -m src.convert --from yolo --to voc --images DIR --output xml_dir
+    python -m src.convert --from voc --to yolo --images DIR --input xml_dir
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from multiprocessing import Pool
+from xml.sax.saxutils import escape
+import xml.etree.ElementTree as ET
+import numpy as np
+from PIL import Image
+from .annotations import parse_yolo, format_yolo, yolo_to_xyxy, xyxy_to_yolo
+from .scanner import IMAGE_EXTENSIONS, iter_files
+
+COCO_ANNOTATION_FORMAT = ('{"id": %d, "image_id": %d, "category_id": %d, '
+                          '"bbox": [%.2f, %.2f, %.2f, %.2f], "area": %.2f, "iscrowd": 0}')
+
+VOC_OBJECT_TEMPLATE = """    <object>
+        <name>{name}</name>
+        <pose>Unspecified</pose>
+        <truncated>0</truncated>
+        <difficult>0</difficult>
+        <bndbox>
+            <xmin>{:.1f}</xmin>
+            <ymin>{:.1f}</ymin>
+            <xmax>{:.1f}</xmax>
+            <ymax>{:.1f}</ymax>
+        </bndbox>
+    </object>
+"""
+
+
+def load_classes(path):
+    # Aceita o label_config.json da ferramenta ou um .txt com uma classe por linha
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(".json"):
+            return json.load(f).get('classes', [])
+        return [line.strip() for line in f if line.strip()]
+
+
+def read_image_size(path):
+    # Lê apenas o cabeçalho, sem decodificar os pixels
+    with Image.open(path) as img:
+        return img.size
+
+
+def label_path(labels_root, rel_path, extension):
+    return os.path.join(labels_root, os.path.splitext(rel_path)[0] + extension)
+
+
+def iter_images(images_root, recursive, errors=None):
+    for rel_dir, entry in iter_files(images_root, IMAGE_EXTENSIONS, recursive, errors):
+        yield os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+
+
+def _read_yolo_image(task):
+    images_root, labels_root, rel_path = task
+    img_w, img_h = read_image_size(os.path.join(images_root, rel_path))
+    txt_path = label_path(labels_root, rel_path, ".txt")
+    if os.path.exists(txt_path):
+        with open(txt_path, 'r') as f:
+            class_ids, yolo_boxes = parse_yolo(f.read())
+    else:
+        class_ids, yolo_boxes = parse_yolo("")
+    return rel_path, img_w, img_h, class_ids, yolo_to_xyxy(yolo_boxes, img_w, img_h)
+
+
+def _write_voc_image(task):
+    images_root, labels_root, output_root, rel_path, classes = task
+    rel_path, img_w, img_h, class_ids, boxes = _read_yolo_image((images_root, labels_root, rel_path))
+    objects = []
+    for class_id, box in zip(class_ids.tolist(), boxes.tolist()):
+        name = classes[class_id] if class_id < len(classes) else f"classe_{class_id}"
+        objects.append(VOC_OBJECT_TEMPLATE.format(*box, name=escape(name)))
+
+    xml_path = label_path(output_root, rel_path, ".xml")
+    os.makedirs(os.path.dirname(xml_path) or ".", exist_ok=True)
+    with open(xml_path, 'w', encoding='utf-8') as f:
+        f.write("<annotation>\n")
+        f.write(f"    <filename>{escape(os.path.basename(rel_path))}</filename>\n")
+        f.write(f"    <size>\n        <width>{img_w}</width>\n        <height>{img_h}</height>\n"
+                f"        <depth>3</depth>\n    </size>\n")
+        f.write("".join(objects))
+        f.write("</annotation>\n")
+    return len(objects)
+
+
+def _read_voc_image(task):
+    images_root, input_root, rel_path = task
+    xml_path = label_path(input_root, rel_path, ".xml")
+    if not os.path.exists(xml_path):
+        return rel_path, None, None, [], np.empty((0, 4), np.float32)
+    root = ET.parse(xml_path).getroot()
+    size = root.find("size")
+    if size is not None and size.findtext("width") and int(float(size.findtext("width"))) > 0:
+        img_w, img_h = int(float(size.findtext("width"))), int(float(size.findtext("height")))
+    else:
+        img_w, img_h = read_image_size(os.path.join(images_root, rel_path))
+    names = []
+    boxes = []
+    for obj in root.iter("object"):
+        bndbox = obj.find("bndbox")
+        names.append(obj.findtext("name", "").strip())
+        boxes.append([float(bndbox.findtext(tag)) for tag in ("xmin", "ymin", "xmax", "ymax")])
+    return rel_path, img_w, img_h, names, np.array(boxes, np.float32).reshape(-1, 4)
+
+
+def _read_voc_names(task):
+    # Só os nomes, na ordem em que aparecem: define os ids das classes novas
+    rel_path, _, _, names, _ = _read_voc_image(task)
+    return list(dict.fromkeys(names))
+
+
+def _convert_voc_image(task):
+    images_root, input_root, output_root, rel_path, classes = task
+    rel_path, img_w, img_h, names, boxes = _read_voc_image((images_root, input_root, rel_path))
+    if img_w is None:
+        return None
+    class_ids = np.array([classes.index(name) for name in names], np.int32)
+    return _write_yolo_image((label_path(output_root, rel_path, ".txt"), img_w, img_h, class_ids, boxes))
+
+
+def _write_yolo_image(task):
+    txt_path, img_w, img_h, class_ids, boxes = task
+    os.makedirs(os.path.dirname(txt_path) or ".", exist_ok=True)
+    with open(txt_path, 'w') as f:
+        f.write(format_yolo(class_ids, xyxy_to_yolo(boxes, img_w, img_h)))
+    return len(class_ids)
+
+
+class Progress:
+    def __init__(self, label, every=1000):
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.start = time.perf_counter()
+
+    def step(self):
+        self.count += 1
+        if self.count % self.every == 0:
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        print(f"{self.label}: {self.count} imagens, {rate:.0f} imagens/s", file=sys.stderr)
+
+
+def yolo_to_coco(args, classes, pool):
+    progress = Progress("yolo -> coco")
+    tasks = ((args.images, args.labels, rel_path)
+             for rel_path in iter_images(args.images, args.recursive, args.scan_errors))
+
+    # As anotações vão para um arquivo temporário e são anexadas no fim,
+    # assim o documento COCO nunca fica inteiro na memória
+    annotation_id = 0
+    num_ids = len(classes)
+    with open(args.output, 'w', encoding='utf-8') as out, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as annotations:
+        out.write('{"info": {"description": "YOLO Label Tool"}, "images": [')
+        for image_id, (rel_path, img_w, img_h, class_ids, boxes) in enumerate(
+                pool.imap(_read_yolo_image, tasks, chunksize=64), start=1):
+            if image_id > 1:
+                out.write(", ")
+            out.write(json.dumps({"id": image_id, "file_name": rel_path.replace(os.sep, "/"),
+                                  "width": img_w, "height": img_h}))
+            if len(class_ids):
+                num_ids = max(num_ids, int(class_ids.max()) + 1)
+                w = boxes[:, 2] - boxes[:, 0]
+                h = boxes[:, 3] - boxes[:, 1]
+                ids = np.arange(annotation_id + 1, annotation_id + len(class_ids) + 1)
+                rows = np.column_stack((ids, np.full(len(ids), image_id), class_ids + 1,
+                                        boxes[:, 0], boxes[:, 1], w, h, w * h))
+                if annotation_id:
+                    annotations.write(", ")
+                annotations.write(", ".join([COCO_ANNOTATION_FORMAT] * len(rows)) % tuple(rows.ravel().tolist()))
+                annotation_id += len(class_ids)
+            progress.step()
+        out.write('], "annotations": [')
+        annotations.seek(0)
+        shutil.copyfileobj(annotations, out)
+        # As categorias vão por último: ids além da lista de classes só são
+        # conhecidos depois de ler todos os rótulos e ganham um nome provisório
+        if num_ids > len(classes):
+            print(f"Aviso: ids de classe {len(classes)} a {num_ids - 1} não estão na lista de classes; "
+                  f"exportados como classe_<id>", file=sys.stderr)
+        names = list(classes) + [f"classe_{i}" for i in range(len(classes), num_ids)]
+        out.write('], "categories": ')
+        out.write(json.dumps([{"id": i + 1, "name": name} for i, name in enumerate(names)]))
+        out.write("}\n")
+    progress.report()
+    return classes
+
+
+def coco_to_yolo(args, classes, pool):
+    progress = Progress("coco -> yolo")
+    # O JSON de entrada precisa ser lido inteiro; a saída é gravada em paralelo
+    with open(args.input, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+
+    category_index = {}
+    for category in sorted(document.get("categories", []), key=lambda c: c["id"]):
+        if category["name"] not in classes:
+            classes.append(category["name"])
+        category_index[category["id"]] = classes.index(category["name"])
+
+    by_image = {}
+    for ann in document.get("annotations", []):
+        by_image.setdefault(ann["image_id"], []).append(ann)
+
+    def tasks():
+        for image in document.get("images", []):
+            anns = by_image.pop(image["id"], [])
+            unknown = sum(1 for a in anns if a["category_id"] not in category_index)
+            if unknown:
+                print(f"{image['file_name']}: {unknown} anotações com category_id desconhecido ignoradas",
+                      file=sys.stderr)
+                anns = [a for a in anns if a["category_id"] in category_index]
+            class_ids = np.array([category_index[a["category_id"]] for a in anns], np.int32)
+            xywh = np.array([a["bbox"] for a in anns], np.float32).reshape(-1, 4)
+            boxes = np.column_stack((xywh[:, 0], xywh[:, 1], xywh[:, 0] + xywh[:, 2], xywh[:, 1] + xywh[:, 3]))
+            txt_path = label_path(args.output, image["file_name"].replace("/", os.sep), ".txt")
+            yield txt_path, image["width"], image["height"], class_ids, boxes
+
+    for _ in pool.imap(_write_yolo_image, tasks(), chunksize=64):
+        progress.step()
+    progress.report()
+    return classes
+
+
+def yolo_to_voc(args, classes, pool):
+    progress = Progress("yolo -> voc")
+    tasks = ((args.images, args.labels, args.output, rel_path, classes)
+             for rel_path in iter_images(args.images, args.recursive, args.scan_errors))
+    for _ in pool.imap_unordered(_write_voc_image, tasks, chunksize=64):
+        progress.step()
+    progress.report()
+    return classes
+
+
+def voc_to_yolo(args, classes, pool):
+    progress = Progress("voc -> yolo")
+    # Primeira passada só com os nomes; imap ordenado: novas classes recebem
+    # ids na mesma ordem a cada execução
+    tasks = ((args.images, args.input, rel_path)
+             for rel_path in iter_images(args.images, args.recursive, args.scan_errors))
+    for names in pool.imap(_read_voc_names, tasks, chunksize=64):
+        for name in names:
+            if name not in classes:
+                classes.append(name)
+
+    # Com a lista fechada, leitura e gravação dos .txt ficam nos workers
+    tasks = ((args.images, args.input, args.output, rel_path, classes)
+             for rel_path in iter_images(args.images, args.recursive, args.scan_errors))
+    for _ in pool.imap_unordered(_convert_voc_image, tasks, chunksize=64):
+        progress.step()
+    progress.report()
+    return classes
+
+
+CONVERTERS = {
+    ("yolo", "coco"): yolo_to_coco,
+    ("coco", "yolo"): coco_to_yolo,
+    ("yolo", "voc"): yolo_to_voc,
+    ("voc", "yolo"): voc_to_yolo,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Converte datasets entre YOLO, COCO e Pascal VOC")
+    parser.add_argument("--from", dest="source", choices=("yolo", "coco", "voc"), required=True)
+    parser.add_argument("--to", dest="target", choices=("yolo", "coco", "voc"), required=True)
+    parser.add_argument("--images", required=True, help="pasta com as imagens")
+    parser.add_argument("--labels", help="pasta com os .txt YOLO (padrão: a pasta das imagens)")
+    parser.add_argument("--input", help="arquivo COCO JSON ou pasta com os XML VOC")
+    parser.add_argument("--output", help="arquivo COCO JSON ou pasta de saída")
+    parser.add_argument("--classes", default="label_config.json",
+                        help="label_config.json ou .txt com uma classe por linha")
+    parser.add_argument("--recursive", action="store_true", help="incluir subpastas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if (args.source, args.target) not in CONVERTERS:
+        parser.error(f"conversão {args.source} -> {args.target} não suportada")
+    args.labels = args.labels or args.images
+    if args.source == "coco" and not args.input:
+        parser.error("--input é obrigatório para COCO")
+    if args.source == "voc":
+        args.input = args.input or args.images
+    if args.target == "coco" and not args.output:
+        parser.error("--output é obrigatório para COCO")
+    args.output = args.output or args.images
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.scan_errors = []
+    classes = load_classes(args.classes)
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        classes = CONVERTERS[(args.source, args.target)](args, classes, pool)
+
+    if args.target == "yolo":
+        # A ordem das classes define os ids gravados nos .txt
+        with open(os.path.join(args.output, "classes.txt"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(classes) + "\n")
+    # voc -> yolo percorre as pastas duas vezes: cada pasta aparece uma vez
+    for folder, error in dict(args.scan_errors).items():
+        print(f"Erro ao listar {folder}: {str(error)}", file=sys.stderr)
+    print(f"Concluído em {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
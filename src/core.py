@@ -3,13 +3,21 @@ import json
 from PIL import Image, ImageTk, ImageDraw
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
+from .cache import ImageCache, ImagePrefetcher, decode_image, image_nbytes
+from .annotations import AnnotationStore
+from .index import DatasetIndex
+from .writer import AsyncWriter
+from .scanner import ImageList, FolderScanner
+from .thumbnails import ThumbnailCache
+from .journal import EditJournal, JOURNAL_NAME, replay_journal
+from .classops import ClassOperation, plan_delete, plan_merge, plan_reorder, remap_colors
 
 class YOLOAnnotationCore:
     def __init__(self):
         self.image_dir = ""
-        self.image_list = []
+        self.image_list = ImageList()
         self.image_index = 0
-        self.annotations = []
+        self.scanner = None
         self.classes = []
         self.class_colors = {}
         self.current_class = tk.StringVar()
@@ -17,21 +25,48 @@ class YOLOAnnotationCore:
         self.drag_start = None
         self.pan_start = None
         self.show_labels = tk.BooleanVar(value=True)
+        self.recursive_scan = tk.BooleanVar(value=False)
+        self.show_filmstrip = tk.BooleanVar(value=True)
+        self.last_class_operation = None
         self.config_file = "label_config.json"
+        self.cache_max_mb = 512
+        self.prefetch_depth = 2
+        self.zoom_settle_ms = 150
+        self.autosave_seconds = 5
         
         # Estado da aplicação
+        # Um único buffer decodificado, criado só quando a renderização pede
         self.img = None
-        self.original_img = None
-        self.tk_img = None
-        self.canvas_img = None
+        self.img_path = None
+        self.img_size = None
+        self.display_bytes = 0
         self.temp_rect = None
         
         self.load_config()
         
+        # Cache de imagens decodificadas e pré-carregamento dos vizinhos
+        self.image_cache = ImageCache(self.cache_max_mb * 1024 * 1024)
+        self.prefetcher = ImagePrefetcher(self.image_cache, self.prefetch_depth)
+        self.prefetch_errors = 0
+        
         if not self.classes:
             self.classes = ["object"]
             self.class_colors = {"object": "#FF0000"}
             self.current_class.set("object")
+        
+        # Journal das edições: cada alteração do usuário é registrada na hora
+        self.journal = EditJournal()
+        
+        # Anotações em colunas NumPy; compartilha a lista de classes
+        self.annotations = AnnotationStore(self.classes)
+        self.annotations.listener = self.journal.record
+        self._saved_version = self.annotations.version
+        
+        # Gravação dos rótulos em segundo plano; cada gravação concluída vira um COMMIT
+        self.writer = AsyncWriter(on_written=self.journal.commit)
+        
+        # Miniaturas em cache no disco, geradas por um pool de processos
+        self.thumbnails = ThumbnailCache()
     
     def load_config(self):
         if os.path.exists(self.config_file):
@@ -40,6 +75,10 @@ class YOLOAnnotationCore:
                     config = json.load(f)
                     self.classes = config.get('classes', [])
                     self.class_colors = config.get('class_colors', {})
+                    self.cache_max_mb = config.get('cache_max_mb', self.cache_max_mb)
+                    self.prefetch_depth = config.get('prefetch_depth', self.prefetch_depth)
+                    self.zoom_settle_ms = config.get('zoom_settle_ms', self.zoom_settle_ms)
+                    self.autosave_seconds = config.get('autosave_seconds', self.autosave_seconds)
                     if self.classes:
                         self.current_class.set(self.classes[0])
             except Exception as e:
@@ -48,7 +87,11 @@ class YOLOAnnotationCore:
     def save_config(self):
         config = {
             'classes': self.classes,
-            'class_colors': self.class_colors
+            'class_colors': self.class_colors,
+            'cache_max_mb': self.cache_max_mb,
+            'prefetch_depth': self.prefetch_depth,
+            'zoom_settle_ms': self.zoom_settle_ms,
+            'autosave_seconds': self.autosave_seconds
         }
         try:
             with open(self.config_file, 'w') as f:
@@ -62,84 +105,145 @@ class YOLOAnnotationCore:
             if not folder:
                 return False
         
+        if self.scanner:
+            self.scanner.cancel()
+        
+        # O journal da pasta anterior só fecha depois das últimas gravações
+        self.writer.flush()
+        self.journal.close()
+        
+        # A listagem continua em segundo plano; basta a primeira imagem para abrir
         self.image_dir = folder
-        self.image_list = [f for f in os.listdir(self.image_dir) 
-                         if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))]
+        self.recover_journal()
+        self.resume_class_operation()
+        try:
+            self.journal.open(os.path.join(folder, JOURNAL_NAME))
+        except OSError as e:
+            # Pasta somente leitura ou compartilhamento de rede: abre sem journal
+            messagebox.showwarning("Aviso", f"Não foi possível criar o journal de edições: {str(e)}\n"
+                                            "As edições só chegam ao disco quando forem salvas.")
+        self.image_list = ImageList()
         self.image_index = 0
+        self.scanner = FolderScanner(folder, self.image_list, recursive=self.recursive_scan.get())
+        self.scanner.start()
         
-        if self.image_list:
+        if self.scanner.wait_first():
             return True
         else:
-            messagebox.showwarning("Aviso", "Nenhuma imagem encontrada na pasta selecionada")
+            if not self.report_scan_errors():
+                messagebox.showwarning("Aviso", "Nenhuma imagem encontrada na pasta selecionada")
             return False
     
+    def report_scan_errors(self):
+        # Pastas que a listagem em segundo plano não conseguiu abrir
+        errors = self.scanner.pop_errors() if self.scanner else []
+        if errors:
+            details = "\n".join(f"{folder}: {str(error)}" for folder, error in errors[:5])
+            if len(errors) > 5:
+                details += f"\n... e mais {len(errors) - 5}"
+            messagebox.showwarning("Aviso", f"{len(errors)} pasta(s) não puderam ser listadas:\n{details}")
+        return bool(errors)
+    
     def load_image(self):
         if not self.image_list:
             return
             
+        # Carregar do disco não é edição: nada vai para o journal até begin_image
+        self.journal.end_image()
         img_path = os.path.join(self.image_dir, self.image_list[self.image_index])
-        self.img = Image.open(img_path)
-        self.original_img = self.img.copy()
+        self.img_path = img_path
+        self.img = self.image_cache.get(img_path)
+        if self.img is not None:
+            self.img_size = self.img.size
+        else:
+            # Só o cabeçalho é lido; os pixels ficam para get_image()
+            with Image.open(img_path) as header:
+                self.img_size = header.size
+        self.prefetch_neighbors()
         
         # Verificar se existe arquivo de anotações
         txt_path = os.path.splitext(img_path)[0] + ".txt"
         if os.path.exists(txt_path):
             self.load_annotations(txt_path)
+        else:
+            self.annotations.clear()
+        self._saved_version = self.annotations.version
+        self.journal.begin_image(txt_path, self.img_size)
         
         self.zoom_level = 1.0
     
+    def get_image(self):
+        # Decodifica sob demanda; as imagens do cache são somente leitura, sem cópia
+        if self.img is None and self.img_path:
+            # load_image() já contou o acerto ou a falha; o prefetch pode ter
+            # terminado nesse meio tempo
+            self.img = self.image_cache.peek(self.img_path)
+            if self.img is None:
+                self.img = decode_image(self.img_path)
+                self.image_cache.put(self.img_path, self.img)
+        return self.img
+    
+    def get_memory_footprint(self):
+        decoded = image_nbytes(self.img) if self.img is not None else 0
+        # Blocos de exibição e níveis reduzidos, informados pela interface
+        display = self.display_bytes
+        return {'decoded': decoded, 'display': display, 'total': decoded + display}
+    
+    def prefetch_neighbors(self):
+        # Próximas e anteriores intercaladas, das mais próximas para as mais distantes
+        paths = []
+        for offset in range(1, self.prefetch_depth + 1):
+            for index in (self.image_index + offset, self.image_index - offset):
+                if 0 <= index < len(self.image_list):
+                    paths.append(os.path.join(self.image_dir, self.image_list[index]))
+        # Falhas do pré-carregamento só entram na contagem: ao abrir a imagem
+        # o erro se repete e é mostrado ao usuário
+        self.prefetch_errors += len(self.prefetcher.pop_errors())
+        self.prefetcher.schedule(paths)
+    
     def load_annotations(self, txt_path):
-        self.annotations = []
-        
         with open(txt_path, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) == 5:
-                    class_id, xc, yc, bw, bh = map(float, parts)
-                    class_id = int(class_id)
-                    
-                    if class_id < len(self.classes):
-                        class_name = self.classes[class_id]
-                    else:
-                        class_name = f"classe_{class_id}"
-                        if class_name not in self.classes:
-                            self.classes.append(class_name)
-                            self.class_colors[class_name] = "#FF0000"
-                    
-                    # Converter de YOLO para coordenadas de imagem
-                    img_w, img_h = self.img.size
-                    x1 = (xc - bw/2) * img_w
-                    y1 = (yc - bh/2) * img_h
-                    x2 = (xc + bw/2) * img_w
-                    y2 = (yc + bh/2) * img_h
-                    
-                    self.annotations.append((class_name, x1, y1, x2, y2))
+            text = f.read()
+        
+        # Converter de YOLO para coordenadas de imagem
+        img_w, img_h = self.img_size
+        for class_name in self.annotations.load_yolo(text, img_w, img_h):
+            self.class_colors[class_name] = "#FF0000"
+    
+    def is_dirty(self):
+        return self.annotations.version != self._saved_version
     
     def save_annotations(self):
-        if not hasattr(self, 'img') or not self.image_list:
+        if self.img_size is None or not self.image_list:
             return False
+        
+        self.report_write_errors()
+        # Imagens não alteradas nunca são gravadas
+        if not self.is_dirty():
+            return True
             
-        img_path = os.path.join(self.image_dir, self.image_list[self.image_index])
-        txt_path = os.path.splitext(img_path)[0] + ".txt"
+        txt_path = os.path.splitext(self.img_path)[0] + ".txt"
         
         try:
-            with open(txt_path, 'w') as f:
-                img_w, img_h = self.img.size
-                
-                for class_name, x1, y1, x2, y2 in self.annotations:
-                    # Converter para formato YOLO
-                    xc = ((x1 + x2) / 2) / img_w
-                    yc = ((y1 + y2) / 2) / img_h
-                    bw = abs(x2 - x1) / img_w
-                    bh = abs(y2 - y1) / img_h
-                    
-                    class_id = self.classes.index(class_name)
-                    f.write(f"{class_id} {xc:.6f} {yc:.6f} {bw:.6f} {bh:.6f}\n")
-            
-            return True
+            # Converter para formato YOLO
+            img_w, img_h = self.img_size
+            text = self.annotations.to_yolo(img_w, img_h)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar anotações: {str(e)}")
             return False
+        
+        self.writer.submit(txt_path, text, self.journal.save_marker())
+        self._saved_version = self.annotations.version
+        return True
+    
+    def report_write_errors(self):
+        errors = self.writer.pop_errors()
+        for txt_path, error in errors:
+            # A imagem atual volta a ficar pendente para uma nova tentativa
+            if self.img_path and txt_path == os.path.splitext(self.img_path)[0] + ".txt":
+                self._saved_version = -1
+            messagebox.showerror("Erro", f"Erro ao salvar anotações em {txt_path}: {str(error)}")
+        return not errors
     
     def next_image(self):
         if not self.image_list:
@@ -159,6 +263,18 @@ class YOLOAnnotationCore:
             return True
         return False
     
+    def go_to_image(self, index):
+        if not 0 <= index < len(self.image_list) or index == self.image_index:
+            return False
+            
+        if self.save_annotations():
+            self.image_index = index
+            return True
+        return False
+    
+    def get_image_path(self, index):
+        return os.path.join(self.image_dir, self.image_list[index])
+    
     def add_class(self, name, color):
         if not name:
             return False, "O nome da classe não pode estar vazio"
@@ -179,12 +295,7 @@ class YOLOAnnotationCore:
         if new_name != old_name and new_name in self.classes:
             return False, "Esta classe já existe"
             
-        # Atualizar anotações
-        for i, (cls, *coords) in enumerate(self.annotations):
-            if cls == old_name:
-                self.annotations[i] = (new_name, *coords)
-        
-        # Atualizar listas
+        # As anotações guardam ids de classe, então basta renomear na lista
         index = self.classes.index(old_name)
         self.classes[index] = new_name
         self.class_colors[new_name] = new_color
@@ -198,38 +309,154 @@ class YOLOAnnotationCore:
         return True, ""
     
     def delete_class(self, class_name):
-        # Remover anotações
-        self.annotations = [(cls, *coords) for cls, *coords in self.annotations if cls != class_name]
+        # Remove a classe de todos os rótulos e desloca os ids das classes seguintes
+        return self.begin_class_operation(*plan_delete(self.classes, [class_name]))
+    
+    def merge_classes(self, sources, target):
+        return self.begin_class_operation(*plan_merge(self.classes, sources, target))
+    
+    def reorder_classes(self, order):
+        return self.begin_class_operation(*plan_reorder(self.classes, order))
+    
+    def begin_class_operation(self, new_classes, table):
+        """Prepara a operação de classes; retorna a ClassOperation a executar ou None se já aplicada.
         
-        # Atualizar listas
-        index = self.classes.index(class_name)
-        self.classes.pop(index)
-        if class_name in self.class_colors:
-            del self.class_colors[class_name]
+        operation.rewrite() pode rodar em outra thread; depois, finish_class_operation()
+        na thread da interface aplica a nova lista de classes.
+        """
+        # Os rótulos em disco precisam estar atualizados antes da reescrita
+        self.save_annotations()
+        self.writer.flush()
+        self.last_class_operation = None
         
-        if self.classes:
-            self.current_class.set(self.classes[0])
-        else:
-            self.current_class.set("")
+        if not self.image_dir:
+            self.apply_class_list(list(self.classes), new_classes, table)
+            return None
+        return ClassOperation(self.image_dir, self.classes, new_classes, table)
+    
+    def finish_class_operation(self, operation, stats):
+        operation.finish(lambda: self.apply_class_list(operation.old_classes, operation.new_classes,
+                                                       operation.table))
+        self.last_class_operation = stats
+    
+    def apply_class_list(self, old_classes, new_classes, table):
+        self.annotations.remap_classes(table)
+        # Os rótulos da imagem atual já foram reescritos em disco
+        self._saved_version = self.annotations.version
+        if self.img_path:
+            self.journal.begin_image(os.path.splitext(self.img_path)[0] + ".txt", self.img_size)
+        
+        self.class_colors = remap_colors(old_classes, new_classes, table, self.class_colors)
+        # Alteração no lugar: o AnnotationStore compartilha esta lista
+        self.classes[:] = new_classes
+        
+        if self.current_class.get() not in self.classes:
+            self.current_class.set(self.classes[0] if self.classes else "")
         
         self.save_config()
-        return True
+    
+    def recover_journal(self):
+        # Edições de uma sessão interrompida que não chegaram aos .txt
+        try:
+            stats = replay_journal(os.path.join(self.image_dir, JOURNAL_NAME))
+        except OSError as e:
+            messagebox.showerror("Erro", f"Erro ao recuperar edições não salvas: {str(e)}")
+            return
+        if stats['files']:
+            messagebox.showinfo("Edições recuperadas",
+                                f"{stats['edits']} edições não salvas foram recuperadas em "
+                                f"{stats['files']} arquivo(s).")
+        if stats['skipped']:
+            messagebox.showwarning("Aviso", f"{stats['skipped']} arquivo(s) foram alterados depois da última "
+                                            "sessão e não receberam as edições do journal.")
+    
+    def autosave(self):
+        # As edições já estão no journal; gravar o .txt permite encurtá-lo
+        if self.img_size is not None and self.is_dirty():
+            self.save_annotations()
+        self.journal.compact()
+    
+    def resume_class_operation(self):
+        # Operação de classes interrompida na pasta aberta: retomar ou desfazer
+        try:
+            operation = ClassOperation.load(self.image_dir)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Erro", f"Journal da operação de classes inválido: {str(e)}")
+            return
+        if operation is None:
+            return
+        # Depois do ponto sem volta só resta retomar (aplicar a nova lista de classes)
+        resume = operation.phase == "committed" or messagebox.askyesno(
+            "Operação de classes interrompida",
+            "Uma operação de classes nesta pasta foi interrompida.\n"
+            "Deseja retomá-la? (Não desfaz as alterações)")
+        try:
+            if resume:
+                operation.run(lambda: self.apply_class_list(operation.old_classes, operation.new_classes,
+                                                            operation.table))
+            else:
+                operation.rollback()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao {'retomar' if resume else 'desfazer'} a operação de classes: "
+                                         f"{str(e)}\nA pasta foi aberta sem concluí-la.")
     
     def get_image_info(self):
-        if not hasattr(self, 'img'):
+        if self.img_size is None:
             return "Nenhuma imagem carregada"
             
         info_text = f"Arquivo: {self.image_list[self.image_index]}\n"
-        info_text += f"Tamanho: {self.img.width} x {self.img.height}\n"
-        info_text += f"Anotações: {len(self.annotations)}"
+        info_text += f"Tamanho: {self.img_size[0]} x {self.img_size[1]}\n"
+        info_text += f"Anotações: {len(self.annotations)}\n"
+        info_text += f"Memória: {self.get_memory_footprint()['total'] / (1024 * 1024):.1f} MB\n"
+        info_text += f"Cache: {self.image_cache.hit_rate() * 100:.0f}% de acertos"
         return info_text
     
+    def update_dataset_index(self):
+        # Atualiza apenas os rótulos alterados desde a última abertura
+        if not self.image_dir:
+            return None, None
+        index = DatasetIndex(self.image_dir)
+        stats = index.update()
+        return index, stats
+    
+    def get_class_summary(self, index):
+        boxes = index.class_histogram(len(self.classes))
+        images = index.images_per_class(len(self.classes))
+        summary = []
+        for class_id in range(len(boxes)):
+            class_name = self.classes[class_id] if class_id < len(self.classes) else f"classe_{class_id}"
+            summary.append((class_name, int(boxes[class_id]), int(images[class_id])))
+        return summary
+    
+    def get_cache_stats(self):
+        self.prefetch_errors += len(self.prefetcher.pop_errors())
+        stats = self.image_cache.stats()
+        stats['prefetch_errors'] = self.prefetch_errors
+        return stats
+    
+    def shutdown(self):
+        if self.scanner:
+            self.scanner.cancel()
+        self.prefetcher.stop()
+        self.thumbnails.shutdown()
+        # Garante que as gravações pendentes cheguem ao disco antes de sair
+        self.writer.close()
+        for txt_path, error in self.writer.pop_errors():
+            print(f"Erro ao salvar anotações em {txt_path}: {str(error)}")
+        # Sem edições pendentes o journal é removido; senão fica para a próxima abertura
+        self.journal.close()
+    
     def get_progress(self):
         if not self.image_list:
             return 0
         return (self.image_index + 1) / len(self.image_list) * 100
     
+    def is_scanning(self):
+        return self.scanner is not None and self.scanner.is_scanning()
+    
     def get_status_text(self):
         if not self.image_list:
             return "Pronto"
+        if self.is_scanning():
+            return f"Imagem {self.image_index + 1} de {len(self.image_list)}+ (listando...)"
         return f"Imagem {self.image_index + 1} de {len(self.image_list)}"
\ No newline at end of file
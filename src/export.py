@@ -0,0 +1,239 @@
+"""Exportação dos resultados de inferência, um registro por imagem.
+
+Os exportadores escrevem cada resultado assim que ele chega e não guardam
+nada além do buffer do arquivo, então a memória não cresce com o tamanho do
+conjunto. Usados pela linha de comando (inferencia_cli.py) e pelo "Save" do
+appInferencia. Parquet e Arrow guardam também cada detecção (classe,
+confiança e caixa) e são gravados em blocos de chunk_rows imagens; exigem o
+pyarrow, que é opcional.
+"""
+import os
+import sys
+import csv
+import json
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+
+# Mesmas colunas do relatório do appInferencia
+SUMMARY_COLUMNS = ['Imagem', 'Tem Medidor', 'Tem Display', 'Dígitos Encontrados', 'Confiança']
+
+
+def summary_row(result):
+    return [
+        os.path.basename(result['image_path']),
+        "Yes" if result['meter_detected'] else "No",
+        "Yes" if result['display_detected'] else "No",
+        result['digits'] if result['digits'] else "None",
+        f"{result['digits_confidence']:.2f}" if result['digits'] else "N/A"
+    ]
+
+
+def detection_records(detections):
+    return [{'class': name, 'confidence': round(confidence, 4), 'box': [round(value, 1) for value in box]}
+            for name, confidence, box in detections]
+
+
+class _Exporter(ABC):
+    # Base: abre o arquivo (ou stdout com "-") e força a escrita a cada flush_seconds.
+    # encoding=None usa a codificação do sistema, como o .txt do appInferencia sempre fez
+    def __init__(self, path, flush_seconds=1.0, newline=None, encoding='utf-8'):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.rows = 0
+        if path == "-":
+            self._file = sys.stdout
+        else:
+            self._file = open(path, 'w', encoding=encoding, newline=newline)
+        self._last_flush = time.monotonic()
+
+    def write(self, result):
+        self._write(result)
+        self.rows += 1
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_seconds:
+            # Quem acompanha o arquivo vê o progresso sem esperar o fim
+            self._file.flush()
+            self._last_flush = now
+
+    @abstractmethod
+    def _write(self, result):
+        """Grava um resultado no arquivo aberto."""
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self._file is not sys.stdout:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvExporter(_Exporter):
+    """Uma linha por imagem com as colunas do relatório; delimiter=";" para o formato .txt."""
+
+    def __init__(self, path, delimiter=",", **options):
+        super().__init__(path, newline="", **options)
+        self._writer = csv.writer(self._file, delimiter=delimiter, lineterminator="\n")
+        self._writer.writerow(SUMMARY_COLUMNS)
+
+    def _write(self, result):
+        self._writer.writerow(summary_row(result))
+
+
+class JsonlExporter(_Exporter):
+    """Um objeto JSON por linha, com o caminho completo e todas as detecções."""
+
+    def _write(self, result):
+        record = {
+            'image_path': result['image_path'],
+            'meter_detected': result['meter_detected'],
+            'display_detected': result['display_detected'],
+            'digits': result['digits'],
+            'digits_confidence': round(result['digits_confidence'], 4),
+            'detections': detection_records(result['detections'])
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class _ArrowExporter(ABC):
+    """Base dos formatos colunares: junta chunk_rows resultados e grava um record batch.
+
+    Uma linha por imagem; as detecções ficam em colunas de lista (class_ids,
+    confidences e boxes com 4 floats xyxy). Os nomes das classes vão nos
+    metadados do schema, em JSON.
+    """
+
+    def __init__(self, path, chunk_rows=4096, class_names=None):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet/Arrow export (pip install pyarrow)") from None
+        self.pa = pa
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.class_names = class_names
+        self.rows = 0
+        self._pending = []
+        self.schema = None
+        self._writer = None
+
+    def _schema(self):
+        pa = self.pa
+        metadata = {'class_names': json.dumps(self.class_names or [], ensure_ascii=False)}
+        return pa.schema([
+            ('image_path', pa.string()),
+            ('meter_detected', pa.bool_()),
+            ('display_detected', pa.bool_()),
+            ('digits', pa.string()),
+            ('digits_confidence', pa.float32()),
+            ('class_ids', pa.list_(pa.int32())),
+            ('confidences', pa.list_(pa.float32())),
+            ('boxes', pa.list_(pa.list_(pa.float32(), 4))),
+        ], metadata=metadata)
+
+    def write(self, result):
+        if self.class_names is None:
+            self.class_names = list(result['detections'].class_names)
+        self._pending.append(result)
+        self.rows += 1
+        if len(self._pending) >= self.chunk_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pa = self.pa
+        if self._writer is None:
+            self.schema = self._schema()
+            self._writer = self._open(self.schema)
+        detections = [result['detections'] for result in self._pending]
+        # Offsets das listas: uma concatenação por coluna em vez de uma lista Python por caixa
+        offsets = np.zeros(len(detections) + 1, np.int32)
+        np.cumsum([len(d) for d in detections], out=offsets[1:])
+        offsets = pa.array(offsets)
+        class_ids = np.concatenate([d.class_ids for d in detections]).astype(np.int32, copy=False)
+        confidences = np.concatenate([d.confidences for d in detections]).astype(np.float32, copy=False)
+        boxes = np.concatenate([d.boxes for d in detections]).astype(np.float32, copy=False).reshape(-1)
+        batch = pa.record_batch([
+            pa.array([result['image_path'] for result in self._pending], pa.string()),
+            pa.array([result['meter_detected'] for result in self._pending], pa.bool_()),
+            pa.array([result['display_detected'] for result in self._pending], pa.bool_()),
+            pa.array([result['digits'] for result in self._pending], pa.string()),
+            pa.array([result['digits_confidence'] for result in self._pending], pa.float32()),
+            pa.ListArray.from_arrays(offsets, pa.array(class_ids)),
+            pa.ListArray.from_arrays(offsets, pa.array(confidences)),
+            pa.ListArray.from_arrays(offsets, pa.FixedSizeListArray.from_arrays(pa.array(boxes), 4)),
+        ], schema=self.schema)
+        self._write_batch(batch)
+        self._pending = []
+
+    @abstractmethod
+    def _open(self, schema):
+        """Abre o writer do formato para o schema."""
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._flush()
+        if self._writer is None:
+            # Nenhum resultado: ainda assim um arquivo válido, só com o schema
+            self._writer = self._open(self._schema())
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetExporter(_ArrowExporter):
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, schema, compression='zstd')
+
+
+class ArrowExporter(_ArrowExporter):
+    """Arquivo Arrow IPC (Feather v2), lido sem conversão por pyarrow/pandas/polars."""
+
+    def _open(self, schema):
+        return self.pa.ipc.new_file(self.path, schema)
+
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'jsonl': JsonlExporter,
+    'parquet': ParquetExporter,
+    'arrow': ArrowExporter,
+}
+# Extensões alternativas
+_ALIASES = {'feather': 'arrow', 'ndjson': 'jsonl'}
+
+
+def format_for(path, default='jsonl'):
+    """Formato pela extensão; "-" (stdout) e extensões desconhecidas saem em default."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    extension = _ALIASES.get(extension, extension)
+    if extension == 'txt':
+        return 'txt'
+    return extension if extension in EXPORTERS else default
+
+
+def open_exporter(path, fmt=None, **options):
+    fmt = fmt or format_for(path)
+    if fmt == 'txt':
+        # Formato de texto do appInferencia: CSV separado por ponto e vírgula,
+        # na codificação do sistema como antes
+        options.setdefault('encoding', None)
+        return CsvExporter(path, delimiter=";", **options)
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return EXPORTERS[fmt](path, **options)
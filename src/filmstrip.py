@@ -0,0 +1,152 @@
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+
+class Filmstrip(ttk.Frame):
+    """Faixa rolável de miniaturas do dataset, virtualizada.
+
+    Só as células visíveis têm itens no canvas; miniaturas ainda não geradas
+    aparecem como um quadro vazio e são trocadas quando o pool termina.
+    """
+
+    def __init__(self, master, thumbnails, count_fn, path_fn, on_select=None, max_photos=256):
+        super().__init__(master)
+        self.thumbnails = thumbnails
+        self.count_fn = count_fn
+        self.path_fn = path_fn
+        self.on_select = on_select
+        self.max_photos = max_photos
+        self.cell = thumbnails.size + 8
+        self.current = None
+        self._photos = OrderedDict()
+        self._cells = {}
+        self._poll_job = None
+
+        self.canvas = tk.Canvas(self, height=self.cell, bg="#1a1a1a", highlightthickness=0,
+                                xscrollincrement=1)
+        self.canvas.pack(fill=tk.X, expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.on_scroll)
+        self.scrollbar.pack(fill=tk.X)
+        self.canvas.configure(xscrollcommand=self.scrollbar.set)
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_cells(-3 if e.delta > 0 else 3))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_cells(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_cells(3))
+
+    def reset(self):
+        # Outra pasta: descarta células e miniaturas carregadas
+        self.canvas.delete("all")
+        self._cells = {}
+        self._photos.clear()
+        self.current = None
+        self.canvas.xview_moveto(0)
+        self.render()
+
+    def set_current(self, index):
+        self.current = index
+        self.see(index)
+        self._draw_highlight()
+
+    def see(self, index):
+        left = self.canvas.canvasx(0)
+        width = self.canvas.winfo_width()
+        x = index * self.cell
+        if x < left or x + self.cell > left + width:
+            self.canvas.xview_moveto(max(0, x - (width - self.cell) / 2) / max(1, self.count_fn() * self.cell))
+        self.render()
+
+    def on_scroll(self, *args):
+        self.canvas.xview(*args)
+        self.render()
+
+    def scroll_cells(self, delta):
+        self.canvas.xview("scroll", delta * self.cell, "units")
+        self.render()
+        return "break"
+
+    def on_click(self, event):
+        index = int(self.canvas.canvasx(event.x) // self.cell)
+        if 0 <= index < self.count_fn() and self.on_select:
+            self.on_select(index)
+
+    def render(self):
+        count = self.count_fn()
+        self.canvas.config(scrollregion=(0, 0, count * self.cell, self.cell))
+        left = self.canvas.canvasx(0)
+        first = max(0, int(left // self.cell))
+        last = min(count, int((left + self.canvas.winfo_width()) // self.cell) + 1)
+        visible = range(first, last)
+
+        for index in [i for i in self._cells if i not in visible]:
+            self.canvas.delete(*self._cells.pop(index)[1:])
+
+        paths = []
+        for index in visible:
+            path = self.path_fn(index)
+            entry = self._cells.get(index)
+            if entry is None or entry[0] != path:
+                if entry is not None:
+                    self.canvas.delete(*entry[1:])
+                self._cells[index] = (path, *self._create_cell(index, path))
+            # Toda célula visível sem foto entra no pedido, mesmo as já desenhadas:
+            # o que ficar de fora é tratado como fora da tela e cancelado
+            if path not in self._photos:
+                paths.append(path)
+
+        self.thumbnails.request(paths)
+        self._draw_highlight()
+        self._schedule_poll()
+
+    def _create_cell(self, index, path):
+        x = index * self.cell + self.cell // 2
+        y = self.cell // 2
+        photo = self._load_photo(path)
+        if photo is not None:
+            return (self.canvas.create_image(x, y, image=photo, tags="thumb"),)
+        half = self.thumbnails.size // 2
+        return (self.canvas.create_rectangle(x - half, y - half, x + half, y + half,
+                                             outline="#444444", tags="thumb"),)
+
+    def _load_photo(self, path):
+        photo = self._photos.get(path)
+        if photo is not None:
+            self._photos.move_to_end(path)
+            return photo
+        thumb_path = self.thumbnails.cached_path(path)
+        if thumb_path is None:
+            return None
+        try:
+            with Image.open(thumb_path) as img:
+                photo = ImageTk.PhotoImage(img)
+        except OSError:
+            return None
+        self._photos[path] = photo
+        while len(self._photos) > self.max_photos:
+            self._photos.popitem(last=False)
+        return photo
+
+    def _draw_highlight(self):
+        self.canvas.delete("current")
+        if self.current is not None:
+            x = self.current * self.cell
+            self.canvas.create_rectangle(x + 1, 1, x + self.cell - 1, self.cell - 1,
+                                         outline="#4a90d9", width=2, tags="current")
+
+    def _schedule_poll(self):
+        if self._poll_job is None and self.thumbnails.has_pending():
+            self._poll_job = self.after(100, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        done = {path for path, thumb_path in self.thumbnails.poll() if thumb_path}
+        for index, (path, *items) in list(self._cells.items()):
+            if path in done:
+                self.canvas.delete(*items)
+                self._cells[index] = (path, *self._create_cell(index, path))
+        if done:
+            self._draw_highlight()
+        self._schedule_poll()
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
+from .annotations import parse_yolo
+from .scanner import iter_label_files
+
+INDEX_DIR = ".label_index"
+INDEX_VERSION = 1
+PARSE_CHUNK = 256
+STAT_CHUNK = 1024
+STAT_THREADS = 16
+
+
+def _stat_chunk(chunk):
+    found = []
+    for name, entry in chunk:
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        found.append((name, st.st_mtime_ns, st.st_size))
+    return found
+
+
+def scan_label_files(root, threads=STAT_THREADS, errors=None):
+    # Lista os .txt de rótulo com mtime/tamanho, sem abrir os arquivos. O stat
+    # é uma chamada de sistema que solta o GIL: em disco de rede ou frio várias
+    # threads escondem a latência de cada uma
+    chunks = []
+    chunk = []
+    for rel_dir, entry in iter_label_files(root, errors=errors):
+        chunk.append((os.path.join(rel_dir, entry.name) if rel_dir else entry.name, entry))
+        if len(chunk) >= STAT_CHUNK:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    if len(chunks) <= 1 or threads <= 1:
+        return [item for chunk in chunks for item in _stat_chunk(chunk)]
+    found = []
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for chunk_result in pool.map(_stat_chunk, chunks):
+            found.extend(chunk_result)
+    return found
+
+
+def _parse_chunk(root, names):
+    results = []
+    for name in names:
+        try:
+            with open(os.path.join(root, name), 'r') as f:
+                results.append(parse_yolo(f.read()))
+        except (OSError, ValueError):
+            results.append(parse_yolo(""))
+    return results
+
+
+class DatasetIndex:
+    """Índice colunar de todos os .txt YOLO de um dataset, salvo em disco como .npy.
+
+    Colunas por caixa: image_id, class_id e boxes (xc, yc, w, h normalizados).
+    Colunas por imagem: names, mtime, size, counts e offsets. Os arquivos são
+    abertos com mmap e só os rótulos com mtime/tamanho alterados são relidos.
+    """
+
+    def __init__(self, root, workers=None):
+        self.root = root
+        self.path = os.path.join(root, INDEX_DIR)
+        self.workers = workers or os.cpu_count() or 1
+        # Motivo pelo qual o índice salvo foi descartado, para quem chamou mostrar
+        self.load_error = None
+        self._clear()
+        self.load()
+
+    def _clear(self):
+        self.names = []
+        self.mtime = np.empty(0, np.int64)
+        self.size = np.empty(0, np.int64)
+        self.counts = np.empty(0, np.int32)
+        self.offsets = np.zeros(1, np.int64)
+        self.image_id = np.empty(0, np.int32)
+        self.class_id = np.empty(0, np.int32)
+        self.boxes = np.empty((0, 4), np.float32)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def num_boxes(self):
+        return len(self.class_id)
+
+    def load(self):
+        manifest_path = os.path.join(self.path, "index.json")
+        if not os.path.exists(manifest_path):
+            return False
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != INDEX_VERSION:
+                return False
+            with open(os.path.join(self.path, "names.txt"), 'r', encoding='utf-8') as f:
+                names = f.read().split('\n') if manifest['images'] else []
+            columns = {}
+            for column in ('mtime', 'size', 'counts', 'offsets', 'image_id', 'class_id', 'boxes'):
+                columns[column] = np.load(os.path.join(self.path, column + ".npy"), mmap_mode='r')
+        except (OSError, ValueError, KeyError) as e:
+            # O índice é reconstruído por update()
+            self.load_error = str(e)
+            self._clear()
+            return False
+
+        self.names = names
+        for column, values in columns.items():
+            setattr(self, column, values)
+        return True
+
+    def update(self):
+        """Sincroniza o índice com os arquivos em disco; retorna estatísticas da atualização."""
+        start = time.perf_counter()
+        # Rótulos de pastas que não puderam ser listadas saem do índice
+        scan_errors = []
+        current = scan_label_files(self.root, errors=scan_errors)
+        old_lookup = {name: i for i, name in enumerate(self.names)}
+
+        keep = np.zeros(len(self.names), bool)
+        changed = []
+        replaced = 0
+        for name, mtime, size in current:
+            i = old_lookup.get(name)
+            if i is not None and self.mtime[i] == mtime and self.size[i] == size:
+                keep[i] = True
+            else:
+                changed.append((name, mtime, size))
+                replaced += i is not None
+
+        removed = len(self.names) - int(keep.sum()) - replaced
+        if not changed and not removed:
+            return {'images': len(self), 'parsed': 0, 'removed': 0,
+                    'seconds': time.perf_counter() - start, 'load_error': self.load_error,
+                    'scan_errors': scan_errors}
+
+        # Arquivos alterados são relidos em blocos; o parse é Python puro e
+        # disputa o GIL, então vários blocos vão para processos separados
+        changed_names = [name for name, _, _ in changed]
+        chunks = [changed_names[i:i + PARSE_CHUNK] for i in range(0, len(changed_names), PARSE_CHUNK)]
+        parse = partial(_parse_chunk, self.root)
+        parsed = []
+        if len(chunks) <= 1 or self.workers <= 1:
+            # Poucas alterações: subir processos custaria mais que o parse
+            for chunk in chunks:
+                parsed.extend(parse(chunk))
+        else:
+            # spawn: update() roda em uma thread da interface
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(min(self.workers, len(chunks))) as pool:
+                for chunk_result in pool.imap(parse, chunks):
+                    parsed.extend(chunk_result)
+
+        self._rebuild(keep, changed, parsed)
+        self.save()
+        return {'images': len(self), 'parsed': len(changed), 'removed': removed,
+                'seconds': time.perf_counter() - start, 'load_error': self.load_error,
+                'scan_errors': scan_errors}
+
+    def _rebuild(self, keep, changed, parsed):
+        # Imagens mantidas primeiro (na ordem antiga), depois as relidas
+        kept_ids = np.flatnonzero(keep)
+        id_map = np.full(len(self.names), -1, np.int32)
+        id_map[kept_ids] = np.arange(len(kept_ids), dtype=np.int32)
+        row_mask = keep[self.image_id] if self.num_boxes else np.zeros(0, bool)
+
+        new_counts = np.array([len(class_ids) for class_ids, _ in parsed], np.int32)
+        new_image_ids = np.repeat(np.arange(len(kept_ids), len(kept_ids) + len(parsed), dtype=np.int32),
+                                  new_counts)
+
+        self.image_id = np.concatenate([id_map[self.image_id[row_mask]], new_image_ids]).astype(np.int32)
+        self.class_id = np.concatenate([self.class_id[row_mask]] + [c for c, _ in parsed]).astype(np.int32)
+        self.boxes = np.concatenate([self.boxes[row_mask]] + [b for _, b in parsed]).astype(np.float32)
+        self.names = [self.names[i] for i in kept_ids.tolist()] + [name for name, _, _ in changed]
+        self.mtime = np.concatenate([self.mtime[kept_ids], np.array([m for _, m, _ in changed], np.int64)])
+        self.size = np.concatenate([self.size[kept_ids], np.array([s for _, _, s in changed], np.int64)])
+        self.counts = np.concatenate([self.counts[kept_ids], new_counts]).astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts, dtype=np.int64)])
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        for column in ('mtime', 'size', 'counts', 'offsets', 'image_id', 'class_id', 'boxes'):
+            tmp_path = os.path.join(self.path, column + ".tmp.npy")
+            np.save(tmp_path, np.ascontiguousarray(getattr(self, column)))
+            os.replace(tmp_path, os.path.join(self.path, column + ".npy"))
+        tmp_path = os.path.join(self.path, "names.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.names))
+        os.replace(tmp_path, os.path.join(self.path, "names.txt"))
+
+        # O manifesto é gravado por último e marca o índice como completo
+        tmp_path = os.path.join(self.path, "index.json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'images': len(self.names), 'boxes': self.num_boxes}, f)
+        os.replace(tmp_path, os.path.join(self.path, "index.json"))
+        self.load()
+
+    def class_histogram(self, num_classes=0):
+        return np.bincount(self.class_id, minlength=num_classes)
+
+    def images_per_class(self, num_classes=0):
+        # Cada par (imagem, classe) conta uma vez
+        if not self.num_boxes:
+            return np.zeros(num_classes, np.int64)
+        num_ids = int(max(num_classes, int(self.class_id.max()) + 1))
+        pairs = np.unique(self.image_id.astype(np.int64) * num_ids + self.class_id)
+        return np.bincount(pairs % num_ids, minlength=num_classes)
+
+    def images_with_class(self, class_id):
+        image_ids = np.unique(self.image_id[self.class_id == class_id])
+        return [self.names[i] for i in image_ids.tolist()]
+
+    def image_boxes(self, image_id):
+        start, end = self.offsets[image_id], self.offsets[image_id + 1]
+        return self.class_id[start:end], self.boxes[start:end]
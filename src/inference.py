@@ -0,0 +1,210 @@
+"""Inferência YOLO em lotes, sem dependência de Tk.
+
+Usado pelo appInferencia: as imagens são agrupadas em lotes, decodificadas em
+threads e passadas ao modelo em uma única chamada; o ultralytics faz o
+letterbox e empilha o lote num só forward. Decodificação, modelo e
+pós-processamento rodam em paralelo, como estágios de um pipeline. Os
+resultados voltam na ordem de entrada.
+"""
+import os
+import numpy as np
+from PIL import Image
+from .pipeline import Pipeline
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+DEFAULT_BATCH_SIZE = 16
+
+
+def warm_up():
+    # Pré-carrega ultralytics/torch em segundo plano, antes do primeiro load_model
+    try:
+        import ultralytics  # noqa: F401
+    except ImportError as e:
+        print(f"ultralytics indisponível: {str(e)}")
+
+
+def load_model(model_path):
+    """Carrega o modelo YOLO; retorna (modelo, nomes das classes por id)."""
+    # Import tardio: ultralytics/torch custam segundos
+    from ultralytics import YOLO
+    model = YOLO(model_path)
+    names = getattr(model, 'names', None) or {}
+    if isinstance(names, dict):
+        class_names = [names.get(i, str(i)) for i in range(max(names) + 1)] if names else []
+    else:
+        class_names = list(names)
+    if not class_names:
+        num_classes = getattr(model.model, 'nc', 0)
+        class_names = [f"class_{i}" for i in range(num_classes)]
+    return model, class_names
+
+
+def iter_images(folder):
+    # Gerador: pastas enormes são percorridas sem montar a lista inteira
+    for root, _, files in os.walk(folder):
+        for file in files:
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, file)
+
+
+def list_images(folder):
+    return list(iter_images(folder))
+
+
+def decode_image(path):
+    # O ultralytics espera arrays BGR, como os do OpenCV
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))[:, :, ::-1]
+
+
+class Detections:
+    """Detecções de uma imagem em arrays: ids de classe, confianças e caixas xyxy."""
+
+    __slots__ = ("class_ids", "confidences", "boxes", "class_names")
+
+    def __init__(self, class_ids, confidences, boxes, class_names):
+        self.class_ids = class_ids
+        self.confidences = confidences
+        self.boxes = boxes
+        self.class_names = class_names
+
+    @classmethod
+    def empty(cls, class_names):
+        return cls(np.empty(0, np.int32), np.empty(0, np.float32), np.empty((0, 4), np.float32), class_names)
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def class_name(self, class_id):
+        return self.class_names[class_id] if class_id < len(self.class_names) else str(class_id)
+
+    def __iter__(self):
+        # (nome da classe, confiança, (x1, y1, x2, y2)) para desenhar
+        for class_id, confidence, box in zip(self.class_ids.tolist(), self.confidences.tolist(), self.boxes.tolist()):
+            yield self.class_name(class_id), confidence, box
+
+
+class ClassRoles:
+    """Máscaras por id de classe para medidor, display e dígitos, calculadas uma vez por modelo."""
+
+    def __init__(self, class_names):
+        self.class_names = class_names
+        self.meter = np.array([name == 'medidor' for name in class_names], bool)
+        self.display = np.array([name == 'display' for name in class_names], bool)
+        self.digit = np.array([name.isdigit() for name in class_names], bool)
+        self.names = np.array(class_names, dtype=object)
+
+    @staticmethod
+    def _lookup(table, class_ids, default):
+        # Ids além dos nomes conhecidos viram o próprio número, como no nome str(id)
+        known = class_ids < len(table)
+        mask = np.full(len(class_ids), default, bool)
+        mask[known] = table[class_ids[known]]
+        return mask
+
+    def summarize(self, img_path, detections):
+        class_ids = detections.class_ids
+        digit_index = np.flatnonzero(self._lookup(self.digit, class_ids, True))
+        # Dígitos da esquerda para a direita (estável, como o sorted original)
+        order = digit_index[np.argsort(detections.boxes[digit_index, 0], kind='stable')]
+        digits = "".join(detections.class_name(class_id) for class_id in class_ids[order].tolist())
+
+        return {
+            'image_path': img_path,
+            'detections': detections,
+            'meter_detected': bool(self._lookup(self.meter, class_ids, False).any()),
+            'display_detected': bool(self._lookup(self.display, class_ids, False).any()),
+            'digits': digits or None,
+            'digits_confidence': float(detections.confidences[order].mean()) if order.size else 0.0
+        }
+
+
+def extract_detections(result, class_names):
+    """Uma única cópia tensor -> NumPy por imagem (boxes.data: x1, y1, x2, y2, conf, classe)."""
+    boxes = getattr(result, 'boxes', None)
+    if boxes is None or len(boxes) == 0:
+        return Detections.empty(class_names)
+    data = boxes.data
+    data = data.cpu().numpy() if hasattr(data, 'cpu') else np.asarray(data)
+    return Detections(data[:, -1].astype(np.int32), data[:, -2].astype(np.float32),
+                      np.ascontiguousarray(data[:, :4], np.float32), class_names)
+
+
+def decode_batch(paths):
+    """Decodifica um lote; imagens ilegíveis ficam com o erro no lugar do array."""
+    decoded = []
+    for path in paths:
+        try:
+            decoded.append(decode_image(path))
+        except Exception as e:
+            decoded.append(e)
+    return decoded
+
+
+def infer_batch(model, decoded):
+    images = [image for image in decoded if not isinstance(image, Exception)]
+    # Um único forward para o lote inteiro
+    results = iter(model(images, verbose=False) if images else [])
+    return [image if isinstance(image, Exception) else next(results) for image in decoded]
+
+
+def postprocess_batch(roles, paths, raw):
+    """(resultado, None) ou (None, erro) para cada imagem do lote."""
+    outputs = []
+    for path, result in zip(paths, raw):
+        if isinstance(result, Exception):
+            outputs.append((None, result))
+        else:
+            outputs.append((roles.summarize(path, extract_detections(result, roles.class_names)), None))
+    return outputs
+
+
+class BatchInference:
+    """Executa o modelo em lotes de batch_size imagens, em um pipeline de três estágios.
+
+    decode (várias threads) -> infer (uma thread, o modelo) -> postprocess,
+    ligados por filas limitadas. run() é um gerador de (índice, resultado ou
+    None, erro ou None) na ordem das imagens; should_stop() é consultado
+    antes de cada lote entrar no pipeline.
+    """
+
+    def __init__(self, model, class_names, batch_size=DEFAULT_BATCH_SIZE, decode_workers=4, queue_size=2):
+        self.model = model
+        self.class_names = class_names
+        self.roles = ClassRoles(class_names)
+        self.batch_size = max(1, int(batch_size))
+        self.pipeline = (Pipeline(queue_size)
+                         .add_stage("decode", self._decode, decode_workers)
+                         .add_stage("infer", self._infer)
+                         .add_stage("postprocess", self._postprocess))
+
+    def run(self, image_paths, should_stop=None):
+        batches = ((start, image_paths[start:start + self.batch_size])
+                   for start in range(0, len(image_paths), self.batch_size))
+        for (start, paths), outputs, error in self.pipeline.run(batches, should_stop):
+            if error is not None:
+                outputs = [(None, error)] * len(paths)
+            for offset, (result, image_error) in enumerate(outputs):
+                yield start + offset, result, image_error
+
+    def stats(self):
+        return self.pipeline.stats()
+
+    def _decode(self, batch):
+        _, paths = batch
+        return paths, decode_batch(paths)
+
+    def _infer(self, decoded_batch):
+        paths, decoded = decoded_batch
+        return paths, infer_batch(self.model, decoded)
+
+    def _postprocess(self, inferred_batch):
+        paths, raw = inferred_batch
+        return postprocess_batch(self.roles, paths, raw)
+
+
+def format_pipeline_stats(stats):
+    """Resumo de uma linha: utilização e fila média de cada estágio."""
+    parts = [f"{name} {stage['utilization'] * 100:.0f}% (fila {stage['queue_depth_avg']:.1f})"
+             for name, stage in stats['stages'].items()]
+    return " | ".join(parts)
@@ -0,0 +1,323 @@
+"""Journal de edições: cada alteração de anotação vira um registro binário curto.
+
+Os registros são acumulados em memória e gravados com um único fsync a cada
+sync_interval, de modo que uma edição custa microssegundos e uma queda perde
+no máximo esse intervalo. Marcadores SAVE/COMMIT indicam quais edições já
+estão nos .txt; as demais são reaplicadas na próxima abertura da pasta.
+
+Formato: cabeçalho "YLJ1" seguido de registros (tipo: u8, tamanho: u32, dados).
+"""
+import os
+import time
+import struct
+import threading
+import numpy as np
+from .annotations import parse_yolo, format_yolo, yolo_to_xyxy, xyxy_to_yolo
+from .writer import atomic_write
+
+JOURNAL_NAME = ".label_journal"
+HEADER = b"YLJ1"
+
+IMAGE, ADD, DELETE, BOX, CLEAR, SAVE, COMMIT = range(1, 8)
+_RECORD = struct.Struct("<BI")
+_PAYLOAD = {
+    IMAGE: struct.Struct("<qqii"),   # mtime_ns e tamanho do .txt base, largura e altura; depois o caminho
+    ADD: struct.Struct("<i4f"),      # classe, x1, y1, x2, y2
+    DELETE: struct.Struct("<i"),     # índice
+    BOX: struct.Struct("<i4f"),      # índice, x1, y1, x2, y2
+    CLEAR: struct.Struct(""),
+    SAVE: struct.Struct("<q"),       # token
+    COMMIT: struct.Struct("<qqq"),   # token, mtime_ns e tamanho gravados
+}
+_OPERATIONS = {"add": ADD, "delete": DELETE, "box": BOX, "clear": CLEAR}
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0, -1
+    return stat.st_mtime_ns, stat.st_size
+
+
+def encode_record(kind, values=(), path=None):
+    payload = _PAYLOAD[kind].pack(*values)
+    if path is not None:
+        payload += path.encode("utf-8")
+    return _RECORD.pack(kind, len(payload)) + payload
+
+
+def iter_records(data):
+    """Percorre (tipo, valores, caminho) de um journal; um registro final incompleto é ignorado."""
+    if not data.startswith(HEADER):
+        return
+    offset = len(HEADER)
+    while offset + _RECORD.size <= len(data):
+        kind, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if offset + length > len(data) or kind not in _PAYLOAD:
+            return
+        fixed = _PAYLOAD[kind]
+        values = fixed.unpack_from(data, offset)
+        path = data[offset + fixed.size:offset + length].decode("utf-8") if kind == IMAGE else None
+        offset += length
+        yield kind, values, path
+
+
+class _Segment:
+    # Edições de um .txt desde a última versão conhecida em disco
+    def __init__(self, base, img_size, number):
+        self.base = base
+        self.img_size = img_size
+        self.number = number
+        self.ops = []
+
+
+class JournalState:
+    """Interpreta os registros e mantém as edições ainda não gravadas de cada arquivo."""
+
+    def __init__(self):
+        self.current = None
+        self.segments = {}
+        self.saves = {}
+
+    def apply(self, kind, values, path=None):
+        if kind == IMAGE:
+            mtime_ns, size, img_w, img_h = values
+            previous = self.segments.get(path)
+            number = previous.number + 1 if previous else 0
+            self.segments[path] = _Segment((mtime_ns, size), (img_w, img_h), number)
+            self.current = path
+        elif kind == SAVE:
+            segment = self.segments.get(self.current)
+            if segment is not None:
+                self.saves[values[0]] = (self.current, segment.number, len(segment.ops))
+        elif kind == COMMIT:
+            token, mtime_ns, size = values
+            saved = self.saves.pop(token, None)
+            if saved is None:
+                return
+            path, number, count = saved
+            segment = self.segments.get(path)
+            if segment is None or segment.number != number:
+                return
+            # As edições até o SAVE estão no arquivo; a base passa a ser a versão gravada
+            del segment.ops[:count]
+            segment.base = (mtime_ns, size)
+            for other, (other_path, other_number, other_count) in list(self.saves.items()):
+                if other_path == path and other_number == number:
+                    if other_count <= count:
+                        del self.saves[other]
+                    else:
+                        self.saves[other] = (other_path, other_number, other_count - count)
+        elif self.current is not None:
+            self.segments[self.current].ops.append((kind, values))
+
+    def pending(self):
+        return {path: segment for path, segment in self.segments.items() if segment.ops}
+
+    def is_clean(self):
+        return not self.saves and not self.pending()
+
+
+def apply_segment(path, segment):
+    """Reaplica as edições de um segmento sobre o .txt em disco."""
+    img_w, img_h = segment.img_size
+    class_ids, boxes = [], []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            file_ids, yolo_boxes = parse_yolo(f.read())
+        class_ids = file_ids.tolist()
+        if len(file_ids):
+            boxes = yolo_to_xyxy(yolo_boxes, img_w, img_h).tolist()
+
+    for kind, values in segment.ops:
+        if kind == ADD:
+            class_ids.append(values[0])
+            boxes.append(list(values[1:]))
+        elif kind == DELETE:
+            del class_ids[values[0]]
+            del boxes[values[0]]
+        elif kind == BOX:
+            boxes[values[0]] = list(values[1:])
+        elif kind == CLEAR:
+            class_ids, boxes = [], []
+
+    boxes = np.array(boxes, np.float32).reshape(-1, 4)
+    atomic_write(path, format_yolo(np.array(class_ids, np.int32), xyxy_to_yolo(boxes, img_w, img_h)))
+
+
+def replay_journal(journal_path):
+    """Aplica as edições não gravadas de um journal anterior e o remove.
+
+    Arquivos alterados depois da última base registrada não são tocados, pois
+    a gravação pode ter chegado ao disco sem o COMMIT correspondente.
+    """
+    stats = {'files': 0, 'edits': 0, 'skipped': 0}
+    if not os.path.exists(journal_path):
+        return stats
+    with open(journal_path, 'rb') as f:
+        data = f.read()
+
+    state = JournalState()
+    for kind, values, path in iter_records(data):
+        state.apply(kind, values, path)
+
+    for path, segment in state.pending().items():
+        if file_signature(path) != segment.base:
+            stats['skipped'] += 1
+            continue
+        try:
+            apply_segment(path, segment)
+        except (OSError, ValueError, IndexError):
+            stats['skipped'] += 1
+            continue
+        stats['files'] += 1
+        stats['edits'] += len(segment.ops)
+
+    os.remove(journal_path)
+    return stats
+
+
+class EditJournal:
+    """Journal da sessão: registra edições do AnnotationStore e os marcadores de gravação.
+
+    record() é o listener do store e só enfileira bytes; uma thread de fundo
+    grava os registros acumulados e faz um fsync por lote.
+    """
+
+    def __init__(self, sync_interval=0.1, compact_bytes=64 * 1024):
+        self.sync_interval = sync_interval
+        self.compact_bytes = compact_bytes
+        self.path = None
+        self.state = JournalState()
+        self._file = None
+        self._buffer = bytearray()
+        self._image = None
+        self._next_token = 0
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = None
+        self.records = 0
+        self.syncs = 0
+        self.compactions = 0
+
+    def open(self, path):
+        self.close()
+        self.path = path
+        self.state = JournalState()
+        self._file = open(path, 'wb')
+        self._file.write(HEADER)
+        self._file.flush()
+        self._thread = threading.Thread(target=self._flusher, daemon=True)
+        self._thread.start()
+
+    def is_open(self):
+        return self._file is not None
+
+    def _append(self, kind, values=(), path=None):
+        # Chamado com self._cond adquirido
+        self.state.apply(kind, values, path)
+        self._buffer += encode_record(kind, values, path)
+        self.records += 1
+        self._cond.notify_all()
+
+    def begin_image(self, label_path, img_size):
+        # Base = versão atual do .txt; as edições seguintes se aplicam sobre ela
+        mtime_ns, size = file_signature(label_path)
+        with self._cond:
+            if self._file is None:
+                return
+            self._image = label_path
+            self._append(IMAGE, (mtime_ns, size, img_size[0], img_size[1]), label_path)
+
+    def end_image(self):
+        with self._cond:
+            self._image = None
+
+    def record(self, operation, *values):
+        with self._cond:
+            if self._file is None or self._image is None:
+                return
+            self._append(_OPERATIONS[operation], values)
+
+    def save_marker(self):
+        """Registra que o estado atual foi enviado para gravação; retorna o token do COMMIT."""
+        with self._cond:
+            if self._file is None or self._image is None:
+                return None
+            token = self._next_token
+            self._next_token += 1
+            self._append(SAVE, (token,))
+            return token
+
+    def commit(self, path, token):
+        # Chamado pela thread de gravação quando o .txt já está no disco
+        if token is None:
+            return
+        mtime_ns, size = file_signature(path)
+        with self._cond:
+            if self._file is not None:
+                self._append(COMMIT, (token, mtime_ns, size))
+
+    def compact(self):
+        """Recomeça o journal quando todas as edições registradas já estão nos .txt."""
+        with self._io_lock, self._cond:
+            if self._file is None or not self.state.is_clean():
+                return False
+            if self._file.tell() + len(self._buffer) < self.compact_bytes:
+                return False
+            segment = self.state.segments.get(self._image)
+            self.state = JournalState()
+            self._buffer.clear()
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.write(HEADER)
+            self._file.flush()
+            if segment is not None:
+                # A imagem aberta continua valendo como base das próximas edições
+                self._append(IMAGE, (*segment.base, *segment.img_size), self._image)
+            self.compactions += 1
+            return True
+
+    def _flusher(self):
+        while True:
+            with self._cond:
+                while self._file is not None and not self._buffer:
+                    self._cond.wait()
+                # Agrupa os registros que chegarem no intervalo em um único fsync
+                deadline = time.monotonic() + self.sync_interval
+                while self._file is not None and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                if self._file is None:
+                    return
+            self.sync()
+
+    def sync(self):
+        with self._io_lock:
+            with self._cond:
+                if self._file is None or not self._buffer:
+                    return
+                data = bytes(self._buffer)
+                self._buffer.clear()
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+
+    def close(self):
+        """Grava o que falta; o arquivo é removido se não sobrou edição pendente."""
+        if self._file is None:
+            return
+        self.sync()
+        with self._io_lock, self._cond:
+            clean = self.state.is_clean()
+            self._file.close()
+            self._file = None
+            self._image = None
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if clean and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,206 @@
+class AnnotationLayer:
+    """Camada retida das anotações no canvas.
+
+    Mantém o mapa id da anotação -> itens do canvas (retângulo, fundo e texto do
+    rótulo) e, a cada sync, só cria, altera ou remove os itens que mudaram. sync
+    percorre todas as anotações e fica para troca de imagem e operações de
+    classe; edições do usuário usam add_one, update_one e remove_one.
+    Mudanças de zoom reescalam os itens existentes em vez de recriá-los. A caixa
+    selecionada ganha alças nos cantos para redimensionamento.
+    """
+
+    handle_size = 4
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.zoom = 1.0
+        self._items = {}
+        self.selected = None
+        # Itens do canvas tocados na última operação e no total
+        self.last_touched = 0
+        self.total_touched = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _count(self, touched):
+        self.last_touched = touched
+        self.total_touched += touched
+
+    def clear(self):
+        touched = 0
+        for _, rect, label_bg, label in self._items.values():
+            self.canvas.delete(rect, label_bg, label)
+            touched += 3
+        self._items = {}
+        self.canvas.delete("handle")
+        self._count(touched)
+
+    def select(self, annotation_id):
+        # Caixa selecionada com borda mais grossa e acima das demais
+        touched = 0
+        previous = self._items.get(self.selected)
+        if previous is not None:
+            self.canvas.itemconfig(previous[1], width=2)
+            touched += 1
+        self.selected = annotation_id
+        entry = self._items.get(annotation_id)
+        if entry is not None:
+            self.canvas.itemconfig(entry[1], width=4)
+            self.canvas.tag_raise(entry[1])
+            touched += 1
+        touched += self._draw_handles()
+        self._count(touched)
+
+    def item_for(self, annotation_id):
+        entry = self._items.get(annotation_id)
+        return entry[1] if entry else None
+
+    def handle_at(self, x, y):
+        """Canto da caixa selecionada sob (x, y) em coordenadas do canvas, ou None."""
+        entry = self._items.get(self.selected)
+        if entry is None:
+            return None
+        reach = self.handle_size + 2
+        for corner, (hx, hy) in self._handle_points(entry[0][2]).items():
+            if abs(x - hx) <= reach and abs(y - hy) <= reach:
+                return corner
+        return None
+
+    def _state(self, store, index, colors):
+        name = store.classes[int(store.class_ids[index])]
+        return name, colors.get(name, "#FF0000"), tuple(store.boxes[index].tolist())
+
+    def add_one(self, store, index, colors):
+        # Caixa nova desenhada pelo usuário, sem percorrer as demais
+        annotation_id = int(store.ids[index])
+        if annotation_id in self._items:
+            self.update_one(store, index, colors)
+            return
+        state = self._state(store, index, colors)
+        self._items[annotation_id] = (state, *self._create(annotation_id, state))
+        touched = 3
+        if annotation_id == self.selected:
+            self.canvas.itemconfig(self._items[annotation_id][1], width=4)
+            touched += 1 + self._draw_handles()
+        self._count(touched)
+
+    def remove_one(self, annotation_id):
+        entry = self._items.pop(annotation_id, None)
+        if entry is None:
+            self._count(0)
+            return
+        self.canvas.delete(*entry[1:])
+        touched = 3
+        if annotation_id == self.selected:
+            self.selected = None
+            self.canvas.delete("handle")
+        self._count(touched)
+
+    def update_one(self, store, index, colors):
+        # Atualização de uma única caixa (arrasto), sem percorrer as demais
+        annotation_id = int(store.ids[index])
+        entry = self._items.get(annotation_id)
+        if entry is None:
+            return
+        state = self._state(store, index, colors)
+        touched = self._update(entry, state)
+        self._items[annotation_id] = (state, *entry[1:])
+        if annotation_id == self.selected:
+            touched += self._draw_handles()
+        self._count(touched)
+
+    def _handle_points(self, box):
+        x1, y1, x2, y2 = (value * self.zoom for value in box)
+        return {"nw": (x1, y1), "ne": (x2, y1), "sw": (x1, y2), "se": (x2, y2)}
+
+    def _draw_handles(self):
+        self.canvas.delete("handle")
+        entry = self._items.get(self.selected)
+        if entry is None:
+            return 0
+        size = self.handle_size
+        color = entry[0][1]
+        for hx, hy in self._handle_points(entry[0][2]).values():
+            self.canvas.create_rectangle(hx - size, hy - size, hx + size, hy + size,
+                                         fill="white", outline=color, tags="handle")
+        return 4
+
+    def sync(self, store, colors, zoom):
+        touched = self.rescale(zoom) if zoom != self.zoom else 0
+
+        names = store.classes
+        current = {}
+        for annotation_id, class_id, box in zip(store.ids.tolist(), store.class_ids.tolist(), store.boxes.tolist()):
+            name = names[class_id]
+            current[annotation_id] = (name, colors.get(name, "#FF0000"), tuple(box))
+
+        for annotation_id in [i for i in self._items if i not in current]:
+            _, rect, label_bg, label = self._items.pop(annotation_id)
+            self.canvas.delete(rect, label_bg, label)
+            touched += 3
+
+        for annotation_id, state in current.items():
+            entry = self._items.get(annotation_id)
+            if entry is None:
+                self._items[annotation_id] = (state, *self._create(annotation_id, state))
+                if annotation_id == self.selected:
+                    self.canvas.itemconfig(self._items[annotation_id][1], width=4)
+                touched += 3
+            elif entry[0] != state:
+                touched += self._update(entry, state)
+                self._items[annotation_id] = (state, *entry[1:])
+
+        if self.selected is not None:
+            touched += self._draw_handles()
+        self._count(touched)
+
+    def rescale(self, zoom):
+        # Caixas escalam direto; os rótulos mantêm tamanho e só acompanham o canto
+        factor = zoom / self.zoom
+        self.zoom = zoom
+        if not self._items:
+            return 0
+        self.canvas.scale("bbox", 0, 0, factor, factor)
+        for (name, _, box), _, label_bg, label in self._items.values():
+            self._place_label(label_bg, label, name, box)
+        return 1 + 2 * len(self._items)
+
+    def _label_coords(self, name, box):
+        x1, y1 = box[0] * self.zoom, box[1] * self.zoom
+        return (x1, y1 - 20, x1 + len(name) * 7, y1), (x1 + 5, y1 - 10)
+
+    def _place_label(self, label_bg, label, name, box):
+        bg_coords, text_coords = self._label_coords(name, box)
+        self.canvas.coords(label_bg, *bg_coords)
+        self.canvas.coords(label, *text_coords)
+
+    def _create(self, annotation_id, state):
+        name, color, box = state
+        x1, y1, x2, y2 = (value * self.zoom for value in box)
+        rect = self.canvas.create_rectangle(x1, y1, x2, y2, outline=color, width=2,
+                                            tags=("bbox", f"bbox_{annotation_id}"))
+        bg_coords, text_coords = self._label_coords(name, box)
+        label_bg = self.canvas.create_rectangle(*bg_coords, fill=color, tags=("label", f"label_{annotation_id}"))
+        label = self.canvas.create_text(*text_coords, anchor="w", text=name, fill="white",
+                                        tags=("label", f"label_{annotation_id}"))
+        return rect, label_bg, label
+
+    def _update(self, entry, state):
+        (old_name, old_color, old_box), rect, label_bg, label = entry
+        name, color, box = state
+        touched = 0
+        if box != old_box:
+            self.canvas.coords(rect, *(value * self.zoom for value in box))
+            touched += 1
+        if color != old_color:
+            self.canvas.itemconfig(rect, outline=color)
+            self.canvas.itemconfig(label_bg, fill=color)
+            touched += 2
+        if name != old_name:
+            self.canvas.itemconfig(label, text=name)
+            touched += 1
+        if box != old_box or name != old_name:
+            self._place_label(label_bg, label, name, box)
+            touched += 2
+        return touched
@@ -0,0 +1,157 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter import font as tkfont
+
+
+class VirtualList(ttk.Frame):
+    """Lista virtualizada: o Listbox só contém as linhas visíveis.
+
+    As linhas vêm de count_fn() e format_fn(index), lidas diretamente do
+    armazenamento de anotações, e só as visíveis são formatadas. Inserções e
+    remoções custam no máximo uma linha de tela redesenhada.
+    """
+
+    def __init__(self, master, count_fn, format_fn, on_select=None, **listbox_options):
+        super().__init__(master)
+        self.count_fn = count_fn
+        self.format_fn = format_fn
+        self.on_select = on_select
+        self.offset = 0
+        self.selected = None
+        self.count = 0
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self, exportselection=False, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._update_linespace()
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<Configure>", lambda e: self.refresh())
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        # Um tema novo pode trocar a fonte padrão do Listbox
+        self.listbox.bind("<<ThemeChanged>>", lambda e: self.set_font(self.listbox.cget("font")))
+
+    def _update_linespace(self):
+        # Medido só quando a fonte muda; visible_rows roda a cada inserção e rolagem
+        self.linespace = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+    def set_font(self, font):
+        self.listbox.configure(font=font)
+        self._update_linespace()
+        self.refresh()
+
+    def visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self.linespace)
+
+    def reset(self):
+        # Nova fonte de dados (outra imagem): volta ao topo sem seleção
+        self.offset = 0
+        self.selected = None
+        self.refresh()
+
+    def refresh(self):
+        self.count = self.count_fn()
+        rows = self.visible_rows()
+        self.offset = max(0, min(self.offset, self.count - rows))
+        end = min(self.count, self.offset + rows)
+
+        self.listbox.delete(0, tk.END)
+        for index in range(self.offset, end):
+            self.listbox.insert(tk.END, self.format_fn(index))
+        self._show_selection()
+        self._update_scrollbar()
+
+    def on_append(self):
+        self.count += 1
+        index = self.count - 1
+        if self.offset <= index < self.offset + self.visible_rows():
+            self.listbox.insert(tk.END, self.format_fn(index))
+        self._update_scrollbar()
+
+    def on_remove(self, index):
+        if self.selected is not None:
+            if self.selected == index:
+                self.selected = None
+            elif self.selected > index:
+                self.selected -= 1
+        if index >= self.offset + self.visible_rows():
+            # Linha fora da tela: só a barra de rolagem muda
+            self.count -= 1
+            self._update_scrollbar()
+        else:
+            self.refresh()
+
+    def on_change(self, index):
+        # Só redesenha a linha alterada, se estiver na tela
+        if self.offset <= index < self.offset + self.listbox.size():
+            row = index - self.offset
+            self.listbox.delete(row)
+            self.listbox.insert(row, self.format_fn(index))
+            self._show_selection()
+
+    def curselection(self):
+        return (self.selected,) if self.selected is not None else ()
+
+    def select(self, index):
+        self.selected = index
+        if index is not None:
+            self.see(index)
+        self._show_selection()
+
+    def see(self, index):
+        rows = self.visible_rows()
+        if index < self.offset:
+            self.offset = index
+            self.refresh()
+        elif index >= self.offset + rows:
+            self.offset = index - rows + 1
+            self.refresh()
+
+    def scroll_rows(self, delta):
+        self.offset += delta
+        self.refresh()
+        return "break"
+
+    def on_scroll(self, action, value, unit=None):
+        rows = self.visible_rows()
+        if action == "moveto":
+            self.offset = int(float(value) * self.count)
+        elif unit == "pages":
+            self.offset += int(value) * rows
+        else:
+            self.offset += int(value)
+        self.refresh()
+
+    def _update_scrollbar(self):
+        if not self.count:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        rows = self.visible_rows()
+        self.scrollbar.set(self.offset / self.count, min(1.0, (self.offset + rows) / self.count))
+
+    def _show_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected is not None and self.offset <= self.selected < self.offset + self.listbox.size():
+            self.listbox.selection_set(self.selected - self.offset)
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        self.selected = self.offset + selection[0]
+        if self.on_select:
+            self.on_select(self.selected)
+
+    def _move_selection(self, delta):
+        if not self.count:
+            return "break"
+        index = 0 if self.selected is None else max(0, min(self.count - 1, self.selected + delta))
+        self.select(index)
+        if self.on_select:
+            self.on_select(index)
+        return "break"
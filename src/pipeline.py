@@ -0,0 +1,186 @@
+import time
+import queue
+import threading
+
+_END = object()
+
+
+class _Failed:
+    # Item que falhou em algum estágio; atravessa os seguintes sem ser processado
+    def __init__(self, error):
+        self.error = error
+
+
+class StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, depth):
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def summary(self, wall):
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'busy_seconds': self.busy,
+            # Fração do tempo em que os workers do estágio estavam trabalhando
+            'utilization': self.busy / (wall * self.workers) if wall > 0 else 0.0,
+            # Profundidade da fila de entrada vista a cada item retirado
+            'queue_depth_avg': self.depth_total / self.depth_samples if self.depth_samples else 0.0,
+            'queue_depth_max': self.depth_max,
+        }
+
+
+class Pipeline:
+    """Estágios em threads ligados por filas limitadas.
+
+    Cada estágio tem seus workers e lê de uma fila de tamanho queue_size; quando
+    um estágio atrasa, as filas anteriores enchem e seguram os produtores. run()
+    devolve (item, resultado, erro) na ordem de entrada.
+    """
+
+    def __init__(self, queue_size=4):
+        self.queue_size = queue_size
+        self.stages = []
+        self._stats = []
+        self._cancel = threading.Event()
+        self._started = None
+        self._finished = None
+
+    def add_stage(self, name, fn, workers=1):
+        self.stages.append((name, fn, max(1, workers)))
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self, items, should_stop=None):
+        self._cancel.clear()
+        self._stats = [StageStats(name, workers) for name, _, workers in self.stages]
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._started = time.perf_counter()
+        self._finished = None
+        inputs = {}
+
+        def feed():
+            for seq, item in enumerate(items):
+                if should_stop is not None and should_stop():
+                    # Parada pedida: o que já está nas filas é descartado
+                    self._cancel.set()
+                if self._cancel.is_set():
+                    break
+                inputs[seq] = item
+                queues[0].put((seq, item))
+            for _ in range(self.stages[0][2]):
+                queues[0].put(_END)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, (name, fn, workers) in enumerate(self.stages):
+            remaining = [workers]
+            lock = threading.Lock()
+            next_workers = self.stages[index + 1][2] if index + 1 < len(self.stages) else 1
+            for _ in range(workers):
+                threads.append(threading.Thread(
+                    target=self._worker, daemon=True,
+                    args=(fn, queues[index], queues[index + 1], self._stats[index], remaining, lock, next_workers)))
+        for thread in threads:
+            thread.start()
+
+        # Reordena pelo número de sequência: estágios com vários workers terminam fora de ordem
+        pending = {}
+        next_seq = 0
+        done = False
+        try:
+            while True:
+                entry = queues[-1].get()
+                if entry is _END:
+                    done = True
+                    break
+                seq, value = entry
+                pending[seq] = value
+                while next_seq in pending:
+                    value = pending.pop(next_seq)
+                    item = inputs.pop(next_seq)
+                    next_seq += 1
+                    if isinstance(value, _Failed):
+                        yield item, None, value.error
+                    else:
+                        yield item, value, None
+        finally:
+            if not done:
+                # Consumidor encerrado antes do fim: os estágios descartam o resto
+                self._cancel.set()
+                while queues[-1].get() is not _END:
+                    pass
+            self._finished = time.perf_counter()
+
+    def _worker(self, fn, source, target, stats, remaining, lock, next_workers):
+        while True:
+            depth = source.qsize()
+            entry = source.get()
+            if entry is _END:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    # O último worker a terminar avisa o próximo estágio
+                    for _ in range(next_workers):
+                        target.put(_END)
+                return
+            if self._cancel.is_set():
+                continue
+            seq, value = entry
+            if not isinstance(value, _Failed):
+                start = time.perf_counter()
+                try:
+                    value = fn(value)
+                except Exception as e:
+                    value = _Failed(e)
+                stats.record(time.perf_counter() - start, depth)
+            target.put((seq, value))
+
+    def stats(self):
+        end = self._finished or time.perf_counter()
+        wall = end - self._started if self._started else 0.0
+        return {'seconds': wall, 'stages': {s.name: s.summary(wall) for s in self._stats}}
+
+
+def merge_stats(total, stats):
+    """Soma as estatísticas de duas execuções, como se fossem uma só.
+
+    Usado por quem roda o pipeline em blocos (a linha de comando); total=None
+    começa a soma.
+    """
+    if total is None:
+        return stats
+    seconds = total['seconds'] + stats['seconds']
+    stages = {}
+    for name, stage in stats['stages'].items():
+        previous = total['stages'].get(name)
+        if previous is None:
+            stages[name] = stage
+            continue
+        items = previous['items'] + stage['items']
+        busy = previous['busy_seconds'] + stage['busy_seconds']
+        depth_total = (previous['queue_depth_avg'] * previous['items'] + stage['queue_depth_avg'] * stage['items'])
+        stages[name] = {
+            'workers': stage['workers'],
+            'items': items,
+            'busy_seconds': busy,
+            'utilization': busy / (seconds * stage['workers']) if seconds > 0 else 0.0,
+            'queue_depth_avg': depth_total / items if items else 0.0,
+            'queue_depth_max': max(previous['queue_depth_max'], stage['queue_depth_max']),
+        }
+    return {'seconds': seconds, 'stages': stages}
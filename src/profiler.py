@@ -0,0 +1,142 @@
+"""Perfil de latência da interface, ativado só sob demanda.
+
+Com YOLO_LABEL_PROFILE=1 (ou python main.py --profile) os métodos de MainUI e
+as chamadas de I/O do core são trocados, na classe, por versões cronometradas;
+sem isso nada é alterado e o custo é zero. Um heartbeat no loop do Tk detecta
+travamentos acima de stall_ms. O relatório da sessão sai em JSON ou CSV.
+"""
+import os
+import csv
+import json
+import time
+import functools
+from collections import deque
+import numpy as np
+
+PROFILE_ENV = "YOLO_LABEL_PROFILE"
+DEFAULT_REPORT = "label_profile.json"
+
+# Chamadas do core que fazem I/O ou decodificação
+CORE_CALLS = ("open_folder", "load_image", "get_image", "load_annotations", "save_annotations",
+              "autosave", "finish_class_operation", "update_dataset_index", "prefetch_neighbors")
+
+active = None
+
+
+class LatencyStats:
+    """Durações (ms) de uma função; percentis sobre as últimas window chamadas."""
+
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def summary(self):
+        p50, p95, p99 = np.percentile(np.fromiter(self.samples, np.float64), (50, 95, 99)).tolist()
+        return {'count': self.count, 'mean_ms': self.total / self.count, 'p50_ms': p50,
+                'p95_ms': p95, 'p99_ms': p99, 'max_ms': self.max}
+
+
+class Profiler:
+    def __init__(self, window=1000, stall_ms=100, heartbeat_ms=50):
+        self.window = window
+        self.stall_ms = stall_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.stats = {}
+        self.stalls = []
+        self.started = time.time()
+        self._widget = None
+        self._expected = None
+
+    def record(self, name, ms):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = LatencyStats(self.window)
+        stats.add(ms)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+        timed.__profiled__ = True
+        return timed
+
+    def instrument_class(self, cls, names=None):
+        """Troca os métodos da classe por versões cronometradas (antes de criar instâncias,
+        pois bind/command guardam o método no momento da criação)."""
+        if names is None:
+            names = [name for name, value in vars(cls).items()
+                     if callable(value) and not name.startswith("_")]
+        for name in names:
+            func = getattr(cls, name, None)
+            if func is None or getattr(func, "__profiled__", False):
+                continue
+            setattr(cls, name, self.wrap(f"{cls.__name__}.{name}", func))
+
+    def start_heartbeat(self, widget):
+        # Um after() periódico que chega atrasado indica o loop de eventos travado
+        self._widget = widget
+        self._expected = time.perf_counter() + self.heartbeat_ms / 1000
+        widget.after(self.heartbeat_ms, self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        late_ms = (now - self._expected) * 1000
+        if late_ms > self.stall_ms:
+            self.stalls.append({'at': time.time(), 'ms': late_ms})
+        self._expected = now + self.heartbeat_ms / 1000
+        try:
+            self._widget.after(self.heartbeat_ms, self._beat)
+        except Exception:
+            # Janela destruída: fim da sessão
+            self._widget = None
+
+    def report(self):
+        calls = {name: stats.summary() for name, stats in self.stats.items()}
+        return {'started': self.started, 'seconds': time.time() - self.started,
+                'stall_threshold_ms': self.stall_ms, 'stalls': self.stalls,
+                'calls': dict(sorted(calls.items(), key=lambda item: -item[1]['p95_ms']))}
+
+    def export(self, path):
+        report = self.report()
+        if path.lower().endswith(".csv"):
+            fields = ['count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['name'] + fields)
+                for name, summary in report['calls'].items():
+                    writer.writerow([name] + [round(summary[field], 3) if field != 'count' else summary[field]
+                                              for field in fields])
+                writer.writerow(['stalls', len(report['stalls'])] + [''] * (len(fields) - 1))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return path
+
+
+def requested():
+    """Caminho do relatório se o perfil foi pedido por variável de ambiente, senão None."""
+    value = os.environ.get(PROFILE_ENV, "")
+    if value in ("", "0"):
+        return None
+    return value if value.lower().endswith((".json", ".csv")) else DEFAULT_REPORT
+
+
+def enable(ui_class, core_class, **options):
+    global active
+    if active is None:
+        active = Profiler(**options)
+        active.instrument_class(ui_class)
+        active.instrument_class(core_class, CORE_CALLS)
+    return active
@@ -0,0 +1,244 @@
+"""Cache em disco (SQLite) dos resultados de inferência por imagem.
+
+A chave combina o hash dos pesos do modelo, as configurações da inferência e
+a imagem (caminho + mtime + tamanho): trocar o modelo ou editar a imagem
+invalida a entrada. Cada resultado é gravado assim que sai do modelo, então
+uma execução interrompida recomeça de onde parou. Quando o arquivo passa de
+max_bytes as entradas usadas há mais tempo são removidas.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from .inference import Detections
+
+# Muda quando o formato do resultado muda; invalida o cache inteiro
+RESULT_FORMAT = 1
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    meter INTEGER NOT NULL,
+    display INTEGER NOT NULL,
+    digits TEXT,
+    confidence REAL NOT NULL,
+    class_ids BLOB NOT NULL,
+    confidences BLOB NOT NULL,
+    boxes BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+# Limite de parâmetros por consulta nas versões antigas do SQLite
+_CHUNK = 900
+
+
+def default_cache_path():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "yolo_label_tool", "results.sqlite")
+
+
+def model_fingerprint(model_path, chunk_size=1024 * 1024):
+    """Hash do conteúdo dos pesos: o mesmo arquivo com outro nome reaproveita o cache."""
+    digest = hashlib.sha1()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def image_key(path):
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+
+
+class ResultCache:
+    """Resultados já calculados para um modelo e um conjunto de configurações.
+
+    Seguro entre threads: run_cached() consulta e grava a partir da thread de
+    inferência enquanto a interface lê stats().
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, flush_every=64):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.namespace = None
+        self.class_names = []
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self.entries, self.total_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+
+    def set_model(self, model_hash, class_names, settings=None):
+        """Escolhe o modelo (hash dos pesos) e as configurações que entram na chave."""
+        text = json.dumps({'model': model_hash, 'format': RESULT_FORMAT, 'settings': settings or {}},
+                          sort_keys=True)
+        with self._lock:
+            self._flush()
+            self.namespace = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            self.class_names = class_names
+
+    def key_for(self, path):
+        try:
+            return hashlib.sha1(f"{self.namespace}|{image_key(path)}".encode("utf-8")).hexdigest()
+        except OSError:
+            return None
+
+    def lookup(self, keys):
+        """{posição em keys: resultado} para as chaves já no cache."""
+        found = {}
+        positions = {}
+        for position, key in enumerate(keys):
+            if key is not None:
+                positions.setdefault(key, []).append(position)
+        unique = list(positions)
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), _CHUNK):
+                chunk = unique[start:start + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, meter, display, digits, confidence, class_ids, confidences, boxes "
+                    f"FROM results WHERE key IN ({marks})", chunk).fetchall()
+                for row in rows:
+                    for position in positions[row[0]]:
+                        found[position] = row[1:]
+                # Entradas lidas passam para o fim da fila de remoção
+                self._db.execute(f"UPDATE results SET accessed = ? WHERE key IN ({marks})", [now] + chunk)
+            self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def decode(self, img_path, row):
+        meter, display, digits, confidence, class_ids, confidences, boxes = row
+        detections = Detections(np.frombuffer(class_ids, np.int32), np.frombuffer(confidences, np.float32),
+                                np.frombuffer(boxes, np.float32).reshape(-1, 4), self.class_names)
+        return {
+            'image_path': img_path,
+            'detections': detections,
+            'meter_detected': bool(meter),
+            'display_detected': bool(display),
+            'digits': digits,
+            'digits_confidence': confidence
+        }
+
+    def put(self, key, result):
+        if key is None:
+            return
+        detections = result['detections']
+        blobs = (np.ascontiguousarray(detections.class_ids, np.int32).tobytes(),
+                 np.ascontiguousarray(detections.confidences, np.float32).tobytes(),
+                 np.ascontiguousarray(detections.boxes, np.float32).tobytes())
+        # Tamanho aproximado da linha: chave, blobs e colunas fixas
+        size = len(key) + sum(len(blob) for blob in blobs) + len(result['digits'] or "") + 32
+        with self._lock:
+            self._pending.append((key, int(result['meter_detected']), int(result['display_detected']),
+                                  result['digits'], float(result['digits_confidence']), *blobs, size, time.time()))
+            if len(self._pending) >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        # Chamado com self._lock adquirido; um commit por lote de resultados
+        if not self._pending:
+            return
+        keys = [row[0] for row in self._pending]
+        replaced_count, replaced_bytes = 0, 0
+        for start in range(0, len(keys), _CHUNK):
+            chunk = keys[start:start + _CHUNK]
+            count, size = self._db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk).fetchone()
+            replaced_count += count
+            replaced_bytes += size
+        self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._pending)
+        self.entries += len(set(keys)) - replaced_count
+        self.total_bytes += sum(row[8] for row in self._pending) - replaced_bytes
+        self._pending = []
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        # Remove as menos usadas até ficar em 90% do limite, para não remover a cada lote
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+        removed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            removed.append((key,))
+            self.total_bytes -= size
+        self._db.executemany("DELETE FROM results WHERE key = ?", removed)
+        self.entries -= len(removed)
+        self.evicted += len(removed)
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+            self._db.execute("VACUUM")
+            self.entries, self.total_bytes = 0, 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': self.entries, 'bytes': self.total_bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evicted': self.evicted,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._db.close()
+
+
+def run_cached(cache, image_paths, run, should_stop=None):
+    """Roda run() só nas imagens fora do cache e junta tudo na ordem original.
+
+    run(paths, should_stop) é um gerador de (índice, resultado, erro) como
+    BatchInference.run. Devolve (índice, resultado, erro, veio_do_cache); cada
+    resultado novo vai para o cache assim que chega.
+    """
+    keys = [cache.key_for(path) for path in image_paths]
+    cached = cache.lookup(keys)
+    missing = [index for index in range(len(image_paths)) if index not in cached]
+    next_index = 0
+
+    def cached_until(stop):
+        nonlocal next_index
+        while next_index < stop:
+            if next_index in cached:
+                yield next_index, cache.decode(image_paths[next_index], cached[next_index]), None, True
+            next_index += 1
+
+    try:
+        if missing:
+            for position, result, error in run([image_paths[index] for index in missing], should_stop):
+                index = missing[position]
+                yield from cached_until(index)
+                if error is None:
+                    cache.put(keys[index], result)
+                yield index, result, error, False
+                next_index = index + 1
+        if should_stop is None or not should_stop():
+            yield from cached_until(len(image_paths))
+    finally:
+        # Interrompido ou não, o que já foi calculado fica salvo para retomar
+        cache.flush()
@@ -0,0 +1,159 @@
+import os
+import threading
+from array import array
+from itertools import groupby
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def iter_files(root, extensions, recursive=False, errors=None):
+    """Percorre a pasta com os.scandir e gera (pasta_relativa, DirEntry) à medida que encontra.
+
+    Pastas que não podem ser listadas são puladas; se errors for uma lista,
+    recebe (pasta, erro) de cada uma.
+    """
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+        except OSError as e:
+            if errors is not None:
+                errors.append((rel_dir or root, e))
+            continue
+        subdirs = []
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Pastas ocultas (índices, miniaturas) são ignoradas
+                        if recursive and not entry.name.startswith('.'):
+                            subdirs.append(os.path.join(rel_dir, entry.name) if rel_dir else entry.name)
+                    elif entry.name.lower().endswith(extensions):
+                        yield rel_dir, entry
+                except OSError:
+                    continue
+        # Mantém a ordem de descoberta das subpastas
+        stack.extend(reversed(subdirs))
+
+
+def iter_label_files(root, recursive=True, image_extensions=IMAGE_EXTENSIONS, errors=None):
+    """Gera (pasta_relativa, DirEntry) dos .txt que são rótulos de uma imagem da mesma pasta.
+
+    Como no core, o rótulo de foto.jpg é foto.txt; classes.txt, notas e outros
+    .txt sem imagem correspondente ficam de fora.
+    """
+    extensions = tuple(image_extensions) + (".txt",)
+    # iter_files entrega as entradas de cada pasta em sequência
+    for rel_dir, entries in groupby(iter_files(root, extensions, recursive, errors), key=lambda item: item[0]):
+        stems = set()
+        labels = []
+        for _, entry in entries:
+            stem, extension = os.path.splitext(entry.name)
+            if extension.lower() == ".txt":
+                labels.append(entry)
+            else:
+                stems.add(stem)
+        for entry in labels:
+            if os.path.splitext(entry.name)[0] in stems:
+                yield rel_dir, entry
+
+
+class ImageList:
+    """Lista compacta de caminhos relativos de imagens.
+
+    Os prefixos de pasta são internados e os nomes ficam em um único bloco de
+    bytes indexado por offsets, em vez de uma string Python por imagem.
+    """
+
+    def __init__(self):
+        self._dirs = []
+        self._dir_ids = {}
+        self._dir_index = array('I')
+        self._offsets = array('Q', [0])
+        self._blob = bytearray()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        with self._lock:
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("índice de imagem fora do intervalo")
+            start, end = self._offsets[index], self._offsets[index + 1]
+            name = self._blob[start:end].decode('utf-8', 'surrogateescape')
+            rel_dir = self._dirs[self._dir_index[index]]
+        return os.path.join(rel_dir, name) if rel_dir else name
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, rel_dir, name):
+        with self._lock:
+            dir_id = self._dir_ids.get(rel_dir)
+            if dir_id is None:
+                dir_id = self._dir_ids[rel_dir] = len(self._dirs)
+                self._dirs.append(rel_dir)
+            self._blob.extend(name.encode('utf-8', 'surrogateescape'))
+            self._dir_index.append(dir_id)
+            # O offset é o último a entrar, então len() só vê entradas completas
+            self._offsets.append(len(self._blob))
+
+    def nbytes(self):
+        return (len(self._blob) + self._dir_index.itemsize * len(self._dir_index)
+                + self._offsets.itemsize * len(self._offsets))
+
+
+class FolderScanner:
+    """Enumera as imagens de uma pasta em uma thread de fundo, preenchendo um ImageList.
+
+    Pastas que não puderam ser listadas ficam em pop_errors().
+    """
+
+    def __init__(self, root, image_list, recursive=False, extensions=IMAGE_EXTENSIONS):
+        self.root = root
+        self.image_list = image_list
+        self.recursive = recursive
+        self.extensions = extensions
+        self.first_found = threading.Event()
+        self.done = threading.Event()
+        self._cancelled = False
+        self._errors = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled = True
+
+    def wait_first(self, timeout=None):
+        # Retorna assim que a primeira imagem aparece (ou a listagem termina)
+        self.first_found.wait(timeout)
+        return len(self.image_list) > 0
+
+    def is_scanning(self):
+        return not self.done.is_set()
+
+    def pop_errors(self):
+        # A lista é a mesma que a thread de listagem preenche: copia e corta
+        # no lugar, sem trocar a referência
+        errors = self._errors[:]
+        del self._errors[:len(errors)]
+        return errors
+
+    def _run(self):
+        try:
+            for rel_dir, entry in iter_files(self.root, self.extensions, self.recursive, self._errors):
+                if self._cancelled:
+                    break
+                self.image_list.append(rel_dir, entry.name)
+                if not self.first_found.is_set():
+                    self.first_found.set()
+        finally:
+            self.done.set()
+            self.first_found.set()
@@ -0,0 +1,49 @@
+class InputScheduler:
+    """Agrupa eventos de entrada e aplica só o estado mais recente a cada quadro.
+
+    Cada chave (movimento, arrasto, pan, zoom) guarda apenas o último evento
+    recebido, ou o resultado de merge(anterior, novo) quando o valor acumula,
+    como os fatores de zoom da roda do mouse. Os pendentes são despachados por
+    um único after() por quadro.
+    """
+
+    def __init__(self, widget, fps=60):
+        self.widget = widget
+        self.interval_ms = max(1, int(1000 / fps))
+        self._pending = {}
+        self._job = None
+        self.received = 0
+        self.merged = 0
+        self.dispatched = 0
+
+    def post(self, key, handler, value, merge=None):
+        self.received += 1
+        previous = self._pending.get(key)
+        if previous is not None:
+            self.merged += 1
+            if merge is not None:
+                value = merge(previous[1], value)
+        self._pending[key] = (handler, value)
+        if self._job is None:
+            self._job = self.widget.after(self.interval_ms, self.flush)
+
+    def flush(self):
+        # Também chamado diretamente antes de eventos que dependem do estado
+        # mais recente (soltar o botão, fim do pan)
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        pending, self._pending = self._pending, {}
+        for handler, value in pending.values():
+            handler(value)
+            self.dispatched += 1
+
+    def cancel(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self._pending = {}
+
+    def stats(self):
+        return {'received': self.received, 'merged': self.merged, 'dispatched': self.dispatched,
+                'merge_rate': self.merged / self.received if self.received else 0.0}
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+
+class GridIndex:
+    """Índice espacial em grade uniforme para as caixas de anotação.
+
+    Cada caixa é registrada nas células que cobre; caixas muito grandes (que
+    cobririam mais de max_cells células) ficam numa lista à parte, verificada
+    diretamente. Consultas por ponto só olham uma célula.
+    """
+
+    def __init__(self, cell_size=64, max_cells=64):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells = defaultdict(set)
+        self._large = set()
+        self._boxes = {}
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, box_id):
+        return box_id in self._boxes
+
+    def clear(self):
+        self._cells.clear()
+        self._large.clear()
+        self._boxes.clear()
+
+    def build(self, ids, boxes, cell_size=None):
+        self.clear()
+        if cell_size:
+            self.cell_size = cell_size
+        for box_id, box in zip(ids, boxes):
+            self.insert(box_id, box)
+
+    def _cell_range(self, box):
+        size = self.cell_size
+        x1, y1, x2, y2 = box
+        return (int(min(x1, x2) // size), int(min(y1, y2) // size),
+                int(max(x1, x2) // size), int(max(y1, y2) // size))
+
+    def insert(self, box_id, box):
+        box = tuple(box)
+        self._boxes[box_id] = box
+        cx1, cy1, cx2, cy2 = self._cell_range(box)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > self.max_cells:
+            self._large.add(box_id)
+            return
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                self._cells[(cx, cy)].add(box_id)
+
+    def remove(self, box_id):
+        box = self._boxes.pop(box_id, None)
+        if box is None:
+            return
+        if box_id in self._large:
+            self._large.discard(box_id)
+            return
+        cx1, cy1, cx2, cy2 = self._cell_range(box)
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(box_id)
+                    if not cell:
+                        del self._cells[(cx, cy)]
+
+    def update(self, box_id, box):
+        self.remove(box_id)
+        self.insert(box_id, box)
+
+    def box(self, box_id):
+        return self._boxes.get(box_id)
+
+    def query_point(self, x, y, tolerance=0.0):
+        """Ids das caixas que contêm (x, y), da menor para a maior área."""
+        size = self.cell_size
+        candidates = set(self._large)
+        # A tolerância pode alcançar células vizinhas
+        for cy in range(int((y - tolerance) // size), int((y + tolerance) // size) + 1):
+            for cx in range(int((x - tolerance) // size), int((x + tolerance) // size) + 1):
+                candidates.update(self._cells.get((cx, cy), ()))
+
+        hits = []
+        for box_id in candidates:
+            x1, y1, x2, y2 = self._boxes[box_id]
+            if (min(x1, x2) - tolerance <= x <= max(x1, x2) + tolerance and
+                    min(y1, y2) - tolerance <= y <= max(y1, y2) + tolerance):
+                hits.append((abs(x2 - x1) * abs(y2 - y1), box_id))
+        hits.sort()
+        return [box_id for _, box_id in hits]
@@ -0,0 +1,125 @@
+import os
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+THUMBNAIL_SIZE = 96
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "yolo_label_tool", "thumbnails")
+
+
+def thumbnail_key(path, stat):
+    # Caminho + mtime + tamanho: qualquer alteração da imagem gera outra miniatura
+    text = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def make_thumbnail(path, out_path, size=THUMBNAIL_SIZE):
+    """Gera a miniatura JPEG de path em out_path; roda nos processos do pool."""
+    try:
+        with Image.open(path) as img:
+            # Em JPEG o draft decodifica já reduzido (1/2, 1/4, 1/8), bem mais rápido
+            img.draft("RGB", (size, size))
+            img = img.convert("RGB")
+            img.thumbnail((size, size), Image.BILINEAR)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            tmp_path = f"{out_path}.{os.getpid()}.tmp"
+            img.save(tmp_path, "JPEG", quality=85)
+        os.replace(tmp_path, out_path)
+        return path, out_path
+    except (OSError, ValueError):
+        return path, None
+
+
+class ThumbnailCache:
+    """Miniaturas em disco, geradas sob demanda por um pool de processos.
+
+    request() recebe, a cada desenho, todos os caminhos visíveis ainda sem
+    miniatura; os que não estão no disco nem no pool são enviados e pedidos
+    fora dessa lista (saíram da tela) são cancelados. Os concluídos são
+    lidos por poll() na thread da interface.
+    """
+
+    def __init__(self, cache_dir=None, size=THUMBNAIL_SIZE, workers=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.size = size
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._executor = None
+        self._pending = {}
+        self._done = deque()
+        self._failed = set()
+        self._lock = threading.Lock()
+        self.generated = 0
+        self.failed = 0
+
+    def path_for(self, path):
+        try:
+            key = thumbnail_key(path, os.stat(path))
+        except OSError:
+            return None
+        return os.path.join(self.cache_dir, key[:2], f"{key}_{self.size}.jpg")
+
+    def cached_path(self, path):
+        out_path = self.path_for(path)
+        return out_path if out_path and os.path.exists(out_path) else None
+
+    def request(self, paths):
+        wanted = set(paths)
+        # Pedidos que saíram da tela e ainda não começaram são descartados
+        for path in [p for p in self._pending if p not in wanted]:
+            if self._pending[path].cancel():
+                del self._pending[path]
+        for path in paths:
+            if path in self._pending or path in self._failed:
+                continue
+            out_path = self.path_for(path)
+            if out_path is None or os.path.exists(out_path):
+                continue
+            if self._executor is None:
+                # spawn: o processo do Tk tem várias threads vivas e um fork herdaria locks presos
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            future = self._executor.submit(make_thumbnail, path, out_path, self.size)
+            future.add_done_callback(lambda f, p=path: self._on_done(p, f))
+            self._pending[path] = future
+
+    def _on_done(self, path, future):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception:
+            result = (path, None)
+        with self._lock:
+            self._done.append(result)
+
+    def poll(self):
+        """Retorna [(caminho, miniatura ou None)] concluídos desde a última chamada."""
+        with self._lock:
+            done, self._done = list(self._done), deque()
+        for path, out_path in done:
+            self._pending.pop(path, None)
+            if out_path is None:
+                # Imagem ilegível: não é pedida de novo a cada desenho
+                self._failed.add(path)
+                self.failed += 1
+            else:
+                self.generated += 1
+        return done
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def shutdown(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
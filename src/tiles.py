@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+
+def half_size(image):
+    # reduce() não aceita paleta, 1 bit nem 16 bits: paleta e 1 bit viram
+    # cores/cinza antes de reduzir (média de índices de paleta não é uma cor);
+    # 16 bits usa BOX, que dá o mesmo resultado sem perder a profundidade
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    elif image.mode == "1":
+        image = image.convert("L")
+    elif image.mode.startswith("I;16"):
+        w, h = image.size
+        return image.resize(((w + 1) // 2, (h + 1) // 2), Image.BOX)
+    return image.reduce(2)
+
+
+class TilePyramid:
+    """Níveis reduzidos pela metade da imagem original, gerados sob demanda."""
+
+    def __init__(self, image, min_size=256):
+        self.image = image
+        self.min_size = min_size
+        self.levels = [image]
+
+    def level_for_zoom(self, zoom):
+        # Nível mais reduzido que ainda tem resolução igual ou maior que a exibida
+        level = 0
+        while zoom <= 0.5 ** (level + 1) and min(self.image.size) * 0.5 ** (level + 1) >= self.min_size:
+            level += 1
+        return level
+
+    def get_level(self, level):
+        while len(self.levels) <= level:
+            self.levels.append(half_size(self.levels[-1]))
+        return self.levels[level]
+
+    def nbytes(self):
+        # O nível 0 é a imagem decodificada do core, contada lá
+        return sum(img.width * img.height * len(img.getbands()) for img in self.levels[1:])
+
+
+class TiledViewport:
+    """Desenha no canvas apenas os blocos da imagem que estão visíveis.
+
+    Os blocos têm tamanho fixo em coordenadas de exibição e ficam em um cache
+    LRU de PhotoImage indexado por (nível, zoom, bloco). Blocos ainda sem versão
+    de alta qualidade entram primeiro como prévia barata (bilinear) e são
+    trocados depois por upgrade().
+    """
+
+    def __init__(self, canvas, tile_size=256, max_tiles=192):
+        self.canvas = canvas
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.pyramid = None
+        self.zoom = 1.0
+        self.resample = Image.LANCZOS
+        self.preview_resample = Image.BILINEAR
+        self._cache = OrderedDict()
+        self._placed = {}
+        self.rendered = 0
+
+    @property
+    def image(self):
+        return self.pyramid.image if self.pyramid else None
+
+    def set_image(self, image):
+        self.clear()
+        self._cache.clear()
+        self.pyramid = TilePyramid(image)
+
+    def set_zoom(self, zoom):
+        # Blocos de outro zoom saem do canvas, mas continuam no cache
+        self.clear()
+        self.zoom = zoom
+
+    def display_size(self):
+        w, h = self.pyramid.image.size
+        return int(w * self.zoom), int(h * self.zoom)
+
+    def clear(self):
+        for item, _, _ in self._placed.values():
+            self.canvas.delete(item)
+        self._placed = {}
+
+    def render(self):
+        if self.pyramid is None:
+            return
+        display_w, display_h = self.display_size()
+        x0 = max(0, int(self.canvas.canvasx(0)))
+        y0 = max(0, int(self.canvas.canvasy(0)))
+        x1 = min(display_w, x0 + self.canvas.winfo_width())
+        y1 = min(display_h, y0 + self.canvas.winfo_height())
+
+        size = self.tile_size
+        visible = set()
+        for ty in range(y0 // size, (max(y1, y0 + 1) - 1) // size + 1):
+            for tx in range(x0 // size, (max(x1, x0 + 1) - 1) // size + 1):
+                if tx * size < display_w and ty * size < display_h:
+                    visible.add((tx, ty))
+
+        # Remove blocos fora da área visível e cria só os que faltam
+        for key in [key for key in self._placed if key not in visible]:
+            item = self._placed.pop(key)[0]
+            self.canvas.delete(item)
+        for key in visible:
+            if key not in self._placed:
+                # Bloco de alta qualidade já em cache, ou uma prévia barata
+                photo = self._get_tile(*key, self.resample, cached_only=True)
+                final = photo is not None
+                if not final:
+                    photo = self._get_tile(*key, self.preview_resample)
+                item = self.canvas.create_image(key[0] * size, key[1] * size, anchor="nw",
+                                                image=photo, tags="tile")
+                self._placed[key] = (item, photo, final)
+        self.canvas.tag_lower("tile")
+
+    def pending_upgrades(self):
+        return sum(1 for _, _, final in self._placed.values() if not final)
+
+    def upgrade(self, max_tiles=4):
+        """Troca até max_tiles prévias visíveis pela versão final; retorna quantas faltam."""
+        pending = [key for key, (_, _, final) in self._placed.items() if not final]
+        for key in pending[:max_tiles]:
+            item = self._placed[key][0]
+            photo = self._get_tile(*key, self.resample)
+            self.canvas.itemconfig(item, image=photo)
+            self._placed[key] = (item, photo, True)
+        return max(0, len(pending) - max_tiles)
+
+    def _get_tile(self, tx, ty, resample, cached_only=False):
+        level = self.pyramid.level_for_zoom(self.zoom)
+        key = (level, round(self.zoom, 6), resample, tx, ty)
+        photo = self._cache.get(key)
+        if photo is not None:
+            self._cache.move_to_end(key)
+            return photo
+        if cached_only:
+            return None
+
+        photo = ImageTk.PhotoImage(self._render_tile(level, tx, ty, resample))
+        self._cache[key] = photo
+        while len(self._cache) > self.max_tiles:
+            self._cache.popitem(last=False)
+        self.rendered += 1
+        return photo
+
+    def _render_tile(self, level, tx, ty, resample):
+        source = self.pyramid.get_level(level)
+        display_w, display_h = self.display_size()
+        # Escala restante entre o nível escolhido e o zoom exibido
+        scale = self.zoom * (2 ** level)
+        x0, y0 = tx * self.tile_size, ty * self.tile_size
+        x1, y1 = min(x0 + self.tile_size, display_w), min(y0 + self.tile_size, display_h)
+        box = (x0 / scale, y0 / scale, min(x1 / scale, source.width), min(y1 / scale, source.height))
+        return source.resize((x1 - x0, y1 - y0), resample, box=box)
+
+    def nbytes(self):
+        photos = {id(photo): photo for photo in self._cache.values()}
+        photos.update((id(photo), photo) for _, photo, _ in self._placed.values())
+        # PhotoImage do Tk guarda 4 bytes por pixel
+        tiles = sum(photo.width() * photo.height() * 4 for photo in photos.values())
+        return tiles + (self.pyramid.nbytes() if self.pyramid else 0)
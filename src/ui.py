@@ -1,10 +1,19 @@
+import operator
+import threading
 import tkinter as tk
 from tkinter import ttk
 from tkinter import colorchooser
 from tkinter import messagebox
-from PIL import Image, ImageTk
+from tkinter import filedialog
 from .core import YOLOAnnotationCore
 from .styles import StyleManager
+from .tiles import TiledViewport
+from .layers import AnnotationLayer
+from .listview import VirtualList
+from .spatial import GridIndex
+from .scheduler import InputScheduler
+from .filmstrip import Filmstrip
+from . import profiler
 
 class WelcomeScreen:
     def __init__(self, master, on_start_callback):
@@ -44,14 +53,25 @@ class MainUI:
         self.core = core
         self.style = StyleManager()
         
+        # Troca das prévias de zoom pela versão final, em etapas canceláveis
+        self.hq_render_job = None
+        self.hq_tiles_per_step = 4
+        
+        # Índice espacial das caixas para seleção e edição com o mouse
+        self.spatial_index = GridIndex()
+        self._spatial_version = None
+        self.edit_action = None
+        
         self.setup_main_window()
         self.create_menu()
         self.create_toolbar()
         self.create_main_panels()
         self.create_status_bar()
+        self.create_filmstrip()
         self.bind_events()
         
         self.update_class_dropdown()
+        self.master.after(self.core.autosave_seconds * 1000, self.autosave)
     
     def setup_main_window(self):
         self.master.title("Advanced YOLO Label Tool")
@@ -68,9 +88,10 @@ class MainUI:
         # Menu Arquivo
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Abrir Pasta", command=self.open_folder, accelerator="Ctrl+O")
+        file_menu.add_checkbutton(label="Incluir Subpastas", variable=self.core.recursive_scan)
         file_menu.add_command(label="Salvar", command=self.save_annotations, accelerator="Ctrl+S")
         file_menu.add_separator()
-        file_menu.add_command(label="Sair", command=self.master.quit, accelerator="Ctrl+Q")
+        file_menu.add_command(label="Sair", command=self.quit, accelerator="Ctrl+Q")
         menubar.add_cascade(label="Arquivo", menu=file_menu)
         
         # Menu Classes
@@ -82,11 +103,20 @@ class MainUI:
         # Menu Visualização
         view_menu = tk.Menu(menubar, tearoff=0)
         view_menu.add_checkbutton(label="Mostrar Labels", variable=self.core.show_labels, command=self.toggle_labels)
+        view_menu.add_checkbutton(label="Mostrar Miniaturas", variable=self.core.show_filmstrip, command=self.toggle_filmstrip)
         view_menu.add_command(label="Zoom In", command=lambda: self.adjust_zoom(1.2), accelerator="Ctrl++")
         view_menu.add_command(label="Zoom Out", command=lambda: self.adjust_zoom(0.8), accelerator="Ctrl+-")
         view_menu.add_command(label="Reset Zoom", command=lambda: self.adjust_zoom(1.0, reset=True), accelerator="Ctrl+0")
+        if profiler.active is not None:
+            view_menu.add_separator()
+            view_menu.add_command(label="Relatório de Latência", command=self.show_latency_report)
         menubar.add_cascade(label="Visualização", menu=view_menu)
         
+        # Menu Dataset
+        dataset_menu = tk.Menu(menubar, tearoff=0)
+        dataset_menu.add_command(label="Estatísticas do Dataset", command=self.show_dataset_stats)
+        menubar.add_cascade(label="Dataset", menu=dataset_menu)
+        
         self.master.config(menu=menubar)
     
     def create_toolbar(self):
@@ -127,13 +157,18 @@ class MainUI:
         self.canvas_frame = ttk.Frame(main_panel)
         self.canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        self.canvas = tk.Canvas(self.canvas_frame, bg="#222222", cursor="tcross")
+        self.canvas = tk.Canvas(self.canvas_frame, bg="#222222", cursor="tcross",
+                                xscrollincrement=1, yscrollincrement=1)
         self.canvas.pack(fill=tk.BOTH, expand=True)
         
+        # Renderização por blocos: só a área visível vira PhotoImage
+        self.viewport = TiledViewport(self.canvas)
+        self.annotation_layer = AnnotationLayer(self.canvas)
+        
         # Scrollbars
-        self.h_scroll = ttk.Scrollbar(self.canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        self.h_scroll = ttk.Scrollbar(self.canvas_frame, orient=tk.HORIZONTAL, command=self.on_xscroll)
         self.h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        self.v_scroll = ttk.Scrollbar(self.canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.v_scroll = ttk.Scrollbar(self.canvas_frame, orient=tk.VERTICAL, command=self.on_yscroll)
         self.v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
         self.canvas.configure(xscrollcommand=self.h_scroll.set, yscrollcommand=self.v_scroll.set)
@@ -146,7 +181,8 @@ class MainUI:
         ttk.Label(side_panel, text="Anotações", style="Title.TLabel").pack(pady=(5, 0))
         
         listbox_style = self.style.get_listbox_style()
-        self.annotation_list = tk.Listbox(side_panel, **listbox_style)
+        self.annotation_list = VirtualList(side_panel, lambda: len(self.core.annotations), self.format_annotation,
+                                           on_select=self.on_annotation_selected, **listbox_style)
         self.annotation_list.pack(fill=tk.BOTH, expand=True, pady=5)
         
         # Botões para gerenciar anotações
@@ -177,23 +213,34 @@ class MainUI:
                                        style="Horizontal.TProgressbar")
         self.progress.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=5, pady=2)
     
+    def create_filmstrip(self):
+        # Faixa de miniaturas acima da barra de status; só as visíveis são desenhadas
+        self.filmstrip = Filmstrip(self.master, self.core.thumbnails, lambda: len(self.core.image_list),
+                                   self.core.get_image_path, on_select=self.go_to_image)
+        if self.core.show_filmstrip.get():
+            self.filmstrip.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+    
     def bind_events(self):
         # Eventos do canvas
         self.canvas.bind("<Button-1>", self.on_click)
-        self.canvas.bind("<B1-Motion>", self.on_drag)
+        # Movimento, arrasto, pan e roda são agrupados e aplicados uma vez por quadro
+        self.input_scheduler = InputScheduler(self.canvas, fps=60)
+        self.canvas.bind("<B1-Motion>", lambda e: self.input_scheduler.post("drag", self.on_drag, e))
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
-        self.canvas.bind("<Motion>", self.on_mouse_move)
+        self.canvas.bind("<Motion>", lambda e: self.input_scheduler.post("motion", self.on_mouse_move, e))
         self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
         self.canvas.bind("<Button-4>", lambda e: self.on_mouse_wheel_scroll(e, 1.2))
         self.canvas.bind("<Button-5>", lambda e: self.on_mouse_wheel_scroll(e, 0.8))
         self.canvas.bind("<Button-3>", self.start_pan)
-        self.canvas.bind("<B3-Motion>", self.on_pan)
+        self.canvas.bind("<B3-Motion>", lambda e: self.input_scheduler.post("pan", self.on_pan, e))
         self.canvas.bind("<ButtonRelease-3>", self.end_pan)
+        self.canvas.bind("<Configure>", lambda e: self.render_viewport())
         
         # Atalhos de teclado
         self.master.bind("<Control-o>", lambda e: self.open_folder())
         self.master.bind("<Control-s>", lambda e: self.save_annotations())
-        self.master.bind("<Control-q>", lambda e: self.master.quit())
+        self.master.bind("<Control-q>", lambda e: self.quit())
+        self.master.protocol("WM_DELETE_WINDOW", self.quit)
         self.master.bind("<Control-n>", lambda e: self.show_add_class_dialog())
         self.master.bind("<Right>", lambda e: self.next_image())
         self.master.bind("<Left>", lambda e: self.prev_image())
@@ -201,6 +248,7 @@ class MainUI:
         self.master.bind("<Control-minus>", lambda e: self.adjust_zoom(0.8))
         self.master.bind("<Control-0>", lambda e: self.adjust_zoom(1.0, reset=True))
         self.master.bind("<Delete>", lambda e: self.delete_selected_annotation())
+        self.master.bind("<Escape>", lambda e: self.select_annotation(None))
     
     def update_display(self):
         if hasattr(self.core, 'img'):
@@ -209,55 +257,115 @@ class MainUI:
             self.update_image_info()
             self.update_progress()
             self.update_status()
+            if self.core.show_filmstrip.get():
+                self.filmstrip.set_current(self.core.image_index)
     
-    def update_image_display(self):
-        self.canvas.delete("all")
-        
-        if not hasattr(self.core, 'img'):
+    def update_image_display(self, settle_ms=0):
+        if self.core.img_size is None:
+            self.viewport.clear()
+            self.annotation_layer.clear()
             return
             
+        # A pirâmide usa a imagem decodificada do core como nível 0, sem cópia
+        img = self.core.get_image()
+        if self.viewport.image is not img:
+            self.viewport.set_image(img)
+        
         # Aplicar zoom
-        w, h = self.core.img.size
+        w, h = self.core.img_size
         new_w, new_h = int(w * self.core.zoom_level), int(h * self.core.zoom_level)
-        zoomed_img = self.core.original_img.resize((new_w, new_h), Image.LANCZOS)
-        
-        # Atualizar canvas
-        self.core.tk_img = ImageTk.PhotoImage(zoomed_img)
         self.canvas.config(scrollregion=(0, 0, new_w, new_h))
-        self.core.canvas_img = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.core.tk_img)
+        self.viewport.set_zoom(self.core.zoom_level)
+        self.render_viewport(settle_ms)
         
         # Redesenhar anotações
         if self.core.show_labels.get():
             self.draw_annotations()
     
+    def render_viewport(self, settle_ms=0):
+        # Blocos novos entram como prévia; a versão final espera o zoom assentar
+        self.viewport.render()
+        self.core.display_bytes = self.viewport.nbytes()
+        self.schedule_hq_render(settle_ms)
+    
+    def schedule_hq_render(self, delay):
+        # Um novo pedido cancela a renderização anterior, já superada
+        if self.hq_render_job is not None:
+            self.master.after_cancel(self.hq_render_job)
+            self.hq_render_job = None
+        if self.viewport.pending_upgrades():
+            self.hq_render_job = self.master.after(delay, self.run_hq_render)
+    
+    def run_hq_render(self):
+        self.hq_render_job = None
+        if self.viewport.upgrade(self.hq_tiles_per_step):
+            # Poucos blocos por vez, para não bloquear a entrada do usuário
+            self.hq_render_job = self.master.after(1, self.run_hq_render)
+        else:
+            self.core.display_bytes = self.viewport.nbytes()
+    
+    def on_xscroll(self, *args):
+        self.canvas.xview(*args)
+        self.render_viewport()
+    
+    def on_yscroll(self, *args):
+        self.canvas.yview(*args)
+        self.render_viewport()
+    
     def draw_annotations(self):
-        self.canvas.delete("bbox")
-        self.canvas.delete("label")
-        
-        for i, (class_name, x1, y1, x2, y2) in enumerate(self.core.annotations):
-            # Aplicar zoom às coordenadas
-            x1, x2 = x1 * self.core.zoom_level, x2 * self.core.zoom_level
-            y1, y2 = y1 * self.core.zoom_level, y2 * self.core.zoom_level
-            
-            color = self.core.class_colors.get(class_name, "#FF0000")
-            
-            # Desenhar retângulo
-            self.canvas.create_rectangle(x1, y1, x2, y2, outline=color, tags=("bbox", f"bbox_{i}"), width=2)
-            
-            # Desenhar rótulo
-            label_text = f"{class_name}"
-            label_bg = self.canvas.create_rectangle(x1, y1-20, x1+len(label_text)*7, y1, 
-                                                  fill=color, tags=("label", f"label_{i}"))
-            label = self.canvas.create_text(x1+5, y1-10, anchor=tk.W, text=label_text, 
-                                          fill="white", tags=("label", f"label_{i}"))
+        # Só os itens de anotações novas, alteradas ou removidas são tocados
+        self.annotation_layer.sync(self.core.annotations, self.core.class_colors, self.core.zoom_level)
     
     def update_annotation_list(self):
-        self.annotation_list.delete(0, tk.END)
-        for class_name, x1, y1, x2, y2 in self.core.annotations:
-            self.annotation_list.insert(tk.END, f"{class_name}: [{x1:.1f}, {y1:.1f}, {x2:.1f}, {y2:.1f}]")
+        self.annotation_list.reset()
+        self.annotation_layer.select(None)
+    
+    def format_annotation(self, index):
+        class_name, x1, y1, x2, y2 = self.core.annotations[index]
+        return f"{class_name}: [{x1:.1f}, {y1:.1f}, {x2:.1f}, {y2:.1f}]"
+    
+    def on_annotation_selected(self, index):
+        # Destaca no canvas a caixa escolhida na lista
+        self.annotation_layer.select(int(self.core.annotations.ids[index]))
+    
+    def select_annotation(self, annotation_id):
+        # Seleção feita no canvas, refletida na lista
+        self.annotation_layer.select(annotation_id)
+        if annotation_id is None:
+            self.annotation_list.select(None)
+        else:
+            self.annotation_list.select(self.core.annotations.index_of(annotation_id))
+    
+    def ensure_spatial_index(self):
+        # Reconstrução completa só quando as anotações mudaram por outro caminho
+        # (troca de imagem, operações de classe, limpar tudo)
+        store = self.core.annotations
+        if self._spatial_version != store.version:
+            w, h = self.core.img_size or (0, 0)
+            self.spatial_index.build(store.ids.tolist(), store.boxes.tolist(), max(32, max(w, h) // 64))
+            self._spatial_version = store.version
+    
+    def update_spatial_index(self, previous_version, remove=None, insert=None):
+        # Edições feitas pelo mouse atualizam o índice em vez de reconstruí-lo
+        if self._spatial_version != previous_version:
+            return
+        if remove is not None:
+            self.spatial_index.remove(remove)
+        if insert is not None:
+            self.spatial_index.insert(*insert)
+        self._spatial_version = self.core.annotations.version
+    
+    def hit_test(self, x, y):
+        # (x, y) em coordenadas da imagem; a menor caixa sob o cursor vence
+        self.ensure_spatial_index()
+        hits = self.spatial_index.query_point(x, y, tolerance=3 / self.core.zoom_level)
+        return hits[0] if hits else None
     
     def update_image_info(self):
-        self.image_info.config(text=self.core.get_image_info())
+        text = self.core.get_image_info()
+        if self.core.img_size is not None:
+            text += f"\nEventos agrupados: {self.input_scheduler.stats()['merged']}"
+        self.image_info.config(text=text)
     
     def update_progress(self):
         self.progress['value'] = self.core.get_progress()
@@ -272,13 +380,36 @@ class MainUI:
     
     def open_folder(self):
         if self.core.open_folder():
+            self.filmstrip.reset()
             self.core.load_image()
             self.update_display()
+            self.poll_folder_scan()
+    
+    def poll_folder_scan(self):
+        # Atualiza contagem e progresso enquanto a listagem continua
+        self.update_progress()
+        self.update_status()
+        if self.core.show_filmstrip.get():
+            self.filmstrip.render()
+        if self.core.is_scanning():
+            self.master.after(250, self.poll_folder_scan)
+        else:
+            self.core.report_scan_errors()
     
     def save_annotations(self):
         if self.core.save_annotations():
             self.update_status()
     
+    def autosave(self):
+        # Gravação periódica em segundo plano; o journal já garante as edições
+        self.core.autosave()
+        self.master.after(self.core.autosave_seconds * 1000, self.autosave)
+    
+    def quit(self):
+        # As gravações pendentes são concluídas em core.shutdown() após o mainloop
+        self.core.save_annotations()
+        self.master.quit()
+    
     def next_image(self):
         if self.core.next_image():
             self.core.load_image()
@@ -289,27 +420,42 @@ class MainUI:
             self.core.load_image()
             self.update_display()
     
+    def go_to_image(self, index):
+        if self.core.go_to_image(index):
+            self.core.load_image()
+            self.update_display()
+    
+    def toggle_filmstrip(self):
+        if self.core.show_filmstrip.get():
+            self.filmstrip.pack(side=tk.BOTTOM, fill=tk.X, padx=5, after=self.status_bar)
+            self.filmstrip.set_current(self.core.image_index)
+        else:
+            self.filmstrip.pack_forget()
+    
     def toggle_labels(self):
         if self.core.show_labels.get():
             self.draw_annotations()
         else:
-            self.canvas.delete("bbox")
-            self.canvas.delete("label")
+            self.annotation_layer.clear()
     
     def delete_selected_annotation(self):
         selection = self.annotation_list.curselection()
         if selection:
             index = selection[0]
-            self.annotation_list.delete(index)
-            self.core.annotations.pop(index)
+            self.annotation_layer.select(None)
+            store = self.core.annotations
+            version = store.version
+            annotation_id = int(store.ids[index])
+            store.pop(index)
+            self.update_spatial_index(version, remove=annotation_id)
+            self.annotation_list.on_remove(index)
             if self.core.show_labels.get():
-                self.draw_annotations()
+                self.annotation_layer.remove_one(annotation_id)
     
     def clear_annotations(self):
-        self.core.annotations = []
-        self.annotation_list.delete(0, tk.END)
-        if self.core.show_labels.get():
-            self.draw_annotations()
+        self.core.annotations.clear()
+        self.annotation_list.reset()
+        self.annotation_layer.clear()
     
     def show_add_class_dialog(self):
         dialog = tk.Toplevel(self.master)
@@ -364,7 +510,7 @@ class MainUI:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         listbox_style = self.style.get_listbox_style()
-        class_list = tk.Listbox(class_frame, yscrollcommand=scrollbar.set, **listbox_style)
+        class_list = tk.Listbox(class_frame, yscrollcommand=scrollbar.set, selectmode=tk.EXTENDED, **listbox_style)
         class_list.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=class_list.yview)
         
@@ -434,16 +580,88 @@ class MainUI:
             index = selection[0]
             class_name = self.core.classes[index]
             
-            if messagebox.askyesno("Confirmar", f"Tem certeza que deseja remover a classe '{class_name}'?"):
-                if self.core.delete_class(class_name):
-                    self.update_class_dropdown()
-                    refresh_class_list()
-                    if hasattr(self.core, 'img'):
-                        self.annotation_list.delete(0, tk.END)
-                        for ann in self.core.annotations:
-                            self.annotation_list.insert(tk.END, f"{ann[0]}: [{ann[1]:.1f}, {ann[2]:.1f}, {ann[3]:.1f}, {ann[4]:.1f}]")
-                        if self.core.show_labels.get():
-                            self.draw_annotations()
+            if messagebox.askyesno("Confirmar", f"Tem certeza que deseja remover a classe '{class_name}'?\n"
+                                                "Todos os rótulos da pasta serão reescritos."):
+                run_class_operation(lambda: self.core.delete_class(class_name))
+        
+        def merge_classes():
+            selection = class_list.curselection()
+            if len(selection) < 2:
+                messagebox.showinfo("Mesclar", "Selecione duas ou mais classes; elas serão mescladas na primeira")
+                return
+            
+            sources = [self.core.classes[i] for i in selection]
+            target = sources[0]
+            if messagebox.askyesno("Confirmar", f"Mesclar {', '.join(sources[1:])} em '{target}'?\n"
+                                                "Todos os rótulos da pasta serão reescritos."):
+                run_class_operation(lambda: self.core.merge_classes(sources, target))
+        
+        def run_class_operation(begin):
+            # A reescrita dos rótulos roda numa thread; a interface acompanha com after()
+            try:
+                operation = begin()
+            except ValueError as e:
+                messagebox.showerror("Erro", str(e))
+                return
+            if operation is None:
+                class_operation_done()
+                return
+            
+            result = {'progress': (0, 0)}
+            
+            def worker():
+                try:
+                    result['stats'] = operation.rewrite(lambda done, total: result.update(progress=(done, total)))
+                except Exception as e:
+                    result['error'] = e
+            
+            thread = threading.Thread(target=worker, daemon=True)
+            set_dialog_busy(True)
+            thread.start()
+            
+            def wait():
+                if thread.is_alive():
+                    done, total = result['progress']
+                    self.status_label.config(text=f"Reescrevendo rótulos... {done}/{total}" if total
+                                             else "Reescrevendo rótulos...")
+                    dialog.after(100, wait)
+                    return
+                set_dialog_busy(False)
+                if 'error' in result:
+                    self.update_status()
+                    messagebox.showerror("Erro", f"Erro ao reescrever os rótulos: {str(result['error'])}\n"
+                                                 "A operação pode ser retomada ao reabrir a pasta.")
+                    return
+                try:
+                    self.core.finish_class_operation(operation, result['stats'])
+                except Exception as e:
+                    messagebox.showerror("Erro", f"Erro ao aplicar a nova lista de classes: {str(e)}\n"
+                                                 "A operação pode ser retomada ao reabrir a pasta.")
+                    return
+                class_operation_done()
+            
+            wait()
+        
+        def set_dialog_busy(busy):
+            state = tk.DISABLED if busy else tk.NORMAL
+            for button in (edit_btn, delete_btn, merge_btn, close_btn):
+                button.config(state=state)
+            dialog.config(cursor="watch" if busy else "")
+            # Fechar no meio da reescrita deixaria a lista de classes para trás
+            dialog.protocol("WM_DELETE_WINDOW", (lambda: None) if busy else dialog.destroy)
+        
+        def class_operation_done():
+            self.update_class_dropdown()
+            self.update_annotation_list()
+            if self.core.show_labels.get():
+                self.draw_annotations()
+            self.update_status()
+            stats = self.core.last_class_operation
+            if stats and stats['files']:
+                self.status_label.config(text=f"{stats['rewritten']} de {stats['files']} rótulos reescritos "
+                                              f"({stats['files_per_second']:.0f} arquivos/s)")
+            if dialog.winfo_exists():
+                refresh_class_list()
         
         def refresh_class_list():
             class_list.delete(0, tk.END)
@@ -457,19 +675,137 @@ class MainUI:
         delete_btn = ttk.Button(btn_frame, text="Remover", command=delete_class)
         delete_btn.pack(side=tk.LEFT, padx=5)
         
+        merge_btn = ttk.Button(btn_frame, text="Mesclar", command=merge_classes)
+        merge_btn.pack(side=tk.LEFT, padx=5)
+        
         close_btn = ttk.Button(btn_frame, text="Fechar", command=dialog.destroy)
         close_btn.pack(side=tk.RIGHT, padx=5)
     
+    def show_dataset_stats(self):
+        if not self.core.image_dir:
+            messagebox.showwarning("Aviso", "Abra uma pasta antes de ver as estatísticas")
+            return
+        
+        # O índice é atualizado em segundo plano para não travar a interface
+        result = {}
+        
+        def worker():
+            try:
+                result['index'], result['stats'] = self.core.update_dataset_index()
+            except Exception as e:
+                result['error'] = e
+        
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.status_label.config(text="Atualizando índice do dataset...")
+        
+        def wait():
+            if thread.is_alive():
+                self.master.after(100, wait)
+            elif 'error' in result:
+                self.update_status()
+                messagebox.showerror("Erro", f"Erro ao indexar o dataset: {str(result['error'])}")
+            else:
+                self.update_status()
+                self.show_dataset_stats_dialog(result['index'], result['stats'])
+        
+        wait()
+    
+    def show_dataset_stats_dialog(self, index, stats):
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Estatísticas do Dataset")
+        dialog.transient(self.master)
+        
+        text = (f"{len(index)} arquivos de rótulo, {index.num_boxes} anotações\n"
+                f"Atualizado em {stats['seconds']:.2f}s ({stats['parsed']} relidos, {stats['removed']} removidos)")
+        if stats['load_error']:
+            text += f"\nÍndice salvo inválido, reconstruído: {stats['load_error']}"
+        if stats['scan_errors']:
+            folder, error = stats['scan_errors'][0]
+            text += f"\n{len(stats['scan_errors'])} pasta(s) não puderam ser listadas ({folder}: {str(error)})"
+        summary = ttk.Label(dialog, text=text)
+        summary.pack(padx=10, pady=(10, 5))
+        
+        tree = ttk.Treeview(dialog, columns=("classe", "anotacoes", "imagens"), show="headings", height=12)
+        tree.heading("classe", text="Classe")
+        tree.heading("anotacoes", text="Anotações")
+        tree.heading("imagens", text="Imagens")
+        tree.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        
+        for class_name, boxes, images in self.core.get_class_summary(index):
+            tree.insert("", tk.END, values=(class_name, boxes, images))
+        
+        close_btn = ttk.Button(dialog, text="Fechar", command=dialog.destroy)
+        close_btn.pack(pady=(0, 10))
+    
+    def show_latency_report(self):
+        report = profiler.active.report()
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Relatório de Latência")
+        dialog.transient(self.master)
+        
+        summary = ttk.Label(dialog, text=f"{len(report['stalls'])} travamentos acima de "
+                                         f"{report['stall_threshold_ms']} ms em {report['seconds']:.0f}s")
+        summary.pack(padx=10, pady=(10, 5))
+        
+        columns = ("nome", "chamadas", "p50", "p95", "p99", "max")
+        tree = ttk.Treeview(dialog, columns=columns, show="headings", height=16)
+        for column, title in zip(columns, ("Função", "Chamadas", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Máx (ms)")):
+            tree.heading(column, text=title)
+            tree.column(column, width=260 if column == "nome" else 80, anchor=tk.W if column == "nome" else tk.E)
+        tree.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        
+        for name, stats in report['calls'].items():
+            tree.insert("", tk.END, values=(name, stats['count'], f"{stats['p50_ms']:.2f}", f"{stats['p95_ms']:.2f}",
+                                            f"{stats['p99_ms']:.2f}", f"{stats['max_ms']:.2f}"))
+        
+        def export():
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension=".json",
+                                                filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+            if path:
+                try:
+                    profiler.active.export(path)
+                except OSError as e:
+                    messagebox.showerror("Erro", f"Erro ao exportar relatório: {str(e)}", parent=dialog)
+        
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=(0, 10))
+        ttk.Button(btn_frame, text="Exportar", command=export).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Fechar", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+    
     # Event handlers
     def on_click(self, event):
         if not hasattr(self.core, 'img'):
             return
+        self.input_scheduler.flush()
             
         x = self.canvas.canvasx(event.x)
         y = self.canvas.canvasy(event.y)
+        image_x, image_y = x / self.core.zoom_level, y / self.core.zoom_level
+        ctrl = event.state & 0x0004
+        
+        # Alças da caixa selecionada redimensionam; clicar dentro dela a move
+        selected = self.annotation_layer.selected
+        if selected is not None and self.core.show_labels.get():
+            self.ensure_spatial_index()
+            box = self.spatial_index.box(selected)
+            mode = self.annotation_layer.handle_at(x, y)
+            inside = box is not None and box[0] <= image_x <= box[2] and box[1] <= image_y <= box[3]
+            if mode is None and not ctrl and inside:
+                mode = "move"
+            if mode is not None and box is not None:
+                self.edit_action = (mode, selected, image_x, image_y, box, self.core.annotations.version)
+                return
         
-        self.core.start_x = x / self.core.zoom_level
-        self.core.start_y = y / self.core.zoom_level
+        # Ctrl+clique seleciona a caixa sob o cursor; o clique simples desenha
+        if ctrl:
+            self.select_annotation(self.hit_test(image_x, image_y))
+            return
+        if selected is not None:
+            self.select_annotation(None)
+        
+        self.core.start_x = image_x
+        self.core.start_y = image_y
         
         self.core.temp_rect = self.canvas.create_rectangle(
             x, y, x, y, 
@@ -478,6 +814,11 @@ class MainUI:
         )
     
     def on_drag(self, event):
+        if self.edit_action is not None:
+            x = self.canvas.canvasx(event.x) / self.core.zoom_level
+            y = self.canvas.canvasy(event.y) / self.core.zoom_level
+            self.apply_edit(x, y)
+            return
         if not hasattr(self.core, 'temp_rect'):
             return
             
@@ -489,7 +830,50 @@ class MainUI:
                           self.core.start_y * self.core.zoom_level, 
                           x, y)
     
+    def apply_edit(self, x, y):
+        mode, annotation_id, start_x, start_y, (x1, y1, x2, y2), _ = self.edit_action
+        w, h = self.core.img_size
+        dx, dy = x - start_x, y - start_y
+        if mode == "move":
+            # A caixa inteira desloca, sem sair da imagem
+            dx = max(-x1, min(dx, w - x2))
+            dy = max(-y1, min(dy, h - y2))
+            box = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+        else:
+            if "w" in mode:
+                x1 += dx
+            else:
+                x2 += dx
+            if "n" in mode:
+                y1 += dy
+            else:
+                y2 += dy
+            x1, x2 = sorted((max(0, min(x1, w)), max(0, min(x2, w))))
+            y1, y2 = sorted((max(0, min(y1, h)), max(0, min(y2, h))))
+            box = (x1, y1, x2, y2)
+        
+        store = self.core.annotations
+        index = store.index_of(annotation_id)
+        store.set_box(index, box)
+        self.annotation_layer.update_one(store, index, self.core.class_colors)
+    
+    def finish_edit(self):
+        _, annotation_id, _, _, _, version = self.edit_action
+        self.edit_action = None
+        store = self.core.annotations
+        index = store.index_of(annotation_id)
+        if index < 0:
+            return
+        box = tuple(store.boxes[index].tolist())
+        self.update_spatial_index(version, remove=annotation_id, insert=(annotation_id, box))
+        self.annotation_list.on_change(index)
+    
     def on_release(self, event):
+        # O último arrasto pendente é aplicado antes de finalizar a caixa
+        self.input_scheduler.flush()
+        if self.edit_action is not None:
+            self.finish_edit()
+            return
         if not hasattr(self.core, 'temp_rect'):
             return
             
@@ -501,14 +885,21 @@ class MainUI:
         
         if abs(end_x - self.core.start_x) > 5 and abs(end_y - self.core.start_y) > 5:
             class_name = self.core.current_class.get()
+            if class_name not in self.core.classes:
+                self.canvas.delete("temp_rect")
+                del self.core.temp_rect
+                return
             x1, y1 = min(self.core.start_x, end_x), min(self.core.start_y, end_y)
             x2, y2 = max(self.core.start_x, end_x), max(self.core.start_y, end_y)
             
-            self.core.annotations.append((class_name, x1, y1, x2, y2))
-            self.annotation_list.insert(tk.END, f"{class_name}: [{x1:.1f}, {y1:.1f}, {x2:.1f}, {y2:.1f}]")
+            store = self.core.annotations
+            version = store.version
+            store.append((class_name, x1, y1, x2, y2))
+            self.update_spatial_index(version, insert=(int(store.ids[-1]), (x1, y1, x2, y2)))
+            self.annotation_list.on_append()
             
             if self.core.show_labels.get():
-                self.draw_annotations()
+                self.annotation_layer.add_one(store, len(store) - 1, self.core.class_colors)
         
         self.canvas.delete("temp_rect")
         del self.core.temp_rect
@@ -517,17 +908,25 @@ class MainUI:
         if not hasattr(self.core, 'img'):
             return
             
-        x = self.canvas.canvasx(event.x) / self.core.zoom_level
-        y = self.canvas.canvasy(event.y) / self.core.zoom_level
+        canvas_x, canvas_y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        x = canvas_x / self.core.zoom_level
+        y = canvas_y / self.core.zoom_level
+        
+        # Cursor indica redimensionamento sobre as alças da caixa selecionada
+        if self.core.pan_start is None:
+            cursor = "sizing" if self.annotation_layer.handle_at(canvas_x, canvas_y) else "tcross"
+            if self.canvas.cget("cursor") != cursor:
+                self.canvas.config(cursor=cursor)
         
         self.status_label.config(text=f"X: {x:.1f}, Y: {y:.1f} | {len(self.core.annotations)} anotações")
     
     def on_mouse_wheel(self, event):
         zoom_factor = 1.2 if event.delta > 0 else 0.8
-        self.adjust_zoom(zoom_factor)
+        self.on_mouse_wheel_scroll(event, zoom_factor)
     
     def on_mouse_wheel_scroll(self, event, factor):
-        self.adjust_zoom(factor)
+        # Giros no mesmo quadro viram um único zoom com os fatores multiplicados
+        self.input_scheduler.post("zoom", self.adjust_zoom, factor, merge=operator.mul)
     
     def adjust_zoom(self, factor, reset=False):
         if not hasattr(self.core, 'img'):
@@ -539,7 +938,7 @@ class MainUI:
             self.core.zoom_level *= factor
             self.core.zoom_level = max(0.1, min(self.core.zoom_level, 10.0))
         
-        self.update_image_display()
+        self.update_image_display(self.core.zoom_settle_ms)
     
     def start_pan(self, event):
         self.core.pan_start = (event.x, event.y)
@@ -552,7 +951,10 @@ class MainUI:
             self.canvas.xview("scroll", -dx, "units")
             self.canvas.yview("scroll", -dy, "units")
             self.core.pan_start = (event.x, event.y)
+            # Só os blocos que entraram pela borda são criados
+            self.render_viewport()
     
     def end_pan(self, event):
+        self.input_scheduler.flush()
         self.core.pan_start = None
         self.canvas.config(cursor="tcross")
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Inferência em vários processos, cada um com seu próprio modelo.
+
+Uma thread só usa um processo do torch e o pós-processamento em Python disputa
+o GIL. Aqui N processos carregam o modelo uma vez (no início do pool, antes do
+primeiro lote) e dividem os núcleos: cada um usa cpu_count // N threads do
+torch. Os lotes são entregues sob demanda ao processo que estiver livre, com
+poucos lotes em andamento por vez, e os resultados voltam na ordem das imagens.
+O pool fica vivo entre execuções enquanto o modelo e o número de processos não
+mudarem.
+"""
+import os
+import time
+import multiprocessing
+from collections import deque
+from .inference import DEFAULT_BATCH_SIZE, ClassRoles, decode_batch, infer_batch, load_model, postprocess_batch
+
+# Estado de cada processo worker, preenchido por _init_worker
+_model = None
+_roles = None
+_load_error = None
+
+
+def threads_per_worker(workers):
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_worker(model_path, threads, ready):
+    global _model, _roles, _load_error
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        _model, class_names = load_model(model_path)
+        _roles = ClassRoles(class_names)
+    except Exception as e:
+        # Sem levantar: um initializer que falha faz o Pool recriar o processo sem parar
+        _load_error = f"{type(e).__name__}: {e}"
+    ready.put((os.getpid(), _load_error))
+
+
+def _run_shard(paths):
+    if _load_error is not None:
+        raise RuntimeError(f"Worker sem modelo: {_load_error}")
+    start = time.perf_counter()
+    outputs = postprocess_batch(_roles, paths, infer_batch(_model, decode_batch(paths)))
+    return outputs, os.getpid(), time.perf_counter() - start
+
+
+class WorkerPool:
+    """Pool de processos de inferência para um modelo.
+
+    run() tem a mesma interface de BatchInference.run: gerador de (índice,
+    resultado ou None, erro ou None) na ordem das imagens. should_stop() é
+    consultado a cada lote; os lotes já entregues terminam em segundo plano e
+    são descartados.
+    """
+
+    def __init__(self, model_path, workers, threads=None, inflight_per_worker=2):
+        self.model_path = model_path
+        self.workers = max(1, int(workers))
+        self.threads = threads or threads_per_worker(self.workers)
+        self.inflight = self.workers * max(1, inflight_per_worker)
+        # spawn: um fork depois do torch inicializado pode travar nas threads do OpenMP
+        context = multiprocessing.get_context("spawn")
+        self._ready = context.Queue()
+        self._pending_ready = self.workers
+        self._pool = context.Pool(self.workers, initializer=_init_worker,
+                                  initargs=(model_path, self.threads, self._ready))
+        self._stats = None
+
+    def matches(self, model_path, workers):
+        return self._pool is not None and self.model_path == model_path and self.workers == int(workers)
+
+    def wait_ready(self, timeout=None):
+        """Espera todos os processos carregarem o modelo; levanta RuntimeError se algum falhou."""
+        errors = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending_ready:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            _, error = self._ready.get(timeout=remaining)
+            self._pending_ready -= 1
+            if error is not None:
+                errors.append(error)
+        if errors:
+            # Um pool sem modelo não serve para nada: matches() passa a recusá-lo
+            self.close()
+            raise RuntimeError(f"Failed to load model in worker: {errors[0]}")
+
+    def run(self, image_paths, should_stop=None, batch_size=DEFAULT_BATCH_SIZE):
+        batch_size = max(1, int(batch_size))
+        per_worker = {}
+        stats = self._stats = {'workers': self.workers, 'threads_per_worker': self.threads,
+                               'images': 0, 'busy_seconds': 0.0, 'per_worker': per_worker,
+                               'started': time.perf_counter(), 'finished': None}
+        pending = deque()
+        next_start = 0
+        try:
+            while next_start < len(image_paths) or pending:
+                # Poucos lotes em andamento: memória limitada e "Stop" responde rápido
+                while next_start < len(image_paths) and len(pending) < self.inflight:
+                    paths = image_paths[next_start:next_start + batch_size]
+                    pending.append((next_start, len(paths), self._pool.apply_async(_run_shard, (paths,))))
+                    next_start += batch_size
+
+                start, count, async_result = pending.popleft()
+                try:
+                    outputs, pid, seconds = async_result.get()
+                    per_worker[pid] = per_worker.get(pid, 0) + count
+                    stats['busy_seconds'] += seconds
+                except Exception as e:
+                    outputs = [(None, e)] * count
+                stats['images'] += count
+                for offset, (result, error) in enumerate(outputs):
+                    yield start + offset, result, error
+
+                if should_stop is not None and should_stop():
+                    break
+        finally:
+            stats['finished'] = time.perf_counter()
+
+    def stats(self):
+        stats = dict(self._stats or {'workers': self.workers, 'threads_per_worker': self.threads,
+                                     'images': 0, 'busy_seconds': 0.0, 'per_worker': {},
+                                     'started': None, 'finished': None})
+        started = stats.pop('started')
+        finished = stats.pop('finished') or time.perf_counter()
+        seconds = finished - started if started else 0.0
+        stats['seconds'] = seconds
+        stats['images_per_second'] = stats['images'] / seconds if seconds > 0 else 0.0
+        # Fração do tempo em que os processos estavam ocupados com lotes
+        stats['utilization'] = stats['busy_seconds'] / (seconds * self.workers) if seconds > 0 else 0.0
+        return stats
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+class ScalingReport:
+    """Vazão medida por número de processos e a eficiência em relação a um processo só.
+
+    eficiência(N) = vazão(N) / (N * vazão(1)); 100% é escala linear.
+    """
+
+    def __init__(self):
+        self.throughput = {}
+
+    def record(self, workers, images, seconds):
+        # Execuções curtas demais (paradas logo no início) não entram na conta
+        if images and seconds > 0:
+            self.throughput[workers] = images / seconds
+
+    def efficiency(self, workers):
+        base = self.throughput.get(1)
+        if not base or workers not in self.throughput:
+            return None
+        return self.throughput[workers] / (workers * base)
+
+    def summary(self):
+        parts = []
+        for workers in sorted(self.throughput):
+            text = f"{workers}p {self.throughput[workers]:.1f} img/s"
+            efficiency = self.efficiency(workers)
+            if efficiency is not None and workers > 1:
+                text += f" ({efficiency * 100:.0f}%)"
+            parts.append(text)
+        return " | ".join(parts)
@@ -0,0 +1,85 @@
+import os
+import threading
+
+
+def atomic_write(path, text):
+    # Grava em arquivo temporário na mesma pasta e troca com os.replace
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AsyncWriter:
+    """Grava arquivos de texto em uma thread de fundo.
+
+    Gravações repetidas do mesmo arquivo ainda pendentes são agrupadas: só o
+    conteúdo mais recente é gravado. on_written(path, token) é chamado na
+    thread de gravação depois que o arquivo chega ao disco.
+    """
+
+    def __init__(self, on_written=None):
+        self.on_written = on_written
+        self._pending = {}
+        self._busy = False
+        self._errors = []
+        self._cond = threading.Condition()
+        self._running = True
+        self.written = 0
+        self.coalesced = 0
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, path, text, token=None):
+        with self._cond:
+            if path in self._pending:
+                self.coalesced += 1
+            self._pending[path] = (text, token)
+            self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending) + self._busy
+
+    def flush(self, timeout=None):
+        # Espera até que todas as gravações pendentes terminem
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def pop_errors(self):
+        with self._cond:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def close(self, timeout=None):
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                text, token = self._pending.pop(path)
+                self._busy = True
+
+            try:
+                atomic_write(path, text)
+                if self.on_written:
+                    self.on_written(path, token)
+            except Exception as e:
+                with self._cond:
+                    self._errors.append((path, e))
+
+            with self._cond:
+                self._busy = False
+                self.written += 1
+                self._cond.notify_all()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from src.annotations import AnnotationStore, format_yolo, parse_yolo, xyxy_to_yolo, yolo_to_xyxy
+
+
+def test_parse_and_format_round_trip():
+    text = "0 0.500000 0.500000 0.250000 0.100000\n2 0.100000 0.200000 0.050000 0.050000\n"
+    class_ids, boxes = parse_yolo(text + "linha inválida\n\n")
+    assert class_ids.dtype == np.int32 and class_ids.tolist() == [0, 2]
+    assert format_yolo(class_ids, boxes) == text
+    assert parse_yolo("")[1].shape == (0, 4) and format_yolo([], np.empty((0, 4))) == ""
+    pixels = yolo_to_xyxy(boxes, 200, 100)
+    np.testing.assert_allclose(pixels[0], [75, 45, 125, 55])
+    np.testing.assert_allclose(xyxy_to_yolo(pixels, 200, 100), boxes, atol=1e-6)
+
+
+def test_store_edits_and_listener():
+    store = AnnotationStore(["medidor", "display"], capacity=1)
+    events = []
+    store.listener = lambda operation, *values: events.append((operation, *values))
+
+    store.append(("medidor", 0, 0, 10, 10))
+    store.append(("display", 5, 5, 20, 20))
+    store.append(("medidor", 1, 2, 3, 4))
+    first_id = int(store.ids[0])
+    assert len(store) == 3 and list(store)[1] == ("display", 5.0, 5.0, 20.0, 20.0)
+
+    assert store.pop(0) == ("medidor", 0.0, 0.0, 10.0, 10.0)
+    assert store.index_of(first_id) == -1
+    store.set_box(-1, (2, 2, 8, 8))
+    assert store[-1] == ("medidor", 2.0, 2.0, 8.0, 8.0)
+    with pytest.raises(IndexError):
+        store[2]
+    version = store.version
+    store.clear()
+    assert len(store) == 0 and store.version == version + 1
+    assert [event[0] for event in events] == ["add", "add", "add", "delete", "box", "clear"]
+    assert events[3] == ("delete", 0) and events[4] == ("box", 1, 2.0, 2.0, 8.0, 8.0)
+
+
+def test_ids_stay_stable_across_edits():
+    store = AnnotationStore(["a"])
+    for i in range(4):
+        store.append(("a", i, i, i + 1, i + 1))
+    ids = store.ids.tolist()
+    store.pop(1)
+    assert store.ids.tolist() == [ids[0], ids[2], ids[3]]
+    assert store.index_of(ids[3]) == 2
+
+
+def test_remap_drops_and_renumbers_classes():
+    store = AnnotationStore(["medidor", "display", "digito"])
+    store.set_arrays(np.array([0, 1, 2, 1]), np.arange(16, dtype=np.float32).reshape(4, 4))
+    kept = store.ids[[0, 2]].tolist()
+    store.classes = ["medidor", "digito"]
+    store.remap_classes(np.array([0, -1, 1]))
+    assert store.class_ids.tolist() == [0, 1]
+    assert store.ids.tolist() == kept
+    np.testing.assert_array_equal(store.boxes[1], [8, 9, 10, 11])
+
+
+def test_load_yolo_creates_unknown_classes():
+    classes = ["medidor"]
+    store = AnnotationStore(classes)
+    added = store.load_yolo("0 0.5 0.5 0.5 0.5\n3 0.25 0.25 0.5 0.5\n", 100, 100)
+    assert added == ["classe_3"] and classes == ["medidor", "classe_3"]
+    assert store.class_ids.tolist() == [0, 1]
+    np.testing.assert_allclose(store.boxes[1], [0, 0, 50, 50])
+    assert parse_yolo(store.to_yolo(100, 100))[0].tolist() == [0, 1]
@@ -0,0 +1,70 @@
+import time
+from PIL import Image
+from src.cache import ImageCache, ImagePrefetcher, image_nbytes
+
+
+def image(width=10, height=10, mode="RGB"):
+    return Image.new(mode, (width, height))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_counters():
+    cache = ImageCache()
+    assert cache.get("a") is None
+    cache.put("a", image())
+    assert cache.get("a") is not None
+    assert cache.peek("a") is not None and cache.peek("b") is None
+    # peek e "in" não contam
+    assert "a" in cache and "b" not in cache
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+    assert stats['entries'] == 1 and stats['bytes'] == 300
+
+
+def test_eviction_by_bytes_in_lru_order():
+    cache = ImageCache(max_bytes=1000)
+    for name in "abc":
+        cache.put(name, image())
+    cache.get("a")
+    cache.put("d", image())
+    assert "b" not in cache and {"a", "c", "d"} <= {name for name in "abcd" if name in cache}
+    assert cache.total_bytes == 900
+
+    cache.set_max_bytes(350)
+    assert len(cache) == 1 and "d" in cache
+    # A imagem mais recente fica mesmo acima do limite
+    cache.put("grande", image(100, 100))
+    assert len(cache) == 1 and cache.total_bytes == image_nbytes(image(100, 100))
+
+
+def test_replacing_an_entry_keeps_the_byte_count():
+    cache = ImageCache()
+    cache.put("a", image(10, 10))
+    cache.put("a", image(20, 10, "L"))
+    assert len(cache) == 1 and cache.total_bytes == 200
+    cache.clear()
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_prefetcher_fills_cache_and_collects_errors(tmp_path):
+    good = str(tmp_path / "a.png")
+    image().save(good)
+    missing = str(tmp_path / "inexistente.png")
+    cache = ImageCache()
+    prefetcher = ImagePrefetcher(cache)
+    try:
+        prefetcher.schedule([good, missing])
+        wait_for(lambda: good in cache and prefetcher._errors)
+        errors = prefetcher.pop_errors()
+        assert [path for path, _ in errors] == [missing]
+        assert prefetcher.pop_errors() == []
+        # Pré-carregar não conta como acerto nem falha
+        assert cache.stats()['misses'] == 0 and cache.stats()['hits'] == 0
+    finally:
+        prefetcher.stop()
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pytest
+from src.annotations import AnnotationStore
+from src.classops import (BACKUP_SUFFIX, ClassOperation, JOURNAL_NAME, plan_delete, plan_merge, plan_reorder,
+                          remap_colors, remap_ids)
+
+CLASSES = ["medidor", "display", "0", "1"]
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def read_ids(path):
+    with open(path) as f:
+        return [int(line.split()[0]) for line in f if line.strip()]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = str(tmp_path)
+    for name, ids in (("a", [0, 1, 2]), ("sub/b", [3, 3, 1]), ("c", [])):
+        write(os.path.join(root, name + ".jpg"), "")
+        write(os.path.join(root, name + ".txt"), "".join(f"{i} 0.5 0.5 0.1 0.1\n" for i in ids))
+    # .txt que não são rótulos de imagem
+    write(os.path.join(root, "classes.txt"), "0 1 2 3 4\n")
+    write(os.path.join(root, "notes.txt"), "1 0.1 0.1 0.1 0.1\n")
+    return root
+
+
+def test_plans():
+    assert plan_delete(CLASSES, ["display"])[1].tolist() == [0, -1, 1, 2]
+    new_classes, table = plan_merge(CLASSES, ["0", "1"], "digito")
+    assert new_classes == ["medidor", "display", "digito"] and table.tolist() == [0, 1, 2, 2]
+    new_classes, table = plan_reorder(CLASSES, ["1", "0", "display", "medidor"])
+    assert table.tolist() == [3, 2, 1, 0]
+    with pytest.raises(ValueError):
+        plan_reorder(CLASSES, ["medidor"])
+    assert remap_colors(CLASSES, ["medidor", "digito"], plan_merge(CLASSES, ["display", "0", "1"], "digito")[1],
+                        {"medidor": "#1", "display": "#2"}) == {"medidor": "#1", "digito": "#2"}
+
+
+def test_delete_rewrites_only_label_files(dataset):
+    new_classes, table = plan_delete(CLASSES, ["display"])
+    committed = []
+    stats = ClassOperation(dataset, CLASSES, new_classes, table, workers=1).run(lambda: committed.append(True))
+    assert committed == [True]
+    assert read_ids(os.path.join(dataset, "a.txt")) == [0, 1]
+    assert read_ids(os.path.join(dataset, "sub", "b.txt")) == [2, 2]
+    assert stats['files'] == 3 and stats['rewritten'] == 2
+    # classes.txt e notes.txt não têm imagem correspondente e ficam intactos
+    assert read_ids(os.path.join(dataset, "classes.txt")) == [0]
+    assert read_ids(os.path.join(dataset, "notes.txt")) == [1]
+    assert not os.path.exists(os.path.join(dataset, JOURNAL_NAME))
+    assert not os.path.exists(os.path.join(dataset, "a.txt" + BACKUP_SUFFIX))
+
+
+def test_rollback_during_commit_restores_labels(dataset):
+    new_classes, table = plan_merge(CLASSES, ["0", "1"], "digito")
+    operation = ClassOperation(dataset, CLASSES, new_classes, table, workers=1)
+    operation.rewrite()
+    # Simula uma queda antes da fase "committed": journal de volta para "commit" com .bak presentes
+    operation.phase = "commit"
+    operation._write_journal()
+    for name in ("a", os.path.join("sub", "b")):
+        path = os.path.join(dataset, name + ".txt")
+        os.replace(path, path + BACKUP_SUFFIX)
+        write(path, "9 0.5 0.5 0.1 0.1\n")
+
+    loaded = ClassOperation.load(dataset, workers=1)
+    assert loaded.phase == "commit"
+    assert loaded.rollback() == 3
+    assert read_ids(os.path.join(dataset, "a.txt")) == [0, 1, 2]
+    assert not os.path.exists(os.path.join(dataset, JOURNAL_NAME))
+
+
+def test_config_is_applied_last_and_resumed(dataset):
+    new_classes, table = plan_delete(CLASSES, ["medidor"])
+    operation = ClassOperation(dataset, CLASSES, new_classes, table, workers=1)
+
+    def failing_commit():
+        raise OSError("disco cheio")
+
+    operation.rewrite()
+    with pytest.raises(OSError):
+        operation.finish(failing_commit)
+
+    # Rótulos já efetivados: desfazer deixaria a configuração inconsistente
+    loaded = ClassOperation.load(dataset, workers=1)
+    assert loaded.phase == "committed"
+    with pytest.raises(ValueError):
+        loaded.rollback()
+
+    config = {}
+    loaded.run(lambda: config.update(classes=loaded.new_classes))
+    assert config == {'classes': ["display", "0", "1"]}
+    assert read_ids(os.path.join(dataset, "a.txt")) == [0, 1]
+    assert not os.path.exists(os.path.join(dataset, JOURNAL_NAME))
+
+
+def test_prepare_is_resumable(dataset):
+    new_classes, table = plan_reorder(CLASSES, ["1", "0", "display", "medidor"])
+    operation = ClassOperation(dataset, CLASSES, new_classes, table, workers=1)
+    operation._write_journal()
+    # Interrompida na preparação: nenhum rótulo foi trocado ainda
+    loaded = ClassOperation.load(dataset, workers=1)
+    progress = []
+    loaded.run(progress=lambda done, total: progress.append((done, total)))
+    assert progress[-1] == (3, 3)
+    assert read_ids(os.path.join(dataset, "a.txt")) == [3, 2, 1]
+    assert read_ids(os.path.join(dataset, "sub", "b.txt")) == [0, 0, 2]
+
+
+def test_unlistable_folder_stops_before_rewriting(dataset, monkeypatch):
+    import src.scanner as scanner
+    real_scandir = os.scandir
+
+    def scandir(path):
+        if os.path.basename(path) == "sub":
+            raise PermissionError("sem permissão")
+        return real_scandir(path)
+
+    monkeypatch.setattr(scanner.os, "scandir", scandir)
+    new_classes, table = plan_delete(CLASSES, ["display"])
+    with pytest.raises(OSError, match="sub"):
+        ClassOperation(dataset, CLASSES, new_classes, table, workers=1).rewrite()
+    assert read_ids(os.path.join(dataset, "a.txt")) == [0, 1, 2]
+
+
+def test_unknown_and_negative_ids_are_kept():
+    table = np.array([1, -1, 0])
+    assert remap_ids(np.array([0, 1, 2, 5, -1], np.int32), table).tolist() == [1, -1, 0, 5, -1]
+    store = AnnotationStore(["a", "b", "c"])
+    store.set_arrays(np.array([2, -1]), np.zeros((2, 4), np.float32))
+    store.remap_classes(table)
+    assert store.class_ids.tolist() == [0]
@@ -0,0 +1,50 @@
+import pytest
+import inferencia_cli
+from inferencia_cli import input_error, iter_chunks, iter_inputs, main
+
+
+def touch(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_inputs_from_folders_images_and_lists(tmp_path):
+    touch(tmp_path / "pasta" / "a.jpg")
+    touch(tmp_path / "pasta" / "sub" / "b.PNG")
+    touch(tmp_path / "pasta" / "notas.txt")
+    listed = touch(tmp_path / "lista.txt", "/x/1.jpg\n\n  /x/2.jpg  \n")
+    other = touch(tmp_path / "caminhos.lst", "/x/3.jpg\n")
+    paths = list(iter_inputs([str(tmp_path / "pasta"), "/y/avulsa.jpeg", listed], [other]))
+    assert sorted(paths[:2]) == sorted([str(tmp_path / "pasta" / "a.jpg"), str(tmp_path / "pasta" / "sub" / "b.PNG")])
+    assert paths[2:] == ["/y/avulsa.jpeg", "/x/1.jpg", "/x/2.jpg", "/x/3.jpg"]
+
+
+def test_input_error(tmp_path):
+    assert input_error(str(tmp_path)) is None
+    assert input_error("nao_existe.jpg") is None
+    assert input_error(touch(tmp_path / "lista.txt")) is None
+    assert "não encontrada" in input_error(str(tmp_path / "outra.txt"))
+    assert "não encontrado" in input_error(str(tmp_path / "x.webp"))
+    assert "--list" in input_error(touch(tmp_path / "foto.webp"))
+
+
+def test_unsupported_input_exits_before_loading_model(tmp_path, monkeypatch, capsys):
+    image = tmp_path / "foto.tif"
+    image.write_bytes(b"II*\x00\xff\xfe")
+
+    def fail(*args):
+        raise AssertionError("o modelo não deveria ser carregado")
+
+    monkeypatch.setattr(inferencia_cli, "load_model", fail)
+    with pytest.raises(SystemExit) as exit_info:
+        main(["modelo.pt", str(image)])
+    assert exit_info.value.code == 2
+    assert "foto.tif" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["modelo.pt"])
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_chunks([], 3)) == []
@@ -0,0 +1,116 @@
+import os
+import json
+import numpy as np
+from PIL import Image
+from src.annotations import parse_yolo
+from src.convert import main
+
+CLASSES = ["medidor", "display", "digito"]
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read_labels(path):
+    with open(path) as f:
+        return parse_yolo(f.read())
+
+
+def make_dataset(tmp_path, labels):
+    images = str(tmp_path / "images")
+    for name, text in labels.items():
+        path = os.path.join(images, name + ".png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new("RGB", (200, 100)).save(path)
+        write(os.path.join(images, name + ".txt"), text)
+    classes = str(tmp_path / "classes.txt")
+    write(classes, "\n".join(CLASSES) + "\n")
+    return images, classes
+
+
+def convert(*argv):
+    main(list(argv) + ["--workers", "2"])
+
+
+LABELS = {
+    "a": "0 0.5 0.5 0.5 0.5\n2 0.25 0.25 0.1 0.2\n",
+    os.path.join("sub", "b"): "1 0.1 0.9 0.2 0.2\n",
+    "c": "",
+}
+
+
+def assert_same_labels(images, output, names):
+    for name in names:
+        ids, boxes = read_labels(os.path.join(images, name + ".txt"))
+        new_ids, new_boxes = read_labels(os.path.join(output, name + ".txt"))
+        assert new_ids.tolist() == ids.tolist()
+        np.testing.assert_allclose(new_boxes, boxes, atol=1e-3)
+
+
+def test_coco_round_trip(tmp_path):
+    images, classes = make_dataset(tmp_path, LABELS)
+    coco = str(tmp_path / "dataset.json")
+    output = str(tmp_path / "yolo")
+    convert("--from", "yolo", "--to", "coco", "--images", images, "--output", coco,
+            "--classes", classes, "--recursive")
+    with open(coco) as f:
+        document = json.load(f)
+    assert [c["name"] for c in document["categories"]] == CLASSES
+    assert len(document["images"]) == 3 and len(document["annotations"]) == 3
+
+    convert("--from", "coco", "--to", "yolo", "--images", images, "--input", coco, "--output", output,
+            "--classes", classes)
+    assert_same_labels(images, output, LABELS)
+    with open(os.path.join(output, "classes.txt")) as f:
+        assert f.read().split() == CLASSES
+
+
+def test_voc_round_trip(tmp_path):
+    images, classes = make_dataset(tmp_path, LABELS)
+    voc = str(tmp_path / "voc")
+    output = str(tmp_path / "yolo")
+    convert("--from", "yolo", "--to", "voc", "--images", images, "--output", voc,
+            "--classes", classes, "--recursive")
+    assert os.path.exists(os.path.join(voc, "sub", "b.xml"))
+    # Sem lista de classes, os ids seguem a ordem em que os nomes aparecem
+    convert("--from", "voc", "--to", "yolo", "--images", images, "--input", voc, "--output", output,
+            "--classes", str(tmp_path / "nenhuma.txt"), "--recursive")
+    with open(os.path.join(output, "classes.txt")) as f:
+        found = f.read().split()
+    assert sorted(found) == sorted(CLASSES)
+
+    convert("--from", "voc", "--to", "yolo", "--images", images, "--input", voc, "--output", output,
+            "--classes", classes, "--recursive")
+    assert_same_labels(images, output, LABELS)
+
+
+def test_coco_categories_cover_unknown_ids(tmp_path, capsys):
+    images, classes = make_dataset(tmp_path, {"a": "0 0.5 0.5 0.1 0.1\n4 0.5 0.5 0.1 0.1\n"})
+    coco = str(tmp_path / "dataset.json")
+    convert("--from", "yolo", "--to", "coco", "--images", images, "--output", coco, "--classes", classes)
+    with open(coco) as f:
+        document = json.load(f)
+    categories = {c["id"]: c["name"] for c in document["categories"]}
+    assert all(a["category_id"] in categories for a in document["annotations"])
+    assert categories[5] == "classe_4"
+    assert "classe_<id>" in capsys.readouterr().err
+
+
+def test_unknown_coco_category_is_skipped(tmp_path, capsys):
+    images, classes = make_dataset(tmp_path, {"a": ""})
+    coco = str(tmp_path / "dataset.json")
+    write(coco, json.dumps({
+        "categories": [{"id": 1, "name": "medidor"}],
+        "images": [{"id": 1, "file_name": "a.png", "width": 200, "height": 100}],
+        "annotations": [{"id": 1, "image_id": 1, "category_id": 1, "bbox": [0, 0, 100, 50]},
+                        {"id": 2, "image_id": 1, "category_id": 9, "bbox": [0, 0, 10, 10]}],
+    }))
+    output = str(tmp_path / "yolo")
+    convert("--from", "coco", "--to", "yolo", "--images", images, "--input", coco, "--output", output,
+            "--classes", classes)
+    ids, _ = read_labels(os.path.join(output, "a.txt"))
+    assert ids.tolist() == [0]
+    assert "a.png: 1 anotações com category_id desconhecido" in capsys.readouterr().err
@@ -0,0 +1,43 @@
+import tkinter as tk
+import pytest
+from PIL import Image
+from src.core import YOLOAnnotationCore
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("sem display")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def core(root, tmp_path, monkeypatch):
+    # label_config.json é lido da pasta atual
+    monkeypatch.chdir(tmp_path)
+    core = YOLOAnnotationCore()
+    yield core
+    core.shutdown()
+
+
+def test_load_image_reads_only_header(core, tmp_path):
+    folder = tmp_path / "imgs"
+    folder.mkdir()
+    Image.new("RGB", (40, 30), (10, 20, 30)).save(folder / "a.png")
+
+    assert core.open_folder(str(folder))
+    core.load_image()
+    assert core.img is None
+    assert core.img_size == (40, 30)
+    assert core.image_cache.misses == 1
+
+    img = core.get_image()
+    assert img.size == (40, 30)
+    assert core.get_image() is img
+    # A decodificação não conta uma segunda falha
+    assert core.image_cache.misses == 1
+    assert core.img_path in core.image_cache
@@ -0,0 +1,94 @@
+import csv
+import json
+import locale
+import numpy as np
+import pytest
+from src.export import SUMMARY_COLUMNS, format_for, open_exporter
+from src.inference import Detections
+
+CLASSES = ["medidor", "display", "7"]
+
+
+def make_result(name, digits="", detections=0):
+    boxes = np.arange(detections * 4, dtype=np.float32).reshape(-1, 4)
+    return {
+        'image_path': f"/dados/{name}",
+        'detections': Detections(np.arange(detections, dtype=np.int32) % 3,
+                                 np.full(detections, 0.75, np.float32), boxes, CLASSES),
+        'meter_detected': detections > 0,
+        'display_detected': detections > 1,
+        'digits': digits,
+        'digits_confidence': 0.875 if digits else 0.0,
+    }
+
+
+RESULTS = [make_result("a.jpg", "0123", 3), make_result("b.jpg"), make_result("ç.jpg", "7", 1)]
+
+
+def export(path, results=RESULTS, fmt=None, **options):
+    with open_exporter(str(path), fmt, **options) as exporter:
+        for result in results:
+            exporter.write(result)
+    return exporter
+
+
+def test_format_for():
+    assert format_for("x.CSV") == "csv"
+    assert format_for("x.feather") == "arrow" and format_for("x.ndjson") == "jsonl"
+    assert format_for("x.txt") == "txt"
+    assert format_for("-") == "jsonl" and format_for("x.dat", default="csv") == "csv"
+    with pytest.raises(ValueError):
+        open_exporter("x.dat", "xml")
+
+
+def test_csv_round_trip(tmp_path):
+    exporter = export(tmp_path / "r.csv")
+    assert exporter.rows == 3
+    with open(tmp_path / "r.csv", encoding='utf-8', newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == SUMMARY_COLUMNS
+    assert rows[1] == ["a.jpg", "Yes", "Yes", "0123", "0.88"]
+    assert rows[2] == ["b.jpg", "No", "No", "None", "N/A"]
+    assert rows[3][0] == "ç.jpg"
+
+
+def test_txt_uses_semicolons_and_system_encoding(tmp_path):
+    export(tmp_path / "r.txt")
+    with open(tmp_path / "r.txt", encoding=locale.getpreferredencoding(False)) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == ";".join(SUMMARY_COLUMNS)
+    assert lines[3] == "ç.jpg;Yes;No;7;0.88"
+
+
+def test_jsonl_round_trip(tmp_path):
+    export(tmp_path / "r.jsonl")
+    with open(tmp_path / "r.jsonl", encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [r['image_path'] for r in records] == [r['image_path'] for r in RESULTS]
+    assert records[0]['digits_confidence'] == 0.875
+    assert records[0]['detections'][1] == {'class': 'display', 'confidence': 0.75, 'box': [4.0, 5.0, 6.0, 7.0]}
+    assert records[1]['detections'] == []
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow"])
+def test_columnar_round_trip(tmp_path, suffix):
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / f"r.{suffix}"
+    export(path, chunk_rows=2)
+    if suffix == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.num_rows == 3
+    assert json.loads(table.schema.metadata[b'class_names']) == CLASSES
+    assert table.column('class_ids').to_pylist() == [[0, 1, 2], [], [0]]
+    assert table.column('boxes').to_pylist()[2] == [[0.0, 1.0, 2.0, 3.0]]
+    assert table.column('digits').to_pylist() == ["0123", "", "7"]
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow"])
+def test_columnar_without_results_has_schema(tmp_path, suffix):
+    pytest.importorskip("pyarrow")
+    export(tmp_path / f"r.{suffix}", results=[])
+    assert (tmp_path / f"r.{suffix}").stat().st_size > 0
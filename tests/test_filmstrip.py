@@ -0,0 +1,51 @@
+import tkinter as tk
+import pytest
+from src.filmstrip import Filmstrip
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("sem display")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+class FakeThumbnails:
+    # Nunca conclui: toda célula continua sem miniatura
+    size = 32
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, paths):
+        self.requests.append(list(paths))
+
+    def cached_path(self, path):
+        return None
+
+    def has_pending(self):
+        return False
+
+    def poll(self):
+        return []
+
+
+def test_render_requests_every_visible_placeholder(root):
+    thumbnails = FakeThumbnails()
+    paths = [f"/images/{i}.png" for i in range(100)]
+    strip = Filmstrip(root, thumbnails, lambda: len(paths), paths.__getitem__)
+    strip.canvas.configure(width=10 * strip.cell)
+    strip.pack()
+    root.update()
+
+    strip.render()
+    first = thumbnails.requests[-1]
+    assert first
+    # Um segundo desenho (ex.: poll da varredura) pede de novo as mesmas células,
+    # para o cache não cancelar o que ainda está na tela
+    strip.render()
+    assert thumbnails.requests[-1] == first
@@ -0,0 +1,94 @@
+import os
+import numpy as np
+from src import index as index_module
+from src.index import DatasetIndex, INDEX_DIR, scan_label_files
+
+
+def write(root, name, text):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def label(*ids):
+    return "".join(f"{i} 0.5 0.5 0.2 0.2\n" for i in ids)
+
+
+def make_dataset(root, labels):
+    for name, ids in labels.items():
+        write(root, name + ".jpg", "")
+        write(root, name + ".txt", label(*ids))
+
+
+def boxes_by_name(index):
+    return {name: sorted(index.image_boxes(i)[0].tolist()) for i, name in enumerate(index.names)}
+
+
+def test_scan_lists_only_label_files(tmp_path):
+    root = str(tmp_path)
+    make_dataset(root, {"a": [0], os.path.join("sub", "b"): [1]})
+    write(root, "classes.txt", "medidor\n")
+    write(root, os.path.join(INDEX_DIR, "names.txt"), "a.txt")
+    names = sorted(name for name, _, _ in scan_label_files(root))
+    assert names == ["a.txt", os.path.join("sub", "b.txt")]
+
+
+def test_scan_stats_in_chunks(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    make_dataset(root, {f"img{i:03d}": [i % 3] for i in range(40)})
+    monkeypatch.setattr(index_module, "STAT_CHUNK", 7)
+    found = scan_label_files(root, threads=4)
+    assert sorted(found) == sorted(scan_label_files(root, threads=1))
+    assert len(found) == 40 and all(size > 0 for _, _, size in found)
+
+
+def test_incremental_update(tmp_path):
+    root = str(tmp_path)
+    make_dataset(root, {"a": [0, 1], "b": [2], "c": []})
+    index = DatasetIndex(root, workers=1)
+    stats = index.update()
+    assert stats['parsed'] == 3 and stats['removed'] == 0
+    assert index.class_histogram(3).tolist() == [1, 1, 1]
+
+    # Sem alterações nada é relido, e o índice salvo é reaproveitado
+    reopened = DatasetIndex(root, workers=1)
+    assert len(reopened) == 3
+    assert reopened.update()['parsed'] == 0
+
+    write(root, "b.txt", label(1, 1, 1))
+    os.remove(os.path.join(root, "c.txt"))
+    make_dataset(root, {"d": [0]})
+    stats = reopened.update()
+    assert stats['parsed'] == 2 and stats['removed'] == 1 and stats['images'] == 3
+    assert boxes_by_name(reopened) == {"a.txt": [0, 1], "b.txt": [1, 1, 1], "d.txt": [0]}
+    assert reopened.offsets[-1] == reopened.num_boxes == 6
+    assert reopened.images_per_class(3).tolist() == [2, 2, 0]
+    assert reopened.images_with_class(1) == ["a.txt", "b.txt"]
+
+
+def test_update_parses_chunks_in_processes(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    labels = {f"img{i:02d}": [i % 4] * (i % 3) for i in range(30)}
+    make_dataset(root, labels)
+    monkeypatch.setattr(index_module, "PARSE_CHUNK", 8)
+    index = DatasetIndex(root, workers=2)
+    assert index.update()['parsed'] == 30
+    assert boxes_by_name(index) == {name + ".txt": sorted(ids) for name, ids in labels.items()}
+    assert np.array_equal(index.counts, [len(labels[name[:-4]]) for name in index.names])
+
+
+def test_corrupt_index_is_rebuilt_and_reported(tmp_path, capsys):
+    root = str(tmp_path)
+    make_dataset(root, {"a": [0, 1]})
+    DatasetIndex(root, workers=1).update()
+    with open(os.path.join(root, INDEX_DIR, "boxes.npy"), 'wb') as f:
+        f.write(b"corrompido")
+
+    index = DatasetIndex(root, workers=1)
+    assert len(index) == 0 and index.load_error
+    stats = index.update()
+    assert stats['parsed'] == 1 and stats['load_error'] == index.load_error
+    assert boxes_by_name(index) == {"a.txt": [0, 1]}
+    assert capsys.readouterr().out == ""
+    assert DatasetIndex(root, workers=1).load_error is None
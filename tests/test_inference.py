@@ -0,0 +1,174 @@
+import random
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+from src.inference import BatchInference, ClassRoles, postprocess_batch
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, np.float32).reshape(-1, 6)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class FakeBox:
+    # Uma caixa como o ultralytics entrega ao iterar: tensores de uma linha
+    def __init__(self, row):
+        self.xyxy = row[None, :4]
+        self.conf = row[None, 4]
+        self.cls = row[None, 5]
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.boxes = FakeBoxes(data)
+
+    def per_box(self):
+        return [FakeBox(row) for row in self.boxes.data]
+
+
+class FakeModel:
+    """Uma detecção por imagem: a classe é o canal vermelho do primeiro pixel."""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, images, verbose=True):
+        with self.lock:
+            self.calls.append(len(images))
+        results = []
+        for image in images:
+            # Arrays BGR, como os do OpenCV
+            red = int(image[0, 0, 2])
+            if red == self.fail_on:
+                raise RuntimeError("falha no modelo")
+            results.append(FakeResult([10, 0, 20, 10, 0.9, red]))
+        return results
+
+
+def make_images(folder, count, broken=()):
+    paths = []
+    for i in range(count):
+        path = folder / f"{i:03d}.png"
+        if i in broken:
+            path.write_bytes(b"nao e uma imagem")
+        else:
+            Image.new("RGB", (8, 8), (i, 0, 0)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_results_in_order_with_one_call_per_batch(tmp_path):
+    paths = make_images(tmp_path, 23)
+    model = FakeModel()
+    names = [str(i) for i in range(10)] + ['medidor', 'display']
+    runner = BatchInference(model, names, batch_size=5, decode_workers=3)
+
+    outputs = list(runner.run(paths))
+    assert [index for index, _, _ in outputs] == list(range(23))
+    assert all(error is None for _, _, error in outputs)
+    assert [result['image_path'] for _, result, _ in outputs] == paths
+    assert [result['detections'].class_ids.tolist() for _, result, _ in outputs] == [[i] for i in range(23)]
+    # Ids conhecidos viram o nome; os demais, o próprio número
+    assert outputs[3][1]['digits'] == "3"
+    assert outputs[10][1]['meter_detected'] and outputs[11][1]['display_detected']
+    assert outputs[17][1]['digits'] == "17"
+    assert sorted(model.calls) == [3, 5, 5, 5, 5]
+    assert runner.stats()['stages']['infer']['items'] == 5
+
+
+def test_unreadable_image_reports_error_at_its_index(tmp_path):
+    paths = make_images(tmp_path, 6, broken={2})
+    model = FakeModel()
+    outputs = list(BatchInference(model, ['0'], batch_size=4).run(paths))
+    assert [index for index, _, _ in outputs] == list(range(6))
+    assert outputs[2][1] is None and outputs[2][2] is not None
+    assert all(error is None for index, _, error in outputs if index != 2)
+    # A imagem ilegível não vai para o modelo
+    assert sorted(model.calls) == [2, 3]
+
+
+def test_model_error_fails_only_its_batch(tmp_path):
+    paths = make_images(tmp_path, 6)
+    outputs = list(BatchInference(FakeModel(fail_on=4), ['0'], batch_size=3).run(paths))
+    errors = [index for index, _, error in outputs if error is not None]
+    assert errors == [3, 4, 5]
+    assert all(isinstance(outputs[i][2], RuntimeError) for i in errors)
+
+
+def test_should_stop_skips_remaining_batches(tmp_path):
+    paths = make_images(tmp_path, 20)
+    model = FakeModel()
+    assert list(BatchInference(model, ['0'], batch_size=2).run(paths, lambda: True)) == []
+    assert model.calls == []
+
+    checks = []
+
+    def should_stop():
+        checks.append(1)
+        return len(checks) > 3
+
+    outputs = list(BatchInference(model, ['0'], batch_size=2, queue_size=1).run(paths, should_stop))
+    # Só os três primeiros lotes entram; os já enfileirados podem ser descartados
+    assert len(outputs) <= 6
+    assert [index for index, _, _ in outputs] == list(range(len(outputs)))
+
+
+def old_summarize(img_path, boxes, class_names):
+    # Lógica anterior, caixa por caixa, como referência
+    detections = []
+    for box in boxes:
+        xyxy = box.xyxy[0].tolist()
+        cls_id = int(box.cls[0].item())
+        conf = box.conf[0].item()
+        class_name = class_names[cls_id] if cls_id < len(class_names) else str(cls_id)
+        detections.append({'class_id': cls_id, 'class_name': class_name, 'confidence': conf, 'box': xyxy})
+    digits = sorted([d for d in detections if d['class_name'].isdigit()], key=lambda x: x['box'][0])
+    digit_values = [d['class_name'] for d in digits]
+    return {
+        'image_path': img_path,
+        'meter_detected': any(d['class_name'] == 'medidor' for d in detections),
+        'display_detected': any(d['class_name'] == 'display' for d in detections),
+        'digits': "".join(digit_values) if digit_values else None,
+        'digits_confidence': float(np.mean([d['confidence'] for d in digits])) if digits else 0.0,
+    }
+
+
+def test_postprocess_matches_per_box_logic():
+    rng = random.Random(11)
+    # Ids 12 e 13 não têm nome: viram "12" e "13", que contam como dígitos
+    names = [str(i) for i in range(10)] + ['medidor', 'display']
+    roles = ClassRoles(names)
+    paths, raw = [], []
+    for i in range(200):
+        rows = []
+        for _ in range(rng.randint(0, 12)):
+            # x1 inteiro em faixa pequena para haver empates na ordenação
+            x1, y1 = rng.randint(0, 20), rng.uniform(0, 50)
+            rows.append([x1, y1, x1 + rng.uniform(1, 10), y1 + rng.uniform(1, 10),
+                         rng.uniform(0.1, 1.0), rng.randint(0, 13)])
+        paths.append(f"img{i}.png")
+        raw.append(FakeResult(rows))
+
+    outputs = postprocess_batch(roles, paths, raw)
+    for path, result, (summary, error) in zip(paths, raw, outputs):
+        assert error is None
+        expected = old_summarize(path, result.per_box(), names)
+        assert summary['digits'] == expected['digits']
+        assert summary['meter_detected'] == expected['meter_detected']
+        assert summary['display_detected'] == expected['display_detected']
+        assert summary['digits_confidence'] == pytest.approx(expected['digits_confidence'], abs=1e-6)
+        assert len(summary['detections']) == len(result.boxes)
+
+
+def test_postprocess_passes_errors_through():
+    error = OSError("ilegível")
+    outputs = postprocess_batch(ClassRoles(['0']), ["a.png", "b.png"], [error, FakeResult([])])
+    assert outputs[0] == (None, error)
+    assert outputs[1][1] is None and outputs[1][0]['digits'] is None
+    assert outputs[1][0]['digits_confidence'] == 0.0
@@ -0,0 +1,116 @@
+import os
+import pytest
+from src.annotations import AnnotationStore, parse_yolo
+from src.journal import EditJournal, JOURNAL_NAME, replay_journal
+
+CLASSES = ["medidor", "display"]
+SIZE = (100, 100)
+
+
+def write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def read_ids(path):
+    with open(path) as f:
+        return parse_yolo(f.read())[0].tolist()
+
+
+def open_session(tmp_path, label_path):
+    journal = EditJournal(sync_interval=0.01)
+    journal.open(str(tmp_path / JOURNAL_NAME))
+    store = AnnotationStore(list(CLASSES))
+    with open(label_path) as f:
+        store.load_yolo(f.read(), *SIZE)
+    journal.begin_image(label_path, SIZE)
+    store.listener = journal.record
+    return journal, store
+
+
+def test_replay_applies_unsaved_edits(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write(label_path, "0 0.5 0.5 0.2 0.2\n")
+    journal, store = open_session(tmp_path, label_path)
+    store.append(("display", 10, 10, 30, 30))
+    store.append(("medidor", 40, 40, 60, 60))
+    store.set_box(1, (50, 50, 70, 70))
+    store.pop(0)
+    # Queda: o .txt nunca foi gravado e o journal continua no disco
+    journal.close()
+    assert os.path.exists(journal.path)
+
+    stats = replay_journal(journal.path)
+    assert stats == {'files': 1, 'edits': 4, 'skipped': 0}
+    assert read_ids(label_path) == [1, 0]
+    _, boxes = parse_yolo(open(label_path).read())
+    assert abs(boxes[1][0] - 0.5) < 1e-6 and abs(boxes[0][0] - 0.6) < 1e-6
+    assert not os.path.exists(journal.path)
+
+
+def test_committed_edits_are_not_replayed(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write(label_path, "")
+    journal, store = open_session(tmp_path, label_path)
+    store.append(("medidor", 10, 10, 30, 30))
+    token = journal.save_marker()
+    write(label_path, store.to_yolo(*SIZE))
+    journal.commit(label_path, token)
+    store.append(("display", 40, 40, 60, 60))
+    journal.close()
+
+    assert replay_journal(journal.path) == {'files': 1, 'edits': 1, 'skipped': 0}
+    assert read_ids(label_path) == [0, 1]
+
+
+def test_clean_session_removes_journal(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write(label_path, "")
+    journal, store = open_session(tmp_path, label_path)
+    store.append(("medidor", 10, 10, 30, 30))
+    token = journal.save_marker()
+    write(label_path, store.to_yolo(*SIZE))
+    journal.commit(label_path, token)
+    journal.close()
+    assert not os.path.exists(journal.path)
+    assert replay_journal(journal.path) == {'files': 0, 'edits': 0, 'skipped': 0}
+
+
+def test_file_changed_after_crash_is_skipped(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write(label_path, "")
+    journal, store = open_session(tmp_path, label_path)
+    store.append(("medidor", 10, 10, 30, 30))
+    journal.close()
+    # O .txt mudou por fora: a gravação pode ter chegado sem o COMMIT
+    write(label_path, "1 0.5 0.5 0.1 0.1\n")
+    assert replay_journal(journal.path)['skipped'] == 1
+    assert read_ids(label_path) == [1]
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write(label_path, "")
+    journal, store = open_session(tmp_path, label_path)
+    store.append(("medidor", 10, 10, 30, 30))
+    store.append(("display", 40, 40, 60, 60))
+    journal.close()
+    with open(journal.path, 'r+b') as f:
+        f.truncate(os.path.getsize(journal.path) - 3)
+    assert replay_journal(journal.path)['edits'] == 1
+    assert read_ids(label_path) == [0]
+
+
+def test_failed_open_leaves_journal_off(tmp_path):
+    label_path = str(tmp_path / "a.txt")
+    write(label_path, "")
+    journal = EditJournal(sync_interval=0.01)
+    with pytest.raises(OSError):
+        journal.open(str(tmp_path / "sem_pasta" / JOURNAL_NAME))
+    assert not journal.is_open()
+    # Sem journal as edições seguem normalmente, só não são registradas
+    journal.begin_image(label_path, SIZE)
+    journal.record("add", 0, 1.0, 1.0, 2.0, 2.0)
+    assert journal.save_marker() is None and journal.records == 0
+    assert not journal.compact()
+    journal.close()
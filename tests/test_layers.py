@@ -0,0 +1,120 @@
+from itertools import count
+from src.annotations import AnnotationStore
+from src.layers import AnnotationLayer
+
+
+class FakeCanvas:
+    """Só o que a camada usa do tk.Canvas, registrando itens e chamadas."""
+
+    def __init__(self):
+        self.items = {}
+        self.calls = 0
+        self._ids = count(1)
+
+    def _new(self, kind, coords, options):
+        item = next(self._ids)
+        tags = options.get("tags", ())
+        self.items[item] = {'kind': kind, 'coords': list(coords), 'options': dict(options),
+                            'tags': (tags,) if isinstance(tags, str) else tuple(tags)}
+        self.calls += 1
+        return item
+
+    def create_rectangle(self, *coords, **options):
+        return self._new("rectangle", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._new("text", coords, options)
+
+    def delete(self, *items):
+        self.calls += 1
+        for item in items:
+            if isinstance(item, str):
+                for key in [k for k, v in self.items.items() if item in v['tags']]:
+                    del self.items[key]
+            else:
+                self.items.pop(item, None)
+
+    def coords(self, item, *coords):
+        self.calls += 1
+        self.items[item]['coords'] = list(coords)
+
+    def itemconfig(self, item, **options):
+        self.calls += 1
+        self.items[item]['options'].update(options)
+
+    def tag_raise(self, item):
+        self.calls += 1
+
+    def scale(self, tag, x, y, fx, fy):
+        self.calls += 1
+        for item in self.items.values():
+            if tag in item['tags']:
+                item['coords'] = [value * fx for value in item['coords']]
+
+    def count(self, tag):
+        return sum(1 for item in self.items.values() if tag in item['tags'])
+
+
+COLORS = {"medidor": "#00FF00", "display": "#0000FF"}
+
+
+def make_layer(boxes=50):
+    store = AnnotationStore(["medidor", "display"])
+    for i in range(boxes):
+        store.append(("medidor" if i % 2 else "display", i, i, i + 10, i + 10))
+    canvas = FakeCanvas()
+    layer = AnnotationLayer(canvas)
+    layer.sync(store, COLORS, 1.0)
+    return store, canvas, layer
+
+
+def test_sync_creates_and_diffs():
+    store, canvas, layer = make_layer(5)
+    assert len(layer) == 5 and canvas.count("bbox") == 5 and canvas.count("label") == 10
+    layer.sync(store, COLORS, 1.0)
+    assert layer.last_touched == 0
+    store.set_box(0, (1, 1, 2, 2))
+    layer.sync(store, COLORS, 1.0)
+    assert layer.last_touched == 3
+
+
+def test_add_and_remove_touch_only_one_box():
+    store, canvas, layer = make_layer()
+    calls = canvas.calls
+    store.append(("medidor", 5, 5, 50, 50))
+    layer.add_one(store, len(store) - 1, COLORS)
+    assert len(layer) == 51 and layer.last_touched == 3
+    assert canvas.calls - calls == 3
+    new_id = int(store.ids[-1])
+    assert canvas.items[layer.item_for(new_id)]['coords'] == [5, 5, 50, 50]
+
+    calls = canvas.calls
+    store.pop(len(store) - 1)
+    layer.remove_one(new_id)
+    assert len(layer) == 50 and canvas.calls - calls == 1
+    assert layer.item_for(new_id) is None and canvas.count("bbox") == 50
+    # Depois das edições incrementais o sync completo não encontra diferenças
+    layer.sync(store, COLORS, 1.0)
+    assert layer.last_touched == 0
+
+
+def test_removing_selected_box_drops_handles():
+    store, canvas, layer = make_layer(3)
+    annotation_id = int(store.ids[1])
+    layer.select(annotation_id)
+    assert canvas.count("handle") == 4
+    layer.remove_one(annotation_id)
+    assert layer.selected is None and canvas.count("handle") == 0
+
+
+def test_update_one_and_zoom_rescale():
+    store, canvas, layer = make_layer(2)
+    store.set_box(0, (10, 20, 30, 40))
+    layer.update_one(store, 0, COLORS)
+    rect = layer.item_for(int(store.ids[0]))
+    assert canvas.items[rect]['coords'] == [10, 20, 30, 40]
+    layer.sync(store, COLORS, 2.0)
+    assert canvas.items[rect]['coords'] == [20, 40, 60, 80]
+    store.append(("display", 1, 1, 5, 5))
+    layer.add_one(store, 2, COLORS)
+    assert canvas.items[layer.item_for(int(store.ids[2]))]['coords'] == [2, 2, 10, 10]
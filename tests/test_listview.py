@@ -0,0 +1,24 @@
+import tkinter as tk
+import pytest
+from src.listview import VirtualList
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("sem display")
+    yield root
+    root.destroy()
+
+
+def test_linespace_is_cached_until_font_changes(root):
+    rows = [f"linha {i}" for i in range(100)]
+    view = VirtualList(root, lambda: len(rows), rows.__getitem__, height=10)
+    view.pack()
+    root.update()
+    linespace = view.linespace
+    assert view.visible_rows() == max(1, view.listbox.winfo_height() // linespace)
+    view.set_font(("TkFixedFont", 30))
+    assert view.linespace > linespace
@@ -0,0 +1,93 @@
+import time
+import random
+import threading
+import pytest
+from src.pipeline import Pipeline, merge_stats
+
+
+def stage(items, busy, depth_avg, depth_max, workers=1):
+    return {'workers': workers, 'items': items, 'busy_seconds': busy, 'utilization': 0.0,
+            'queue_depth_avg': depth_avg, 'queue_depth_max': depth_max}
+
+
+def test_merge_stats_sums_runs():
+    first = {'seconds': 2.0, 'stages': {'decode': stage(10, 1.0, 2.0, 4, workers=2), 'infer': stage(10, 1.5, 1.0, 2)}}
+    second = {'seconds': 1.0, 'stages': {'decode': stage(30, 2.0, 4.0, 3, workers=2), 'infer': stage(30, 0.5, 0.0, 1)}}
+    assert merge_stats(None, first) is first
+    total = merge_stats(first, second)
+    assert total['seconds'] == 3.0
+    decode = total['stages']['decode']
+    assert decode['items'] == 40 and decode['busy_seconds'] == 3.0
+    assert decode['utilization'] == pytest.approx(0.5)
+    assert decode['queue_depth_avg'] == pytest.approx(3.5) and decode['queue_depth_max'] == 4
+    assert total['stages']['infer']['utilization'] == pytest.approx(2 / 3)
+
+
+def jitter(fn):
+    # Atrasos aleatórios fazem os workers terminarem fora de ordem
+    rng = random.Random(3)
+    lock = threading.Lock()
+
+    def stage_fn(value):
+        with lock:
+            delay = rng.uniform(0, 0.004)
+        time.sleep(delay)
+        return fn(value)
+    return stage_fn
+
+
+def test_results_keep_input_order():
+    pipeline = (Pipeline(queue_size=2)
+                .add_stage("double", jitter(lambda x: x * 2), workers=4)
+                .add_stage("inc", jitter(lambda x: x + 1), workers=3))
+    outputs = list(pipeline.run(range(100)))
+    assert outputs == [(i, i * 2 + 1, None) for i in range(100)]
+    stats = pipeline.stats()
+    assert stats['stages']['double']['items'] == 100 and stats['stages']['inc']['items'] == 100
+    assert stats['stages']['double']['workers'] == 4
+
+
+def test_stage_error_is_reported_per_item():
+    seen = []
+
+    def check(x):
+        if x % 5 == 0:
+            raise ValueError(x)
+        return x
+
+    pipeline = Pipeline().add_stage("check", check, workers=2).add_stage("record", seen.append)
+    outputs = list(pipeline.run(range(12)))
+    assert [item for item, _, _ in outputs] == list(range(12))
+    errors = [item for item, _, error in outputs if error is not None]
+    assert errors == [0, 5, 10]
+    assert all(isinstance(outputs[i][2], ValueError) for i in errors)
+    # Itens que falharam não passam pelos estágios seguintes
+    assert sorted(seen) == [x for x in range(12) if x % 5]
+    assert pipeline.stats()['stages']['record']['items'] == 9
+
+
+def test_should_stop_ends_the_run_early():
+    calls = []
+    pipeline = Pipeline(queue_size=1).add_stage("slow", jitter(calls.append), workers=2)
+    outputs = list(pipeline.run(range(1000), should_stop=lambda: len(calls) >= 5))
+    assert len(outputs) < 1000
+    assert [item for item, _, _ in outputs] == list(range(len(outputs)))
+
+
+def test_breaking_out_of_the_generator_does_not_hang():
+    produced = []
+
+    def items():
+        for i in range(10000):
+            produced.append(i)
+            yield i
+
+    pipeline = Pipeline(queue_size=2).add_stage("sleep", jitter(lambda x: x), workers=2)
+    start = time.perf_counter()
+    for item, _, _ in pipeline.run(items()):
+        if item == 3:
+            break
+    assert time.perf_counter() - start < 5
+    # O alimentador parou logo depois do break
+    time.sleep(0.05)
+    assert len(produced) < 100
@@ -0,0 +1,100 @@
+import csv
+import json
+import pytest
+from src import profiler
+from src.profiler import LatencyStats, Profiler
+
+
+def test_latency_summary_uses_recent_window():
+    stats = LatencyStats(window=100)
+    for ms in range(1, 201):
+        stats.add(float(ms))
+    summary = stats.summary()
+    assert summary['count'] == 200
+    assert summary['mean_ms'] == pytest.approx(100.5)
+    assert summary['max_ms'] == 200
+    # Percentis só das últimas 100 chamadas (101..200)
+    assert summary['p50_ms'] == pytest.approx(150.5)
+    assert 190 < summary['p95_ms'] < summary['p99_ms'] <= 200
+
+
+def test_wrap_records_failed_calls():
+    prof = Profiler()
+
+    def fails():
+        raise ValueError("x")
+
+    timed = prof.wrap("fails", fails)
+    with pytest.raises(ValueError):
+        timed()
+    assert timed.__name__ == "fails"
+    assert prof.stats["fails"].count == 1
+
+
+def test_instrument_class_only_public_methods_once():
+    class Target:
+        def visible(self):
+            return 1
+
+        def _hidden(self):
+            return 2
+
+    prof = Profiler()
+    prof.instrument_class(Target)
+    prof.instrument_class(Target)
+    target = Target()
+    assert target.visible() == 1 and target._hidden() == 2
+    assert list(prof.stats) == ["Target.visible"]
+    assert prof.stats["Target.visible"].count == 1
+
+
+class FakeWidget:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+
+def test_heartbeat_detects_stalls(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(profiler.time, "perf_counter", lambda: clock[0])
+    prof = Profiler(stall_ms=100, heartbeat_ms=50)
+    widget = FakeWidget()
+    prof.start_heartbeat(widget)
+
+    clock[0] = 0.06
+    widget.callbacks.pop()()
+    assert prof.stalls == []
+    # Próximo beat esperado em 0.11; chega 300 ms atrasado
+    clock[0] = 0.41
+    widget.callbacks.pop()()
+    assert len(prof.stalls) == 1
+    assert prof.stalls[0]['ms'] == pytest.approx(300)
+    assert len(widget.callbacks) == 1
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("", None), ("0", None), ("1", profiler.DEFAULT_REPORT),
+    ("sessao.csv", "sessao.csv"), ("sessao.JSON", "sessao.JSON")])
+def test_requested_reads_environment(monkeypatch, value, expected):
+    monkeypatch.setenv(profiler.PROFILE_ENV, value)
+    assert profiler.requested() == expected
+
+
+def test_export_json_and_csv(tmp_path):
+    prof = Profiler()
+    for ms in (1.0, 2.0, 30.0):
+        prof.record("slow", ms)
+    prof.record("fast", 0.5)
+
+    report = json.loads(open(prof.export(str(tmp_path / "r.json")), encoding="utf-8").read())
+    # Ordenado do maior p95 para o menor
+    assert list(report['calls']) == ["slow", "fast"]
+    assert report['calls']['slow']['count'] == 3
+
+    with open(prof.export(str(tmp_path / "r.csv")), newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:2] == ["name", "count"]
+    assert [row[0] for row in rows[1:]] == ["slow", "fast", "stalls"]
+    assert rows[1][1] == "3" and rows[3][1] == "0"
@@ -0,0 +1,110 @@
+import os
+import numpy as np
+from src.inference import Detections
+from src.result_cache import ResultCache, run_cached
+
+CLASSES = ["medidor", "display", "0"]
+
+
+def make_images(folder, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"img{i}.jpg")
+        with open(path, 'wb') as f:
+            f.write(bytes([i]) * (i + 1))
+        paths.append(path)
+    return paths
+
+
+def fake_result(path):
+    detections = Detections(np.array([0, 2], np.int32), np.array([0.9, 0.5], np.float32),
+                            np.array([[0, 0, 10, 10], [1, 2, 3, 4]], np.float32), CLASSES)
+    return {'image_path': path, 'detections': detections, 'meter_detected': True,
+            'display_detected': False, 'digits': os.path.basename(path)[3:-4], 'digits_confidence': 0.5}
+
+
+class FakeModel:
+    def __init__(self, fail=()):
+        self.seen = []
+        self.fail = set(fail)
+
+    def run(self, paths, should_stop=None):
+        for i, path in enumerate(paths):
+            self.seen.append(path)
+            if path in self.fail:
+                yield i, None, OSError("imagem ilegível")
+            else:
+                yield i, fake_result(path), None
+
+
+def open_cache(tmp_path, **options):
+    cache = ResultCache(str(tmp_path / "cache" / "results.sqlite"), **options)
+    cache.set_model("pesos", CLASSES)
+    return cache
+
+
+def test_second_run_comes_from_cache(tmp_path):
+    paths = make_images(str(tmp_path), 5)
+    cache = open_cache(tmp_path)
+    model = FakeModel(fail=[paths[3]])
+    first = list(run_cached(cache, paths, model.run))
+    assert [index for index, *_ in first] == list(range(5))
+    assert first[3][2] is not None
+    cache.close()
+
+    cache = open_cache(tmp_path)
+    model = FakeModel()
+    second = list(run_cached(cache, paths, model.run))
+    # Só a imagem que falhou volta para o modelo; a ordem é a original
+    assert model.seen == [paths[3]]
+    assert [index for index, *_ in second] == list(range(5))
+    assert [from_cache for *_, from_cache in second] == [True, True, True, False, True]
+    result = second[1][1]
+    assert result['digits'] == "1" and result['meter_detected'] and not result['display_detected']
+    np.testing.assert_array_equal(result['detections'].boxes, fake_result(paths[1])['detections'].boxes)
+    assert result['detections'].class_names == CLASSES
+    assert cache.stats()['entries'] == 5
+    cache.close()
+
+
+def test_key_changes_with_model_and_file(tmp_path):
+    paths = make_images(str(tmp_path), 2)
+    cache = open_cache(tmp_path)
+    list(run_cached(cache, paths, FakeModel().run))
+    with open(paths[0], 'ab') as f:
+        f.write(b"editada")
+    model = FakeModel()
+    list(run_cached(cache, paths, model.run))
+    assert model.seen == [paths[0]]
+
+    cache.set_model("outros pesos", CLASSES)
+    model = FakeModel()
+    list(run_cached(cache, paths, model.run))
+    assert model.seen == paths
+    cache.close()
+
+
+def test_interrupted_run_keeps_results(tmp_path):
+    paths = make_images(str(tmp_path), 6)
+    cache = open_cache(tmp_path, flush_every=100)
+    stop = []
+    for index, _, _, _ in run_cached(cache, paths, FakeModel().run, should_stop=lambda: bool(stop)):
+        if index == 2:
+            stop.append(True)
+            break
+    model = FakeModel()
+    list(run_cached(cache, paths, model.run))
+    assert model.seen == paths[3:]
+    cache.close()
+
+
+def test_eviction_keeps_recent_entries(tmp_path):
+    paths = make_images(str(tmp_path), 20)
+    cache = open_cache(tmp_path, max_bytes=1500, flush_every=1)
+    list(run_cached(cache, paths, FakeModel().run))
+    stats = cache.stats()
+    assert stats['evicted'] > 0 and stats['bytes'] <= 1500
+    model = FakeModel()
+    list(run_cached(cache, paths[-2:], model.run))
+    assert model.seen == []
+    cache.close()
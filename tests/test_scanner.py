@@ -0,0 +1,79 @@
+import os
+import pytest
+from src.scanner import FolderScanner, ImageList, iter_files, iter_label_files
+
+
+def touch(root, *names):
+    for name in names:
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+
+def test_image_list_blob():
+    images = ImageList()
+    images.append("", "a.jpg")
+    images.append("sub", "ção.png")
+    images.append("sub", "b.jpg")
+    images.append("", "c.jpg")
+    assert len(images) == 4
+    assert list(images) == ["a.jpg", os.path.join("sub", "ção.png"), os.path.join("sub", "b.jpg"), "c.jpg"]
+    assert images[-1] == "c.jpg"
+    with pytest.raises(IndexError):
+        images[4]
+    # Pastas internadas: "sub" guardado uma vez só
+    assert images._dirs == ["", "sub"]
+    assert images.nbytes() == len("a.jpgção.pngb.jpgc.jpg".encode()) + 4 * 4 + 8 * 5
+
+
+def test_image_list_keeps_undecodable_names():
+    name = os.fsdecode(b"foto\xff.jpg")
+    images = ImageList()
+    images.append("", name)
+    assert images[0] == name
+
+
+def test_iter_files_order_and_hidden_folders(tmp_path):
+    root = str(tmp_path)
+    touch(root, "b.jpg", "a.PNG", "x.gif", "sub/c.jpg", "sub/deep/d.bmp", ".thumbs/e.jpg")
+    flat = sorted(entry.name for _, entry in iter_files(root, (".jpg", ".png", ".bmp")))
+    assert flat == ["a.PNG", "b.jpg"]
+    found = [(rel_dir, entry.name) for rel_dir, entry in iter_files(root, (".jpg", ".png", ".bmp"), True)]
+    assert sorted(found) == sorted([("", "a.PNG"), ("", "b.jpg"), ("sub", "c.jpg"),
+                                    (os.path.join("sub", "deep"), "d.bmp")])
+
+
+def test_iter_label_files_needs_matching_image(tmp_path):
+    root = str(tmp_path)
+    touch(root, "a.jpg", "a.txt", "classes.txt", "sub/b.png", "sub/b.txt", "sub/a.txt")
+    found = sorted(os.path.join(rel_dir, entry.name) for rel_dir, entry in iter_label_files(root))
+    assert found == ["a.txt", os.path.join("sub", "b.txt")]
+
+
+def test_listing_errors_are_collected(tmp_path):
+    missing = str(tmp_path / "inexistente")
+    errors = []
+    assert list(iter_files(missing, (".jpg",), errors=errors)) == []
+    assert errors[0][0] == missing and isinstance(errors[0][1], OSError)
+    # Sem lista, a pasta é só pulada
+    assert list(iter_files(missing, (".jpg",))) == []
+
+
+def test_folder_scanner(tmp_path):
+    root = str(tmp_path)
+    touch(root, "a.jpg", "sub/b.jpg")
+    images = ImageList()
+    scanner = FolderScanner(root, images, recursive=True)
+    scanner.start()
+    assert scanner.wait_first(timeout=5)
+    scanner.done.wait(5)
+    assert not scanner.is_scanning()
+    assert sorted(images) == ["a.jpg", os.path.join("sub", "b.jpg")]
+    assert scanner.pop_errors() == []
+
+    scanner = FolderScanner(str(tmp_path / "inexistente"), ImageList())
+    scanner.start()
+    assert not scanner.wait_first(timeout=5)
+    scanner.done.wait(5)
+    errors = scanner.pop_errors()
+    assert len(errors) == 1 and scanner.pop_errors() == []
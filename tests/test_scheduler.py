@@ -0,0 +1,87 @@
+from src.scheduler import InputScheduler
+
+
+class FakeWidget:
+    # Registra os after() sem executar; o teste dispara o quadro
+    def __init__(self):
+        self.jobs = {}
+        self.cancelled = []
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        job = f"after#{self.next_id}"
+        self.jobs[job] = (ms, callback)
+        return job
+
+    def after_cancel(self, job):
+        self.cancelled.append(job)
+        self.jobs.pop(job, None)
+
+    def fire(self):
+        jobs, self.jobs = self.jobs, {}
+        for ms, callback in jobs.values():
+            callback()
+
+
+def test_last_value_wins_with_one_after_per_frame():
+    widget = FakeWidget()
+    scheduler = InputScheduler(widget, fps=50)
+    seen = []
+    for x in range(5):
+        scheduler.post("motion", seen.append, (x, x))
+    assert len(widget.jobs) == 1
+    assert list(widget.jobs.values())[0][0] == 20
+    widget.fire()
+    assert seen == [(4, 4)]
+    assert scheduler.stats() == {'received': 5, 'merged': 4, 'dispatched': 1, 'merge_rate': 0.8}
+
+
+def test_zoom_factors_are_merged():
+    widget = FakeWidget()
+    scheduler = InputScheduler(widget)
+    seen = []
+    for factor in (1.1, 1.1, 1 / 1.1, 2.0):
+        scheduler.post("zoom", seen.append, factor, merge=lambda a, b: a * b)
+    widget.fire()
+    assert len(seen) == 1
+    assert abs(seen[0] - 2.2) < 1e-9
+
+
+def test_keys_are_dispatched_in_post_order():
+    widget = FakeWidget()
+    scheduler = InputScheduler(widget)
+    seen = []
+    scheduler.post("drag", lambda v: seen.append(("drag", v)), 1)
+    scheduler.post("pan", lambda v: seen.append(("pan", v)), 2)
+    scheduler.post("drag", lambda v: seen.append(("drag", v)), 3)
+    widget.fire()
+    assert seen == [("drag", 3), ("pan", 2)]
+    # Depois do quadro, um novo evento agenda outro after()
+    scheduler.post("drag", lambda v: seen.append(("drag", v)), 4)
+    assert len(widget.jobs) == 1
+
+
+def test_flush_dispatches_now_and_cancels_the_frame():
+    widget = FakeWidget()
+    scheduler = InputScheduler(widget)
+    seen = []
+    scheduler.post("drag", seen.append, 1)
+    job = next(iter(widget.jobs))
+    scheduler.flush()
+    assert seen == [1]
+    assert widget.cancelled == [job] and not widget.jobs
+    scheduler.flush()
+    assert seen == [1]
+
+
+def test_cancel_drops_pending_events():
+    widget = FakeWidget()
+    scheduler = InputScheduler(widget)
+    seen = []
+    scheduler.post("motion", seen.append, 1)
+    scheduler.cancel()
+    assert not widget.jobs
+    scheduler.flush()
+    assert seen == []
+    assert scheduler.stats()['dispatched'] == 0
@@ -0,0 +1,72 @@
+import random
+from src.spatial import GridIndex
+
+
+def brute_force(boxes, x, y, tolerance=0.0):
+    hits = []
+    for box_id, (x1, y1, x2, y2) in boxes.items():
+        if (min(x1, x2) - tolerance <= x <= max(x1, x2) + tolerance and
+                min(y1, y2) - tolerance <= y <= max(y1, y2) + tolerance):
+            hits.append((abs(x2 - x1) * abs(y2 - y1), box_id))
+    return [box_id for _, box_id in sorted(hits)]
+
+
+def test_query_point_returns_smallest_first():
+    index = GridIndex(cell_size=50)
+    index.build([1, 2, 3], [(0, 0, 200, 200), (40, 40, 60, 60), (30, 30, 90, 90)])
+    assert index.query_point(50, 50) == [2, 3, 1]
+    assert index.query_point(150, 150) == [1]
+    assert index.query_point(500, 500) == []
+
+
+def test_inverted_boxes_and_tolerance():
+    index = GridIndex(cell_size=50)
+    # Caixa desenhada da direita para a esquerda
+    index.insert("a", (120, 80, 100, 60))
+    assert index.query_point(110, 70) == ["a"]
+    assert index.query_point(97, 70) == []
+    # A tolerância alcança a célula vizinha
+    assert index.query_point(97, 70, tolerance=4) == ["a"]
+
+
+def test_large_boxes_are_kept_apart():
+    index = GridIndex(cell_size=10, max_cells=4)
+    index.insert("big", (0, 0, 1000, 1000))
+    index.insert("small", (5, 5, 8, 8))
+    assert "big" in index._large and "small" not in index._large
+    assert index.query_point(6, 6) == ["small", "big"]
+    assert index.query_point(900, 900) == ["big"]
+    index.remove("big")
+    assert index.query_point(900, 900) == []
+    assert len(index) == 1
+
+
+def test_remove_and_update():
+    index = GridIndex(cell_size=32)
+    index.build(range(3), [(0, 0, 10, 10), (5, 5, 40, 40), (100, 100, 120, 120)])
+    index.remove(0)
+    assert 0 not in index
+    assert index.query_point(6, 6) == [1]
+    index.remove(0)
+    index.update(2, (0, 0, 8, 8))
+    assert index.box(2) == (0, 0, 8, 8)
+    assert index.query_point(110, 110) == []
+    assert index.query_point(6, 6) == [2, 1]
+    # Células vazias não ficam para trás
+    index.remove(1)
+    index.remove(2)
+    assert not index._cells
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    boxes = {}
+    for box_id in range(200):
+        x, y = rng.uniform(0, 2000), rng.uniform(0, 1500)
+        w, h = rng.uniform(1, 600), rng.uniform(1, 600)
+        boxes[box_id] = (x, y, x + w, y + h)
+    index = GridIndex(cell_size=64)
+    index.build(list(boxes), list(boxes.values()))
+    for _ in range(300):
+        x, y = rng.uniform(-50, 2600), rng.uniform(-50, 2100)
+        assert index.query_point(x, y, tolerance=3) == brute_force(boxes, x, y, tolerance=3)
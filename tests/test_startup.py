@@ -0,0 +1,31 @@
+import sys
+import json
+import subprocess
+import pytest
+from benchmarks.startup import HEAVY_MODULES, ROOT
+
+PROBE = """
+import sys, json, importlib
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def loaded_modules(*names):
+    # Processo novo: o pytest e os outros testes já carregaram outros módulos
+    completed = subprocess.run([sys.executable, "-c", PROBE, *names], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    return set(json.loads(completed.stdout))
+
+
+def test_inference_modules_do_not_load_heavy_modules():
+    loaded = loaded_modules("src.inference", "src.export", "src.pipeline", "src.workers",
+                            "src.result_cache", "inferencia_cli")
+    assert "src.inference" in loaded
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_app_defers_heavy_modules():
+    pytest.importorskip("ttkbootstrap")
+    assert not loaded_modules("appInferencia") & set(HEAVY_MODULES)
@@ -0,0 +1,70 @@
+import time
+from PIL import Image
+from src.thumbnails import ThumbnailCache
+
+
+def make_images(folder, count):
+    paths = []
+    for i in range(count):
+        path = folder / f"{i:03d}.png"
+        Image.new("RGB", (64, 48), (i * 5 % 256, 0, 0)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def wait_idle(cache, timeout=60):
+    done = []
+    deadline = time.monotonic() + timeout
+    while cache.has_pending() and time.monotonic() < deadline:
+        done += cache.poll()
+        time.sleep(0.02)
+    return done + cache.poll()
+
+
+def test_repeated_request_keeps_visible_paths_queued(tmp_path):
+    (tmp_path / "images").mkdir()
+    paths = make_images(tmp_path / "images", 40)
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "thumbs"), size=32, workers=1)
+    try:
+        cache.request(paths)
+        # Um novo desenho com as mesmas células visíveis não cancela nada
+        cache.request(paths)
+        done = wait_idle(cache)
+        assert sorted(path for path, thumb in done if thumb) == paths
+        assert all(cache.cached_path(path) for path in paths)
+    finally:
+        cache.shutdown()
+
+
+def test_request_cancels_only_paths_that_left_the_view(tmp_path):
+    (tmp_path / "images").mkdir()
+    paths = make_images(tmp_path / "images", 40)
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "thumbs"), size=32, workers=1)
+    try:
+        cache.request(paths)
+        visible = paths[30:]
+        cache.request(visible)
+        done = wait_idle(cache)
+        generated = {path for path, thumb in done if thumb}
+        assert set(visible) <= generated
+        # Os que saíram da tela e ainda não tinham começado foram cancelados
+        assert len(generated) < len(paths)
+        # Já gerados não voltam para o pool
+        cache.request(visible)
+        assert not cache.has_pending()
+    finally:
+        cache.shutdown()
+
+
+def test_unreadable_image_is_not_requested_again(tmp_path):
+    bad = tmp_path / "bad.png"
+    bad.write_text("not an image")
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "thumbs"), size=32, workers=1)
+    try:
+        cache.request([str(bad)])
+        assert wait_idle(cache) == [(str(bad), None)]
+        cache.request([str(bad)])
+        assert not cache.has_pending()
+        assert cache.failed == 1
+    finally:
+        cache.shutdown()
@@ -0,0 +1,139 @@
+import pytest
+from PIL import Image
+from src.tiles import TiledViewport, TilePyramid, half_size
+
+
+def test_level_for_zoom_stops_at_min_size():
+    pyramid = TilePyramid(Image.new("RGB", (2048, 1024)), min_size=256)
+    assert pyramid.level_for_zoom(1.0) == 0
+    assert pyramid.level_for_zoom(0.6) == 0
+    assert pyramid.level_for_zoom(0.5) == 1
+    assert pyramid.level_for_zoom(0.3) == 1
+    assert pyramid.level_for_zoom(0.25) == 2
+    # 1024 / 8 = 128 ficaria abaixo de min_size
+    assert pyramid.level_for_zoom(0.01) == 2
+
+
+def test_levels_are_built_on_demand():
+    pyramid = TilePyramid(Image.new("RGB", (1025, 768)))
+    assert pyramid.nbytes() == 0
+    level = pyramid.get_level(2)
+    assert len(pyramid.levels) == 3
+    assert pyramid.levels[1].size == (513, 384) and level.size == (257, 192)
+    assert pyramid.nbytes() == 513 * 384 * 3 + 257 * 192 * 3
+    assert pyramid.get_level(1) is pyramid.levels[1]
+
+
+@pytest.mark.parametrize("mode, reduced_mode", [("P", "RGB"), ("1", "L"), ("I;16", "I;16"), ("L", "L")])
+def test_zoom_out_on_any_mode(mode, reduced_mode):
+    pyramid = TilePyramid(Image.new(mode, (1024, 768)))
+    level = pyramid.get_level(pyramid.level_for_zoom(0.3))
+    assert level.size == (512, 384) and level.mode == reduced_mode
+
+
+def test_palette_colors_are_averaged():
+    image = Image.new("P", (4, 2))
+    image.putpalette([0, 0, 0, 255, 255, 255] + [0] * 762)
+    image.putdata([0, 1, 1, 1, 0, 1, 1, 1])
+    reduced = half_size(image)
+    assert reduced.mode == "RGB"
+    assert reduced.getpixel((0, 0)) == (128, 128, 128)
+    assert reduced.getpixel((1, 0)) == (255, 255, 255)
+
+
+def test_palette_transparency_is_kept():
+    image = Image.new("P", (4, 4))
+    image.info["transparency"] = 0
+    assert half_size(image).mode == "RGBA"
+
+
+class FakeCanvas:
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.items = {}
+        self.next_id = 1
+
+    def canvasx(self, x):
+        return x
+
+    def canvasy(self, y):
+        return y
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def create_image(self, x, y, anchor, image, tags):
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = image
+        return item
+
+    def itemconfig(self, item, image):
+        self.items[item] = image
+
+    def delete(self, item):
+        del self.items[item]
+
+    def tag_lower(self, tag):
+        pass
+
+
+class FakePhoto:
+    # PhotoImage sem Tk: guarda o bloco renderizado
+    def __init__(self, image):
+        self.image = image
+
+    def width(self):
+        return self.image.width
+
+    def height(self):
+        return self.image.height
+
+
+@pytest.fixture
+def viewport(monkeypatch):
+    from src import tiles
+    monkeypatch.setattr(tiles.ImageTk, "PhotoImage", FakePhoto)
+    viewport = TiledViewport(FakeCanvas(300, 200), tile_size=128)
+    viewport.set_image(Image.new("RGB", (1000, 600)))
+    return viewport
+
+
+def test_edge_tiles_are_clipped_to_display_size():
+    viewport = TiledViewport(FakeCanvas(300, 200), tile_size=256)
+    viewport.set_image(Image.new("RGB", (1000, 600)))
+    viewport.set_zoom(0.3)
+    level = viewport.pyramid.level_for_zoom(0.3)
+    assert level == 1
+    # 1000 * 0.3 = 300: o segundo bloco tem só 44 pixels de largura
+    assert viewport._render_tile(level, 0, 0, Image.BILINEAR).size == (256, 180)
+    assert viewport._render_tile(level, 1, 0, Image.BILINEAR).size == (44, 180)
+
+
+def test_render_places_previews_then_upgrades(viewport):
+    viewport.render()
+    # 300x200 com blocos de 128: 3 x 2 visíveis, todos como prévia
+    assert len(viewport.canvas.items) == 6
+    assert viewport.pending_upgrades() == 6
+
+    assert viewport.upgrade(max_tiles=4) == 2
+    assert viewport.pending_upgrades() == 2
+    assert viewport.upgrade(max_tiles=4) == 0
+    assert viewport.pending_upgrades() == 0
+    assert len(viewport.canvas.items) == 6
+    assert viewport.rendered == 12
+
+
+def test_final_tiles_are_reused_from_cache(viewport):
+    viewport.render()
+    viewport.upgrade(max_tiles=6)
+    viewport.set_zoom(1.0)
+    assert viewport.canvas.items == {}
+    rendered = viewport.rendered
+    viewport.render()
+    # Blocos finais já em cache entram direto, sem nova prévia
+    assert viewport.pending_upgrades() == 0
+    assert viewport.rendered == rendered
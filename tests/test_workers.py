@@ -0,0 +1,30 @@
+import pytest
+from src.workers import ScalingReport, WorkerPool, threads_per_worker
+
+
+def test_failed_load_discards_pool(tmp_path):
+    model_path = str(tmp_path / "inexistente.pt")
+    pool = WorkerPool(model_path, 2, threads=1)
+    assert pool.matches(model_path, 2)
+    try:
+        with pytest.raises(RuntimeError, match="Failed to load model"):
+            pool.wait_ready(timeout=120)
+        assert not pool.matches(model_path, 2)
+    finally:
+        pool.close()
+
+
+def test_threads_per_worker_is_at_least_one():
+    assert threads_per_worker(10 ** 6) == 1
+    assert threads_per_worker(1) >= 1
+
+
+def test_scaling_report():
+    report = ScalingReport()
+    report.record(1, 100, 10.0)
+    report.record(4, 400, 20.0)
+    report.record(8, 0, 1.0)
+    assert report.efficiency(1) == 1.0
+    assert report.efficiency(4) == pytest.approx(0.5)
+    assert report.efficiency(8) is None
+    assert report.summary() == "1p 10.0 img/s | 4p 20.0 img/s (50%)"
@@ -0,0 +1,53 @@
+import os
+import threading
+from src.writer import AsyncWriter, atomic_write
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_atomic_write_replaces_without_leftovers(tmp_path):
+    path = str(tmp_path / "a.txt")
+    atomic_write(path, "um\n")
+    atomic_write(path, "dois\n")
+    assert read(path) == "dois\n"
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_pending_writes_of_a_file_are_coalesced(tmp_path):
+    gate = threading.Event()
+    written = []
+
+    def on_written(path, token):
+        # Segura a thread de gravação até todas as versões terem chegado
+        gate.wait(5)
+        written.append((os.path.basename(path), token))
+
+    writer = AsyncWriter(on_written=on_written)
+    first, other = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+    writer.submit(other, "b\n", token=0)
+    for version in range(1, 6):
+        writer.submit(first, f"versão {version}\n", token=version)
+    gate.set()
+    assert writer.flush(timeout=5)
+    writer.close(timeout=5)
+
+    assert read(first) == "versão 5\n" and read(other) == "b\n"
+    assert writer.coalesced == 4 and writer.written == 2
+    assert written == [("b.txt", 0), ("a.txt", 5)]
+    assert writer.pending() == 0
+
+
+def test_errors_are_collected(tmp_path):
+    writer = AsyncWriter()
+    missing = str(tmp_path / "sem_pasta" / "a.txt")
+    writer.submit(missing, "x")
+    writer.submit(str(tmp_path / "b.txt"), "y")
+    writer.close(timeout=5)
+    errors = writer.pop_errors()
+    assert [path for path, _ in errors] == [missing]
+    assert isinstance(errors[0][1], OSError)
+    assert writer.pop_errors() == []
+    assert read(str(tmp_path / "b.txt")) == "y"